@@ -0,0 +1,171 @@
+# src/benchmarks/bench_json_provider.py
+
+"""
+Micro-benchmark: provider JSON padrão do Flask x `OrjsonProvider`, com
+payloads no formato de `/api/reviews/pending`, `/api/subjects` e
+`/api/sync/delta/review_sessions`.
+
+Confere também que a saída com ensure_ascii é idêntica byte a byte e que a saída
+em UTF-8 (JSON_ENSURE_ASCII=0) tem o mesmo conteúdo.
+
+O delta de sincronização é medido também contra o caminho antigo
+(`json.dumps(payload, default=json_converter)`, ainda o padrão) e com
+SYNC_JSON_COMPACT=1, que muda o texto enviado (separadores compactos).
+
+Uso:
+    python benchmarks/bench_json_provider.py [--reviews 300] [--subjects 80] [--repeat 20]
+"""
+import argparse
+import json
+from datetime import datetime, timezone
+import os
+import random
+import sys
+import timeit
+import uuid
+
+# Mesmo ajuste de caminho do main.py, para importar o pacote `src`
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from flask import Flask  # noqa: E402
+from flask.json.provider import DefaultJSONProvider  # noqa: E402
+
+from src.routes.sync import json_converter  # noqa: E402
+from src.utils.json_provider import OrjsonProvider, orjson  # noqa: E402
+
+LOREM = (
+    'A insuficiência cardíaca é uma síndrome clínica em que o coração não consegue bombear '
+    'sangue suficiente para atender às necessidades metabólicas do organismo. 💓 '
+)
+
+
+def _ts(rng):
+    return f'2026-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}T{rng.randint(0, 23):02d}:00:00.123456+00:00'
+
+
+def _subject(rng, parent_id=None):
+    return {
+        'id': str(uuid.UUID(int=rng.getrandbits(128))), 'user_id': str(uuid.UUID(int=rng.getrandbits(128))),
+        'name': rng.choice(['Cardiologia', 'Nefrologia', 'Farmacologia', 'Anatomia']), 'description': None,
+        'color': '#%06X' % rng.getrandbits(24), 'icon': 'book', 'parent_id': parent_id,
+        'hierarchy_path': 'Medicina > Clínica', 'incidence_weight': rng.randint(1, 5),
+        'created_at': _ts(rng), 'updated_at': _ts(rng), 'deleted_at': None,
+    }
+
+
+def pending_reviews_payload(rng, count):
+    """Formato de /api/reviews/pending: sessões com o resumo e a matéria embutidos."""
+    reviews = []
+    for _ in range(count):
+        summary_id = str(uuid.UUID(int=rng.getrandbits(128)))
+        reviews.append({
+            'id': str(uuid.UUID(int=rng.getrandbits(128))), 'user_id': str(uuid.UUID(int=rng.getrandbits(128))),
+            'summary_id': summary_id, 'last_reviewed': _ts(rng), 'next_review': _ts(rng),
+            'review_count': rng.randint(0, 30), 'difficulty_rating': rng.randint(1, 5),
+            'ease_factor': round(rng.uniform(1.3, 3.0), 2), 'interval_days': rng.randint(1, 120),
+            'last_weight_multiplier': round(rng.uniform(0.5, 2), 3), 'is_completed': False,
+            'review_frequency_days': None,
+            'summaries': {
+                'id': summary_id, 'title': 'Resumo sobre insuficiência cardíaca',
+                'content': LOREM * rng.randint(5, 40), 'tags': ['cardio', 'clínica'],
+                'is_favorite': rng.random() < 0.2, 'difficulty_level': rng.randint(1, 5),
+                'perplexity_citations': [f'https://example.org/{i}' for i in range(rng.randint(0, 5))],
+                'created_at': _ts(rng), 'updated_at': _ts(rng), 'deleted_at': None,
+                'subjects': _subject(rng),
+            },
+        })
+    return {'pending_reviews': reviews, 'total_pending': len(reviews)}
+
+
+def subjects_payload(rng, count):
+    """Formato de /api/subjects: lista plana e árvore de matérias."""
+    subjects = []
+    for index in range(count):
+        parent = subjects[rng.randrange(index)]['id'] if index and rng.random() < 0.7 else None
+        subjects.append(_subject(rng, parent))
+    by_parent = {}
+    for subject in subjects:
+        by_parent.setdefault(subject['parent_id'], []).append(subject)
+
+    def tree(parent_id):
+        return [dict(subject, children=tree(subject['id'])) for subject in by_parent.get(parent_id, [])]
+
+    return {'subjects': subjects, 'subjects_tree': tree(None)}
+
+
+def review_sessions_delta_payload(rng, count):
+    """Formato de /api/sync/delta/review_sessions: só ids, números e datas (ASCII puro)."""
+    items = []
+    for _ in range(count):
+        items.append({
+            'id': str(uuid.UUID(int=rng.getrandbits(128))), 'user_id': str(uuid.UUID(int=rng.getrandbits(128))),
+            'summary_id': str(uuid.UUID(int=rng.getrandbits(128))), 'last_reviewed': _ts(rng),
+            'next_review': _ts(rng), 'review_count': rng.randint(0, 30), 'difficulty_rating': rng.randint(1, 5),
+            'ease_factor': round(rng.uniform(1.3, 3.0), 2), 'interval_days': rng.randint(1, 120),
+            'last_weight_multiplier': round(rng.uniform(0.5, 2), 3), 'is_completed': False,
+            'created_at': _ts(rng), 'updated_at': _ts(rng), 'deleted_at': None,
+        })
+    return {'items': items, 'server_timestamp': _ts(rng), 'next_cursor': None, 'has_more': False}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--reviews', type=int, default=300)
+    parser.add_argument('--subjects', type=int, default=80)
+    parser.add_argument('--sessions', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    if orjson is None:
+        print('orjson não está instalado; nada a comparar.')
+        return
+
+    app = Flask(__name__)
+    stdlib, fast, utf8 = DefaultJSONProvider(app), OrjsonProvider(app), OrjsonProvider(app)
+    utf8.ensure_ascii = False
+    rng = random.Random(42)
+    payloads = {
+        '/reviews/pending': pending_reviews_payload(rng, args.reviews),
+        '/subjects': subjects_payload(rng, args.subjects),
+        '/sync/delta/review_sessions': review_sessions_delta_payload(rng, args.sessions),
+    }
+
+    def best(provider, payload):
+        return min(timeit.repeat(lambda: provider.response(payload), number=1, repeat=args.repeat))
+
+    for name in payloads:
+        app.add_url_rule(name, name, lambda: None)
+
+    for name, payload in payloads.items():
+        # Contexto de requisição da rota, como no `jsonify` de verdade
+        with app.test_request_context(name):
+            expected = stdlib.response(payload).get_data()
+            same_bytes = fast.response(payload).get_data() == expected
+            same_content = json.loads(utf8.response(payload).get_data()) == json.loads(expected)
+            legacy, current, raw = best(stdlib, payload), best(fast, payload), best(utf8, payload)
+            print(f'{name} ({len(expected) / 1024:.0f} KiB, melhor de {args.repeat})')
+            print(f'  json padrão       : {legacy * 1000:8.2f} ms')
+            print(f'  orjson (ASCII)    : {current * 1000:8.2f} ms  ({legacy / current:.2f}x, idêntico: {"sim" if same_bytes else "NÃO"})')
+            print(f'  orjson (UTF-8)    : {raw * 1000:8.2f} ms  ({legacy / raw:.2f}x, mesmo conteúdo: {"sim" if same_content else "NÃO"})')
+
+    # Delta de sincronização como a rota serializa (com um datetime, que passa pelo json_converter)
+    payload = dict(payloads['/sync/delta/review_sessions'], server_timestamp=datetime.now(timezone.utc))
+    expected = json.dumps(payload, default=json_converter)
+
+    def best_text(dumps):
+        return min(timeit.repeat(lambda: dumps(payload), number=1, repeat=args.repeat))
+
+    compact = {'orjson (ASCII)': fast, 'orjson (UTF-8)': utf8}
+    print(f'/sync/delta (rota, {len(expected) / 1024:.0f} KiB, melhor de {args.repeat})')
+    legacy = best_text(lambda value: json.dumps(value, default=json_converter))
+    print(f'  json.dumps (padrão, SYNC_JSON_COMPACT=0): {legacy * 1000:8.2f} ms')
+    for label, provider in compact.items():
+        dumps = lambda value, p=provider: p.dumps(value, default=json_converter, separators=(',', ':'))  # noqa: E731
+        same_content = json.loads(dumps(payload)) == json.loads(expected)
+        elapsed = best_text(dumps)
+        print(f'  {label}, SYNC_JSON_COMPACT=1   : {elapsed * 1000:8.2f} ms  '
+              f'({legacy / elapsed:.2f}x, mesmo conteúdo: {"sim" if same_content else "NÃO"}, '
+              f'{len(dumps(payload)) / 1024:.0f} KiB)')
+
+if __name__ == '__main__':
+    main()
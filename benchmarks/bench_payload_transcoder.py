@@ -0,0 +1,90 @@
+# src/benchmarks/bench_payload_transcoder.py
+
+"""
+Micro-benchmark: `convert_payload` (antigo) x `transcode_payload` (por esquema)
+em lotes de sincronização realistas.
+
+Uso:
+    python benchmarks/bench_payload_transcoder.py [--changes 500] [--repeat 20]
+"""
+import argparse
+import os
+import random
+import sys
+import timeit
+import uuid
+
+# Mesmo ajuste de caminho do main.py, para importar o pacote `src`
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.utils.payload_transcoder import convert_payload, transcode_payload  # noqa: E402
+
+NOW_MS = 1760000000000
+
+
+def _ms(offset_days=0):
+    return NOW_MS + offset_days * 86400000 + random.randint(0, 86400000)
+
+
+def make_change(rng):
+    """Gera uma mudança parecida com as que o app Flutter envia no /api/sync/batch."""
+    table = rng.choice(['summaries', 'review_sessions', 'flashcards', 'flashcard_review_sessions', 'exercises', 'subjects'])
+    if table == 'summaries':
+        payload = {
+            'id': str(uuid.uuid4()), 'subjectId': str(uuid.uuid4()), 'title': 'Resumo de Fisiologia',
+            'content': '## Seção\n' + 'texto ' * 200, 'tags': ['cardio', 'renal'], 'isFavorite': False,
+            'createdAt': _ms(-30), 'updatedAt': _ms(), 'deletedAt': None,
+        }
+    elif table in ('review_sessions', 'flashcard_review_sessions'):
+        payload = {
+            'id': str(uuid.uuid4()),
+            ('summaryId' if table == 'review_sessions' else 'flashcardId'): str(uuid.uuid4()),
+            'lastReviewed': _ms(-1), 'nextReview': _ms(3), 'reviewCount': rng.randint(0, 20),
+            'difficultyRating': rng.randint(1, 5), 'easeFactor': 2.5, 'intervalDays': rng.randint(1, 60),
+            'isCompleted': False, 'createdAt': _ms(-60), 'updatedAt': _ms(),
+        }
+    elif table == 'flashcards':
+        payload = {
+            'id': str(uuid.uuid4()), 'deckId': str(uuid.uuid4()), 'summaryId': str(uuid.uuid4()),
+            'question': 'Qual a função do néfron?', 'answer': 'Filtrar o sangue',
+            'createdAt': _ms(-10), 'updatedAt': _ms(),
+        }
+    elif table == 'exercises':
+        payload = {
+            'id': str(uuid.uuid4()), 'subjectId': str(uuid.uuid4()), 'statement': 'Enunciado ' * 30,
+            'options': [{'option': letter, 'text': f'Alternativa {letter}'} for letter in 'ABCDE'],
+            'answer': 'C', 'createdAt': _ms(-5), 'updatedAt': _ms(),
+        }
+    else:
+        payload = {
+            'id': str(uuid.uuid4()), 'name': 'Cardiologia', 'parentId': None, 'color': '#FF0000',
+            'incidenceWeight': 3, 'createdAt': _ms(-90), 'updatedAt': _ms(),
+        }
+    return table, payload
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--changes', type=int, default=500, help='mudanças por lote')
+    parser.add_argument('--repeat', type=int, default=20, help='repetições do lote')
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    random.seed(42)
+    batch = [make_change(rng) for _ in range(args.changes)]
+
+    # As duas implementações precisam produzir o mesmo resultado nos lotes realistas
+    mismatches = sum(1 for table, payload in batch if convert_payload(payload) != transcode_payload(table, payload))
+
+    legacy = min(timeit.repeat(lambda: [convert_payload(p) for _, p in batch], number=1, repeat=args.repeat))
+    schema = min(timeit.repeat(lambda: [transcode_payload(t, p) for t, p in batch], number=1, repeat=args.repeat))
+
+    print(f'Lote de {args.changes} mudanças (melhor de {args.repeat} execuções)')
+    print(f'  convert_payload   : {legacy * 1000:8.2f} ms  ({legacy / args.changes * 1e6:6.1f} µs/mudança)')
+    print(f'  transcode_payload : {schema * 1000:8.2f} ms  ({schema / args.changes * 1e6:6.1f} µs/mudança)')
+    print(f'  ganho             : {legacy / schema:8.2f}x')
+    print(f'  divergências      : {mismatches}')
+
+
+if __name__ == '__main__':
+    main()
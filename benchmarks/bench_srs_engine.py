@@ -0,0 +1,119 @@
+# src/benchmarks/bench_srs_engine.py
+
+"""
+Aproximação local do SRS (`utils/srs_engine.py`): paridade com a RPC e desempenho.
+
+- `--parity arquivo.jsonl`: refaz cada chamada gravada com SRS_RECORD_PATH e
+  compara a saída da aproximação local com a da RPC `calculate_srs_update_v2`. Sai com
+  código 1 se houver divergência. A aproximação só pode substituir a RPC nas
+  rotas depois de passar nesta conferência com gravações reais.
+- Sem `--parity`: compara `schedule` item a item com `schedule_batch`
+  (vetorizado) em itens sintéticos e confere que os resultados são iguais.
+
+Uso:
+    python benchmarks/bench_srs_engine.py [--items 5000] [--repeat 10]
+    python benchmarks/bench_srs_engine.py --parity srs_calls.jsonl
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import timeit
+from datetime import datetime, timezone
+
+# Mesmo ajuste de caminho do main.py, para importar o pacote `src`
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.utils.srs_engine import np, schedule, schedule_batch  # noqa: E402
+
+COMPARED_FIELDS = ('new_ease_factor', 'new_interval', 'new_weight_multiplier')
+
+
+def _divergences(expected, actual):
+    problems = []
+    for field in COMPARED_FIELDS:
+        if expected.get(field) is None:
+            continue
+        if abs(float(expected[field]) - float(actual[field])) > 1e-6:
+            problems.append(f'{field}: rpc={expected[field]} local={actual[field]}')
+    # A data é comparada pelo dia: o horário depende do instante da chamada
+    if str(expected.get('next_review_date', ''))[:10] != actual['next_review_date'][:10]:
+        problems.append(f"next_review_date: rpc={expected.get('next_review_date')} local={actual['next_review_date']}")
+    return problems
+
+
+def check_parity(path):
+    total = failed = 0
+    with open(path, encoding='utf-8') as handle:
+        for line_number, line in enumerate(handle, 1):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            params = record['params']
+            now = datetime.fromisoformat(record['recorded_at'])
+            actual = schedule(
+                record['session'], params['p_grade'],
+                params.get('p_coupling_data'), params.get('p_exercise_data'), now=now
+            )
+            total += 1
+            problems = _divergences(record['result'], actual)
+            if problems:
+                failed += 1
+                print(f"linha {line_number} ({params.get('p_item_type')} {params.get('p_item_id')}): " + '; '.join(problems))
+    print(f'{total} chamadas gravadas, {failed} divergentes')
+    return failed == 0
+
+
+def synthetic_items(rng, count):
+    sessions, grades, couplings, exercises = [], [], [], []
+    for _ in range(count):
+        sessions.append({
+            'ease_factor': round(rng.uniform(1.3, 3.2), 2),
+            'interval_days': rng.randint(1, 200),
+            'review_count': rng.randint(0, 30),
+        })
+        grades.append(rng.randint(1, 5))
+        kind = rng.random()
+        if kind < 0.4:
+            couplings.append(json.dumps({'summaryGrade': rng.randint(1, 5)}))
+        elif kind < 0.7:
+            couplings.append({f'card-{i}': rng.randint(1, 5) for i in range(rng.randint(1, 12))})
+        else:
+            couplings.append(None)
+        exercises.append({'correct_count': rng.randint(0, 10), 'incorrect_count': rng.randint(0, 10)} if rng.random() < 0.5 else None)
+    return sessions, grades, couplings, exercises
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--parity', help='arquivo JSONL gravado com SRS_RECORD_PATH')
+    parser.add_argument('--items', type=int, default=5000)
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    if args.parity:
+        sys.exit(0 if check_parity(args.parity) else 1)
+
+    sessions, grades, couplings, exercises = synthetic_items(random.Random(42), args.items)
+    now = datetime.now(timezone.utc)
+
+    def one_by_one():
+        return [schedule(*item, now=now) for item in zip(sessions, grades, couplings, exercises)]
+
+    def vectorized():
+        return schedule_batch(sessions, grades, couplings, exercises, now=now)
+
+    same = one_by_one() == vectorized()
+    scalar = min(timeit.repeat(one_by_one, number=1, repeat=args.repeat))
+    batch = min(timeit.repeat(vectorized, number=1, repeat=args.repeat))
+    print(f'{args.items} itens (melhor de {args.repeat}, NumPy {"disponível" if np is not None else "ausente"})')
+    print(f'  item a item : {scalar * 1000:8.2f} ms')
+    print(f'  vetorizado  : {batch * 1000:8.2f} ms')
+    print(f'  ganho       : {scalar / batch:8.2f}x')
+    print(f'  idêntico    : {"sim" if same else "NÃO"}')
+    sys.exit(0 if same else 1)
+
+
+if __name__ == '__main__':
+    main()
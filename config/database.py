@@ -1,9 +1,13 @@
 """
 Configuração do banco de dados Supabase
 """
+import logging
+
 from supabase import create_client, Client
 from typing import Optional
 
+logger = logging.getLogger(__name__)
+
 def init_supabase(url: str, key: str) -> Optional[Client]:
     """
     Inicializa cliente Supabase
@@ -22,7 +26,7 @@ def init_supabase(url: str, key: str) -> Optional[Client]:
         supabase: Client = create_client(url, key)
         return supabase
     except Exception as e:
-        print(f"Erro ao conectar com Supabase: {e}")
+        logger.error('Erro ao conectar com Supabase: %s', e)
         raise
 
 def get_supabase_client() -> Client:
@@ -1,9 +1,13 @@
 # Arquivo: src/config/gpt_service.py
 
-import os
-from typing import Dict, List
+import logging
+from typing import Dict, Iterator, List, Optional
 from openai import OpenAI
 import httpx # Importe a biblioteca httpx, que é uma dependência da openai
+from src.utils.llm_cache import LLMCache
+from src.utils.log import preview
+
+logger = logging.getLogger(__name__)
 
 
 
@@ -36,37 +40,50 @@ GPT_PROMPTS: Dict[str, str] = {
 # =============================================================
 
 
+# Configura um cliente HTTP com timeouts mais longos.
+# A IA pode levar mais de 30 segundos para processar grandes blocos de texto.
+GPT_TIMEOUT = httpx.Timeout(
+    connect=10.0,      # Tempo para estabelecer a conexão
+    read=120.0,        # Tempo para ler a resposta completa (aumentado para 2 minutos)
+    write=10.0,        # Tempo para enviar os dados
+    pool=10.0
+)
+GPT_BASE_URL = "https://api.openai.com/v1"
+GPT_MODEL = "gpt-5-nano"
+
+
 class GPTService:
     """Cliente para interagir com a API do GPT-5 Nano."""
 
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, client: Optional[OpenAI] = None, cache: Optional[LLMCache] = None):
         if not api_key:
             raise ValueError("GPT_API_KEY é obrigatório")
-        # ====================================================================
-        # ===                A CORREÇÃO COMPLETA ESTÁ AQUI                 ===
-        # ====================================================================
-        # Configura um cliente HTTP customizado com timeouts mais longos.
-        # A IA pode levar mais de 30 segundos para processar grandes blocos de texto.
-        timeout_config = httpx.Timeout(
-            connect=10.0,      # Tempo para estabelecer a conexão
-            read=120.0,        # Tempo para ler a resposta completa (aumentado para 2 minutos)
-            write=10.0,        # Tempo para enviar os dados
-            pool=10.0
-        )
 
-        # Instancia o cliente OpenAI passando a configuração de timeout.
-        self.client = OpenAI(
+        # Usa o cliente compartilhado do registro quando fornecido; caso contrário
+        # instancia um cliente próprio com a configuração de timeout.
+        self.client = client or OpenAI(
             api_key=api_key,
-            base_url="https://api.openai.com/v1",
-            timeout=timeout_config
+            base_url=GPT_BASE_URL,
+            timeout=GPT_TIMEOUT
         )
-        # ====================================================================
+        self.cache = cache
+
+    def _cache_lookup(self, system_prompt: str, text: str, max_tokens: int, no_cache: bool):
+        """Retorna (chave, valor em cache). A chave é None quando o cache não se aplica."""
+        if self.cache is None:
+            return None, None
+        if no_cache:
+            self.cache.record_bypass()
+            return None, None
+        key = LLMCache.make_key("openai", GPT_MODEL, system_prompt, text, max_tokens)
+        return key, self.cache.get(key)
 
     # ==================== RESTAURADO: GERAÇÃO DE FLASHCARDS ====================
-    def generate_flashcards_from_text(self, summary_content: str) -> List[Dict[str, str]]:
+    def generate_flashcards_from_text(self, summary_content: str, no_cache: bool = False) -> List[Dict[str, str]]:
         """
         Envia o conteúdo de um resumo para a API do GPT e formata a resposta em pares Pergunta/Resposta.
         Saída esperada por linha: "PERGUNTA==RESPOSTA"
+        Com `no_cache=True` ignora o cache e sempre chama a API.
         """
         system_prompt = """
         Você é um especialista em criar flashcards para estudantes.
@@ -82,9 +99,13 @@ class GPTService:
         Quem escreveu "Dom Quixote"?==Miguel de Cervantes
         """
 
+        cache_key, cached = self._cache_lookup(system_prompt, summary_content, 5000, no_cache)
+        if cached is not None:
+            return cached
+
         try:
             response = self.client.chat.completions.create(
-                model="gpt-5-nano",
+                model=GPT_MODEL,
                 messages=[
                     {"role": "system", "content": system_prompt},
                     {"role": "user", "content": summary_content},
@@ -93,11 +114,8 @@ class GPTService:
                 
             )
 
-            # Logs úteis em desenvolvimento
-            if os.getenv("DEBUG_GPT", "0") == "1":
-                print("--- RESPOSTA COMPLETA DA API DO GPT (JSON) ---")
-                print(response.model_dump_json(indent=2))
-                print("---------------------------------------------")
+            # Resposta completa só é serializada com LOG_LEVEL=DEBUG
+            logger.debug('Resposta do GPT (flashcards): %s', preview(response.model_dump_json))
 
             raw_text = response.choices[0].message.content or ""
             flashcards: List[Dict[str, str]] = []
@@ -109,25 +127,32 @@ class GPTService:
                     if q and a:
                         flashcards.append({"question": q, "answer": a})
 
+            if cache_key and flashcards:
+                self.cache.set(cache_key, flashcards)
             return flashcards
 
         except Exception as e:
-            print(f"ERRO AO GERAR FLASHCARDS COM GPT: {e}")
+            logger.error('Erro ao gerar flashcards com GPT: %s', e)
             raise
     # ==========================================================================
 
     
 
     # ==================== RESUMO COM ESTILO SELECIONÁVEL ====================
-    def summarize_text(self, text_to_summarize: str, prompt_style: str = "default") -> str:
+    def summarize_text(self, text_to_summarize: str, prompt_style: str = "default", no_cache: bool = False) -> str:
         """
         Envia um texto para a API do GPT e pede para criar um resumo didático.
+        Com `no_cache=True` ignora o cache e sempre chama a API.
         """
         system_prompt = GPT_PROMPTS.get(prompt_style, GPT_PROMPTS["default"])
 
+        cache_key, cached = self._cache_lookup(system_prompt, text_to_summarize, 5000, no_cache)
+        if cached is not None:
+            return cached
+
         try:
             response = self.client.chat.completions.create(
-                model="gpt-5-nano",
+                model=GPT_MODEL,
                 messages=[
                     {"role": "system", "content": system_prompt},
                     {"role": "user", "content": text_to_summarize},
@@ -135,25 +160,71 @@ class GPTService:
                 max_completion_tokens=5000,
             )
 
-            summary_content = response.choices[0].message.content or ""
-            return summary_content.strip()
+            summary_content = (response.choices[0].message.content or "").strip()
+            if cache_key and summary_content:
+                self.cache.set(cache_key, summary_content)
+            return summary_content
 
         except Exception as e:
-            print(f"ERRO AO GERAR RESUMO COM GPT: {e}")
+            logger.error('Erro ao gerar resumo com GPT: %s', e)
             raise
     # ======================================================================
 
+    def summarize_text_stream(self, text_to_summarize: str, prompt_style: str = "default", no_cache: bool = False) -> Iterator[Dict]:
+        """
+        Versão em streaming de `summarize_text`.
+
+        Gera eventos {"type": "token", "content": ...} conforme os tokens chegam e,
+        ao final, {"type": "done", ...} com os mesmos metadados da resposta JSON.
+        """
+        system_prompt = GPT_PROMPTS.get(prompt_style, GPT_PROMPTS["default"])
+
+        cache_key, cached = self._cache_lookup(system_prompt, text_to_summarize, 5000, no_cache)
+        if cached is not None:
+            yield {"type": "token", "content": cached}
+            yield {"type": "done", "citations": [], "search_results": [], "tokens_used": 0, "cached": True}
+            return
+
+        try:
+            stream = self.client.chat.completions.create(
+                model=GPT_MODEL,
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": text_to_summarize},
+                ],
+                max_completion_tokens=5000,
+                stream=True,
+                stream_options={"include_usage": True},
+            )
+
+            parts: List[str] = []
+            tokens_used = 0
+            for chunk in stream:
+                if chunk.usage:
+                    tokens_used = chunk.usage.total_tokens
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    parts.append(delta)
+                    yield {"type": "token", "content": delta}
+
+            summary_content = "".join(parts).strip()
+            if cache_key and summary_content:
+                self.cache.set(cache_key, summary_content)
+
+            yield {"type": "done", "citations": [], "search_results": [], "tokens_used": tokens_used}
+
+        except Exception as e:
+            logger.error('Erro ao gerar resumo com GPT (stream): %s', e)
+            raise
+
     def reformat_exercises_from_text(self, text_content: str) -> str:
         """
         Envia um texto bruto contendo exercícios para a IA e pede para formatá-lo.
-        Inclui logs detalhados para depuração.
+        Com LOG_LEVEL=DEBUG registra a entrada e a resposta (truncadas).
         """
-        # ==================== LOG 1: O que estamos enviando? ====================
-        print(f"\n--- [GPT-LOG 1] INICIANDO 'reformat_exercises_from_text' ---")
-        print(f"Tamanho do texto de entrada: {len(text_content)} caracteres")
-        # Loga os primeiros 500 caracteres do texto para inspeção
-        print(f"Início do texto de entrada: {text_content[:500]}...")
-        # =======================================================================
+        logger.debug('reformat_exercises_from_text: %d caracteres de entrada: %s', len(text_content), preview(text_content))
         
         system_prompt = """
         Você formatara um texto enviado. Ele é composto por exercícios de múltipla escolha e o gabarito das questões.
@@ -179,12 +250,8 @@ class GPTService:
         """
         
         try:
-            # ==================== LOG 2: Chamando a API ====================
-            print("--- [GPT-LOG 2] Enviando requisição para a API da OpenAI... ---")
-            # ===============================================================
-            
             response = self.client.chat.completions.create(
-                model="gpt-5-nano",
+                model=GPT_MODEL,
                 messages=[
                     {"role": "system", "content": system_prompt},
                     {"role": "user", "content": text_content},
@@ -192,32 +259,18 @@ class GPTService:
                 max_completion_tokens=50000,
             )
             
-            # ==================== LOG 3: O que recebemos de volta? ====================
-            print("--- [GPT-LOG 3] Resposta recebida da API da OpenAI ---")
-            # Log do objeto de resposta completo para verificar o uso de tokens e a razão de finalização
-            print(f"Objeto de Resposta Completo (diagnóstico): {response.model_dump_json(indent=2)}")
-            # =========================================================================
+            # Uso de tokens e razão de finalização; serializado só com LOG_LEVEL=DEBUG
+            logger.debug('Resposta do GPT (exercícios): %s', preview(response.model_dump_json))
 
             # Extrai o conteúdo da mensagem
             response_content = response.choices[0].message.content or ""
 
-            # ==================== LOG 4: Qual conteúdo foi extraído? ====================
-            print("\n--- [GPT-LOG 4] Conteúdo de texto extraído da resposta ---")
-            print(f"Tamanho do conteúdo extraído: {len(response_content)} caracteres")
-            print("Conteúdo:")
-            print(response_content)
-            print("----------------------------------------------------------\n")
-            # ============================================================================
+            logger.debug('Conteúdo extraído: %d caracteres: %s', len(response_content), preview(response_content))
 
             return response_content
 
         except Exception as e:
-            # ==================== LOG 5: Ocorreu um erro na chamada? ====================
-            print(f"\n--- [GPT-LOG 5] ERRO CRÍTICO DURANTE A CHAMADA DA API ---")
-            print(f"Tipo do Erro: {type(e)}")
-            print(f"Mensagem de Erro: {e}")
-            print("----------------------------------------------------------\n")
-            # ===========================================================================
+            logger.error('Erro na chamada da API para reformatar exercícios (%s): %s', type(e).__name__, e)
             raise # Re-lança a exceção para que a rota possa tratá-la e retornar um erro 500
 
     # ==================== NOVO MÉTODO PARA INTEGRAR CONHECIMENTO ====================
@@ -242,7 +295,7 @@ class GPTService:
         """
         try:
             response = self.client.chat.completions.create(
-                model="gpt-5-nano",
+                model=GPT_MODEL,
                 messages=[
                     {"role": "system", "content": system_prompt},
                     {"role": "user", "content": user_content},
@@ -251,7 +304,7 @@ class GPTService:
             )
             return response.choices[0].message.content or ""
         except Exception as e:
-            print(f"ERRO AO INTEGRAR EXERCÍCIO NO RESUMO: {e}")
+            logger.error('Erro ao integrar exercício no resumo: %s', e)
             raise
 
 def get_gpt_service() -> GPTService:
@@ -259,4 +312,8 @@ def get_gpt_service() -> GPTService:
     from flask import current_app
 
     api_key = current_app.config.get("GPT_API_KEY")
-    return GPTService(api_key)
\ No newline at end of file
+    registry = current_app.config.get("LLM_CLIENT_REGISTRY")
+    client = None
+    if registry is not None and api_key:
+        client = registry.get_client("openai", api_key, GPT_BASE_URL, GPT_TIMEOUT)
+    return GPTService(api_key, client=client, cache=current_app.config.get("LLM_CACHE"))
\ No newline at end of file
@@ -0,0 +1,202 @@
+"""
+Registro de clientes OpenAI compartilhados pelo processo (GPT e Perplexity)
+"""
+import threading
+from typing import Dict, Optional, Tuple
+
+import httpx
+from openai import OpenAI
+
+# Mesmo timeout padrão do SDK da OpenAI, usado quando o provedor não define o seu
+DEFAULT_TIMEOUT = httpx.Timeout(600.0, connect=5.0)
+
+
+class _PoolStats:
+    """Contadores de uso do pool de conexões de um cliente."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.connections_opened = 0
+        self.pool_waits = 0
+        # Falso se o pool do httpcore não pôde ser inspecionado (contadores de conexão indisponíveis)
+        self.pool_visible = True
+        self._seen_connections = set()
+
+    def snapshot(self) -> Dict[str, Optional[int]]:
+        with self._lock:
+            if not self.pool_visible:
+                return {'requests': self.requests, 'connections_opened': None,
+                        'connections_reused': None, 'pool_waits': None}
+            return {
+                'requests': self.requests,
+                'connections_opened': self.connections_opened,
+                'connections_reused': self.requests - self.connections_opened,
+                'pool_waits': self.pool_waits,
+            }
+
+
+class LLMClientRegistry:
+    """
+    Mantém um único cliente OpenAI (e seu pool httpx) por (provider, api_key, base_url).
+
+    Reaproveitar o cliente evita pagar o handshake TCP/TLS a cada requisição.
+    As estatísticas são aproximadas: são obtidas inspecionando o pool do httpcore
+    nos hooks de requisição e resposta.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = 20,
+        max_keepalive_connections: int = 10,
+        keepalive_expiry: float = 60.0
+    ):
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry
+        )
+        self._clients: Dict[Tuple[str, str, str], OpenAI] = {}
+        self._http_clients: Dict[Tuple[str, str, str], httpx.Client] = {}
+        self._stats: Dict[Tuple[str, str, str], _PoolStats] = {}
+        self._lock = threading.Lock()
+
+    def get_client(
+        self,
+        provider: str,
+        api_key: str,
+        base_url: str,
+        timeout: Optional[httpx.Timeout] = None
+    ) -> OpenAI:
+        """Retorna o cliente compartilhado, criando-o na primeira chamada."""
+        key = (provider, api_key, base_url)
+        timeout = timeout or DEFAULT_TIMEOUT
+        client = self._clients.get(key)
+        if client is not None:
+            return client
+
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None:
+                stats = _PoolStats()
+                http_client = httpx.Client(
+                    limits=self.limits,
+                    timeout=timeout,
+                    event_hooks={
+                        'request': [lambda request: self._on_request(http_client, stats)],
+                        'response': [lambda response: self._on_response(http_client, stats)],
+                    }
+                )
+                client = OpenAI(
+                    api_key=api_key,
+                    base_url=base_url,
+                    timeout=timeout,
+                    http_client=http_client
+                )
+                self._http_clients[key] = http_client
+                self._stats[key] = stats
+                self._clients[key] = client
+        return client
+
+    @staticmethod
+    def _pool_connections(http_client: httpx.Client) -> Optional[list]:
+        """
+        Conexões do pool do httpcore, ou None se os atributos privados
+        (`_transport._pool.connections`) não existirem nesta versão do httpx.
+        """
+        pool = getattr(getattr(http_client, '_transport', None), '_pool', None)
+        connections = getattr(pool, 'connections', None)
+        if connections is None:
+            return None
+        try:
+            return list(connections)
+        except TypeError:
+            return None
+
+    @staticmethod
+    def _conn_state(conn, method: str) -> bool:
+        check = getattr(conn, method, None)
+        return bool(check()) if callable(check) else False
+
+    def _on_request(self, http_client: httpx.Client, stats: _PoolStats):
+        connections = self._pool_connections(http_client)
+        if connections is None:
+            return
+        has_available = any(
+            self._conn_state(conn, 'is_available') or self._conn_state(conn, 'is_idle') for conn in connections
+        )
+        if not has_available and len(connections) >= self.limits.max_connections:
+            with stats._lock:
+                stats.pool_waits += 1
+
+    def _on_response(self, http_client: httpx.Client, stats: _PoolStats):
+        connections = self._pool_connections(http_client)
+        with stats._lock:
+            stats.requests += 1
+            if connections is None:
+                stats.pool_visible = False
+                return
+            current = {id(conn) for conn in connections}
+            stats.connections_opened += len(current - stats._seen_connections)
+            stats._seen_connections = current
+
+    def stats(self) -> Dict:
+        """Estatísticas por cliente, sem nenhuma parte da chave de API."""
+        result = []
+        for (provider, api_key, base_url), http_client in list(self._http_clients.items()):
+            connections = self._pool_connections(http_client)
+            entry = {
+                'provider': provider,
+                'base_url': base_url,
+                'open_connections': len(connections) if connections is not None else None,
+                'idle_connections': (
+                    len([conn for conn in connections if self._conn_state(conn, 'is_idle')])
+                    if connections is not None else None
+                ),
+            }
+            entry.update(self._stats[(provider, api_key, base_url)].snapshot())
+            result.append(entry)
+        return {
+            'limits': {
+                'max_connections': self.limits.max_connections,
+                'max_keepalive_connections': self.limits.max_keepalive_connections,
+                'keepalive_expiry': self.limits.keepalive_expiry,
+            },
+            'clients': result
+        }
+
+    def close(self):
+        with self._lock:
+            for http_client in self._http_clients.values():
+                http_client.close()
+            self._clients.clear()
+            self._http_clients.clear()
+            self._stats.clear()
+
+
+def init_llm_clients(app) -> LLMClientRegistry:
+    """
+    Cria o registro de clientes na inicialização do app e já abre os clientes
+    dos provedores configurados.
+    """
+    from src.config.gpt_service import GPT_BASE_URL, GPT_TIMEOUT
+    from src.config.perplexity import PERPLEXITY_BASE_URL
+
+    registry = LLMClientRegistry(
+        max_connections=app.config.get('LLM_POOL_MAX_CONNECTIONS', 20),
+        max_keepalive_connections=app.config.get('LLM_POOL_MAX_KEEPALIVE', 10),
+        keepalive_expiry=app.config.get('LLM_POOL_KEEPALIVE_EXPIRY', 60.0)
+    )
+    if app.config.get('GPT_API_KEY'):
+        registry.get_client('openai', app.config['GPT_API_KEY'], GPT_BASE_URL, GPT_TIMEOUT)
+    if app.config.get('PERPLEXITY_API_KEY'):
+        registry.get_client('perplexity', app.config['PERPLEXITY_API_KEY'], PERPLEXITY_BASE_URL)
+    return registry
+
+
+def get_llm_client_registry() -> Optional[LLMClientRegistry]:
+    """
+    Obtém o registro de clientes da configuração da aplicação Flask
+    """
+    from flask import current_app
+    return current_app.config.get('LLM_CLIENT_REGISTRY')
@@ -3,7 +3,8 @@ Configuração e cliente para API Perplexity
 """
 import os
 from openai import OpenAI
-from typing import Dict, List, Optional
+from typing import Dict, Iterator, List, Optional
+from src.utils.llm_cache import LLMCache
 
 # 1. Dicionário com todos os prompts
 # A chave (ex: 'default', 'technical') será enviada pelo Flutter.
@@ -102,24 +103,29 @@ PROMPTS = {
 
 }
 
+PERPLEXITY_BASE_URL = "https://api.perplexity.ai"
+
 class PerplexityClient:
     """Cliente para interagir com a API Perplexity"""
     
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, client: Optional[OpenAI] = None, cache: Optional[LLMCache] = None):
         if not api_key:
             raise ValueError("PERPLEXITY_API_KEY é obrigatório")
         
-        self.client = OpenAI(
+        # Reaproveita o cliente compartilhado do registro, se houver
+        self.client = client or OpenAI(
             api_key=api_key,
-            base_url="https://api.perplexity.ai"
+            base_url=PERPLEXITY_BASE_URL
         )
+        self.cache = cache
     
     def generate_summary(
         self, 
         query: str, 
         model: str = "sonar",
         max_tokens: int = 1000,
-        prompt_style: str = "default"
+        prompt_style: str = "default",
+        no_cache: bool = False
     ) -> Dict:
         """
         Gera resumo usando Perplexity
@@ -129,13 +135,25 @@ class PerplexityClient:
             model: Modelo a usar (sonar, sonar-pro, etc.)
             max_tokens: Máximo de tokens na resposta
             prompt_style: Estilo de prompt (default, technical, vestibular, etc.)
+            no_cache: Se True, ignora o cache e sempre chama a API
             
         Returns:
             Dicionário com resposta, citações e metadados
         """
+        # Obtém prompt do estilo solicitado
+        system_prompt = PROMPTS.get(prompt_style, PROMPTS["default"])
+
+        cache_key = None
+        if self.cache is not None:
+            if no_cache:
+                self.cache.record_bypass()
+            else:
+                cache_key = LLMCache.make_key("perplexity", model, system_prompt, query, max_tokens)
+                cached = self.cache.get(cache_key)
+                if cached is not None:
+                    return cached
+
         try:
-            # Obtém prompt do estilo solicitado
-            system_prompt = PROMPTS.get(prompt_style, PROMPTS["default"])
             
             response = self.client.chat.completions.create(
                 model=model,
@@ -152,7 +170,7 @@ class PerplexityClient:
             citations = getattr(response, 'citations', [])
             search_results = getattr(response, 'search_results', [])
             
-            return {
+            result = {
                 "content": content,
                 "citations": citations,
                 "search_results": search_results,
@@ -160,6 +178,9 @@ class PerplexityClient:
                 "tokens_used": response.usage.total_tokens if response.usage else 0,
                 "success": True
             }
+            if cache_key and content:
+                self.cache.set(cache_key, result)
+            return result
             
         except Exception as e:
             return {
@@ -172,6 +193,93 @@ class PerplexityClient:
                 "error": str(e)
             }
     
+    def generate_summary_stream(
+        self,
+        query: str,
+        model: str = "sonar",
+        max_tokens: int = 1000,
+        prompt_style: str = "default",
+        no_cache: bool = False
+    ) -> Iterator[Dict]:
+        """
+        Versão em streaming de `generate_summary`
+        
+        Gera eventos {"type": "token", "content": ...} conforme os tokens chegam e,
+        ao final, {"type": "done", ...} com citações, resultados de busca e tokens usados.
+        Em caso de falha gera {"type": "error", "error": ...}.
+        """
+        system_prompt = PROMPTS.get(prompt_style, PROMPTS["default"])
+
+        cache_key = None
+        if self.cache is not None:
+            if no_cache:
+                self.cache.record_bypass()
+            else:
+                cache_key = LLMCache.make_key("perplexity", model, system_prompt, query, max_tokens)
+                cached = self.cache.get(cache_key)
+                if cached is not None:
+                    yield {"type": "token", "content": cached["content"]}
+                    yield {
+                        "type": "done",
+                        "citations": cached["citations"],
+                        "search_results": cached["search_results"],
+                        "model_used": cached["model_used"],
+                        "tokens_used": cached["tokens_used"],
+                        "cached": True
+                    }
+                    return
+
+        try:
+            stream = self.client.chat.completions.create(
+                model=model,
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": query}
+                ],
+                max_tokens=max_tokens,
+                temperature=0.3,
+                stream=True
+            )
+
+            parts = []
+            citations = []
+            search_results = []
+            tokens_used = 0
+            for chunk in stream:
+                # A Perplexity repete citações e uso em cada chunk; fica com o mais recente
+                citations = getattr(chunk, 'citations', None) or citations
+                search_results = getattr(chunk, 'search_results', None) or search_results
+                if chunk.usage:
+                    tokens_used = chunk.usage.total_tokens
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    parts.append(delta)
+                    yield {"type": "token", "content": delta}
+
+            content = "".join(parts)
+            if cache_key and content:
+                self.cache.set(cache_key, {
+                    "content": content,
+                    "citations": citations,
+                    "search_results": search_results,
+                    "model_used": model,
+                    "tokens_used": tokens_used,
+                    "success": True
+                })
+
+            yield {
+                "type": "done",
+                "citations": citations,
+                "search_results": search_results,
+                "model_used": model,
+                "tokens_used": tokens_used
+            }
+
+        except Exception as e:
+            yield {"type": "error", "error": str(e)}
+    
     def process_image_query(
         self, 
         image_text: str, 
@@ -204,4 +312,8 @@ def get_perplexity_client() -> PerplexityClient:
     """
     from flask import current_app
     api_key = current_app.config.get('PERPLEXITY_API_KEY')
-    return PerplexityClient(api_key)
+    registry = current_app.config.get('LLM_CLIENT_REGISTRY')
+    client = None
+    if registry is not None and api_key:
+        client = registry.get_client('perplexity', api_key, PERPLEXITY_BASE_URL)
+    return PerplexityClient(api_key, client=client, cache=current_app.config.get('LLM_CACHE'))
@@ -22,14 +22,153 @@ app.config['SUPABASE_KEY'] = os.getenv('SUPABASE_KEY')
 app.config['PERPLEXITY_API_KEY'] = os.getenv('PERPLEXITY_API_KEY')
 app.config['GPT_API_KEY'] = os.getenv('GPT_API_KEY')
 
+# Autenticação: validação local do JWT do Supabase ('local') ou chamada ao Supabase ('remote')
+app.config['AUTH_VERIFY_MODE'] = os.getenv('AUTH_VERIFY_MODE', 'local')
+app.config['SUPABASE_JWT_SECRET'] = os.getenv('SUPABASE_JWT_SECRET')
+app.config['SUPABASE_JWKS_URL'] = os.getenv('SUPABASE_JWKS_URL')
+app.config['SUPABASE_JWT_AUDIENCE'] = os.getenv('SUPABASE_JWT_AUDIENCE', 'authenticated')
+app.config['AUTH_TOKEN_CACHE_SIZE'] = int(os.getenv('AUTH_TOKEN_CACHE_SIZE', 10000))
+app.config['AUTH_TOKEN_CACHE_TTL'] = float(os.getenv('AUTH_TOKEN_CACHE_TTL', 300))
+
+# Pool de conexões compartilhado pelos clientes de IA (GPT e Perplexity)
+app.config['LLM_POOL_MAX_CONNECTIONS'] = int(os.getenv('LLM_POOL_MAX_CONNECTIONS', 20))
+app.config['LLM_POOL_MAX_KEEPALIVE'] = int(os.getenv('LLM_POOL_MAX_KEEPALIVE', 10))
+app.config['LLM_POOL_KEEPALIVE_EXPIRY'] = float(os.getenv('LLM_POOL_KEEPALIVE_EXPIRY', 60))
+
+# Cache de gerações de IA (LRU em memória + SQLite em disco)
+app.config['LLM_CACHE_ENABLED'] = os.getenv('LLM_CACHE_ENABLED', '1') == '1'
+app.config['LLM_CACHE_PATH'] = os.getenv('LLM_CACHE_PATH', os.path.join(os.path.dirname(__file__), 'llm_cache.sqlite3'))
+app.config['LLM_CACHE_TTL'] = float(os.getenv('LLM_CACHE_TTL', 7 * 24 * 3600))
+app.config['LLM_CACHE_MEMORY_ENTRIES'] = int(os.getenv('LLM_CACHE_MEMORY_ENTRIES', 256))
+app.config['LLM_CACHE_MEMORY_MB'] = int(os.getenv('LLM_CACHE_MEMORY_MB', 32))
+app.config['LLM_CACHE_DISK_MB'] = int(os.getenv('LLM_CACHE_DISK_MB', 512))
+
+# Tarefas em segundo plano (backend 'memory' ou 'sqlite')
+app.config['JOB_STORE_BACKEND'] = os.getenv('JOB_STORE_BACKEND', 'memory')
+app.config['JOB_STORE_PATH'] = os.getenv('JOB_STORE_PATH', os.path.join(os.path.dirname(__file__), 'jobs.sqlite3'))
+app.config['JOB_WORKERS'] = int(os.getenv('JOB_WORKERS', 2))
+app.config['JOB_RETENTION_SECONDS'] = float(os.getenv('JOB_RETENTION_SECONDS', 24 * 3600))
+
+# Reformatação de exercícios em blocos (tamanho em caracteres, chamadas simultâneas e tentativas por bloco)
+app.config['EXERCISE_CHUNK_CHARS'] = int(os.getenv('EXERCISE_CHUNK_CHARS', 12000))
+app.config['EXERCISE_CHUNK_CONCURRENCY'] = int(os.getenv('EXERCISE_CHUNK_CONCURRENCY', 4))
+app.config['EXERCISE_CHUNK_RETRIES'] = int(os.getenv('EXERCISE_CHUNK_RETRIES', 2))
+
+# Geração de flashcards por seção do resumo (chamadas simultâneas e tamanho mínimo de cada seção)
+app.config['FLASHCARD_SECTION_CONCURRENCY'] = int(os.getenv('FLASHCARD_SECTION_CONCURRENCY', 4))
+app.config['FLASHCARD_SECTION_MIN_CHARS'] = int(os.getenv('FLASHCARD_SECTION_MIN_CHARS', 400))
+
+# Sincronização offline: linhas por upsert em lote no /api/sync/batch
+app.config['SYNC_UPSERT_CHUNK_SIZE'] = int(os.getenv('SYNC_UPSERT_CHUNK_SIZE', 200))
+# Registro de mudanças já aplicadas (change_id / Idempotency-Key) para reenvios do /api/sync/batch.
+# 'memory' vale por processo; com vários workers use 'sqlite' (arquivo compartilhado na máquina)
+app.config['SYNC_IDEMPOTENCY_BACKEND'] = os.getenv('SYNC_IDEMPOTENCY_BACKEND', 'memory')
+app.config['SYNC_IDEMPOTENCY_PATH'] = os.getenv('SYNC_IDEMPOTENCY_PATH', os.path.join(os.path.dirname(__file__), 'sync_idempotency.sqlite3'))
+app.config['SYNC_IDEMPOTENCY_MAX_ENTRIES'] = int(os.getenv('SYNC_IDEMPOTENCY_MAX_ENTRIES', 100000))
+app.config['SYNC_IDEMPOTENCY_TTL'] = float(os.getenv('SYNC_IDEMPOTENCY_TTL', 24 * 3600))
+# Validade da reserva de um lote em andamento (um worker que morreu no meio libera a chave depois disso)
+app.config['SYNC_IDEMPOTENCY_LEASE'] = float(os.getenv('SYNC_IDEMPOTENCY_LEASE', 60))
+# Consultas simultâneas no POST /api/sync/delta (várias tabelas por requisição)
+app.config['SYNC_DELTA_CONCURRENCY'] = int(os.getenv('SYNC_DELTA_CONCURRENCY', 4))
+# Linhas buscadas por página ao transmitir o /api/sync/delta em NDJSON
+app.config['SYNC_NDJSON_PAGE_SIZE'] = int(os.getenv('SYNC_NDJSON_PAGE_SIZE', 500))
+
+# Compressão das rotas de sincronização (níveis no formato "gzip=6,br=4,zstd=3")
+app.config['COMPRESSION_ENABLED'] = os.getenv('COMPRESSION_ENABLED', '1') == '1'
+app.config['COMPRESSION_MIN_SIZE'] = int(os.getenv('COMPRESSION_MIN_SIZE', 1024))
+app.config['COMPRESSION_LEVELS'] = {
+    name.strip(): int(level)
+    for name, _, level in (item.partition('=') for item in os.getenv('COMPRESSION_LEVELS', '').split(',') if '=' in item)
+}
+app.config['REQUEST_MAX_DECOMPRESSED_BYTES'] = int(os.getenv('REQUEST_MAX_DECOMPRESSED_MB', 50)) * 1024 * 1024
+
+# GET condicional (ETag): validadores por usuário e tabela ficam em cache por alguns segundos
+app.config['CONDITIONAL_GET_ENABLED'] = os.getenv('CONDITIONAL_GET_ENABLED', '1') == '1'
+app.config['CONDITIONAL_VALIDATOR_TTL'] = float(os.getenv('CONDITIONAL_VALIDATOR_TTL', 30))
+
+# Consultas paralelas de /api/reviews/stats
+app.config['REVIEW_STATS_CONCURRENCY'] = int(os.getenv('REVIEW_STATS_CONCURRENCY', 4))
+
+# Chamadas paralelas da RPC de SRS nos endpoints /complete-batch
+app.config['REVIEW_BATCH_CONCURRENCY'] = int(os.getenv('REVIEW_BATCH_CONCURRENCY', 8))
+
+# Arquivo JSONL para gravar as chamadas da RPC de SRS e conferir a paridade da aproximação local
+app.config['SRS_RECORD_PATH'] = os.getenv('SRS_RECORD_PATH')
+
+# Índice em memória das revisões pendentes (recarregado do banco a cada DUE_QUEUE_TTL segundos)
+app.config['DUE_QUEUE_ENABLED'] = os.getenv('DUE_QUEUE_ENABLED', '1') == '1'
+app.config['DUE_QUEUE_TTL'] = float(os.getenv('DUE_QUEUE_TTL', 60))
+app.config['DUE_QUEUE_MAX_USERS'] = int(os.getenv('DUE_QUEUE_MAX_USERS', 10000))
+
+# Montagem de /api/reviews/session/start: expoentes da prioridade e limites da leitura de candidatos
+app.config['SESSION_PRIORITY'] = os.getenv('SESSION_PRIORITY', 'weight=1,overdue=1,difficulty=0.5')
+app.config['SESSION_MAX_CANDIDATES'] = int(os.getenv('SESSION_MAX_CANDIDATES', 2000))
+app.config['SESSION_CANDIDATE_BUDGET_MS'] = float(os.getenv('SESSION_CANDIDATE_BUDGET_MS', 800))
+
+# Fila de estudo unificada (/api/study-queue): tamanho padrão e máximo
+app.config['STUDY_QUEUE_DEFAULT_LIMIT'] = int(os.getenv('STUDY_QUEUE_DEFAULT_LIMIT', 50))
+app.config['STUDY_QUEUE_MAX_LIMIT'] = int(os.getenv('STUDY_QUEUE_MAX_LIMIT', 500))
+
+# Logs: nível, formato ('text' ou 'json'), tamanho máximo de payloads e linhas por segundo por mensagem abaixo de WARNING
+app.config['LOG_LEVEL'] = os.getenv('LOG_LEVEL', 'INFO')
+app.config['LOG_FORMAT'] = os.getenv('LOG_FORMAT', 'text')
+app.config['LOG_MAX_FIELD_CHARS'] = int(os.getenv('LOG_MAX_FIELD_CHARS', 500))
+app.config['LOG_SAMPLE_PER_SECOND'] = int(os.getenv('LOG_SAMPLE_PER_SECOND', 20))
+
+# Serialização JSON: 'auto' usa orjson quando instalado, 'stdlib' mantém o json padrão
+app.config['JSON_PROVIDER'] = os.getenv('JSON_PROVIDER', 'auto')
+# Desligado, as respostas saem em UTF-8 (com charset no Content-Type) em vez de \uXXXX
+app.config['JSON_ENSURE_ASCII'] = os.getenv('JSON_ENSURE_ASCII', '1') == '1'
+# Respostas do /api/sync/delta: 0 mantém o texto do json.dumps padrão; 1 usa o
+# provedor acima com separadores compactos (muda os bytes enviados ao cliente)
+app.config['SYNC_JSON_COMPACT'] = os.getenv('SYNC_JSON_COMPACT', '0') == '1'
+
 # Habilitar CORS
 CORS(app, origins="*")
 
+from src.utils.log import init_logging
+init_logging(app)
+
+from src.utils.json_provider import init_json_provider
+init_json_provider(app)
+
 # Inicializar Supabase
 from src.config.database import init_supabase
 supabase = init_supabase(app.config['SUPABASE_URL'], app.config['SUPABASE_KEY'])
 app.config['SUPABASE_CLIENT'] = supabase
 
+# Cache de usuários já validados, indexado pelo hash do token
+from src.utils.ttl_cache import TTLCache
+app.config['AUTH_TOKEN_CACHE'] = TTLCache(
+    maxsize=app.config['AUTH_TOKEN_CACHE_SIZE'],
+    ttl=app.config['AUTH_TOKEN_CACHE_TTL']
+)
+
+# Clientes de IA criados uma única vez e reaproveitados por todas as requisições
+from src.config.llm_clients import init_llm_clients
+app.config['LLM_CLIENT_REGISTRY'] = init_llm_clients(app)
+
+from src.utils.llm_cache import init_llm_cache
+app.config['LLM_CACHE'] = init_llm_cache(app)
+
+from src.utils.jobs import init_job_queue
+app.config['JOB_QUEUE'] = init_job_queue(app)
+
+from src.utils.idempotency import init_sync_idempotency
+app.config['SYNC_IDEMPOTENCY_STORE'] = init_sync_idempotency(app)
+
+from src.utils.conditional import ValidatorStore
+app.config['CONDITIONAL_VALIDATORS'] = ValidatorStore(ttl=app.config['CONDITIONAL_VALIDATOR_TTL'])
+
+from src.utils.compression import CompressionStats
+app.config['COMPRESSION_STATS'] = CompressionStats()
+
+from src.utils.due_queue import DueQueueIndex
+app.config['DUE_QUEUE_INDEX'] = DueQueueIndex(
+    max_users=app.config['DUE_QUEUE_MAX_USERS'],
+    ttl=app.config['DUE_QUEUE_TTL']
+)
+
 # ==================== INÍCIO DA CORREÇÃO ESTRUTURAL ====================
 
 # --- 2. REGISTRAR OS BLUEPRINTS DA API ---
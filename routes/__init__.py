@@ -20,6 +20,7 @@ def register_blueprints(app: Flask):
     from .gpt_utils import gpt_utils_bp 
     from .images import images_bp
     from .exercises import exercises_bp
+    from .study_queue import study_queue_bp
 
     # Registrar os blueprints
     app.register_blueprint(auth_bp, url_prefix='/api/auth')
@@ -33,4 +34,5 @@ def register_blueprints(app: Flask):
     app.register_blueprint(flashcard_reviews_bp, url_prefix='/api/flashcard-reviews') 
     app.register_blueprint(gpt_utils_bp, url_prefix='/api/gpt') # <-- ADICIONAR ESTA LINHA
     app.register_blueprint(images_bp, url_prefix='/api/images')
-    app.register_blueprint(exercises_bp, url_prefix='/api/exercises')
\ No newline at end of file
+    app.register_blueprint(exercises_bp, url_prefix='/api/exercises')
+    app.register_blueprint(study_queue_bp, url_prefix='/api/study-queue')
\ No newline at end of file
@@ -1,9 +1,11 @@
+import logging
 from flask import Blueprint, request, jsonify
 from src.config.database import get_supabase_client
-from src.utils.auth import require_auth, get_current_user
+from src.utils.auth import require_auth, get_current_user, get_current_token, invalidate_token
 
 # Define o Blueprint para as rotas de autenticação
 auth_bp = Blueprint('auth', __name__)
+logger = logging.getLogger(__name__)
 
 @auth_bp.route('/register', methods=['POST'])
 def register():
@@ -29,7 +31,7 @@ def register():
             'user': res.user.dict() if res.user else None
         }), 201
     except Exception as e:
-        print(f"ERRO DE REGISTRO: {e}") 
+        logger.warning('Falha de registro: %s', e)
         return jsonify({'error': str(e)}), 400
 
 @auth_bp.route('/login', methods=['POST'])
@@ -51,7 +53,7 @@ def login():
             'access_token': res.session.access_token if res.session else None
         }), 200
     except Exception as e:
-        print(f"ERRO DE REGISTRO: {e}")  # ADICIONE ESTA LINHA PARA VER O ERRO REAL NO TERMINAL
+        logger.warning('Falha de login: %s', e)
         return jsonify({'error': 'Credenciais inválidas'}), 401
 
 @auth_bp.route('/profile', methods=['GET'])
@@ -63,21 +65,23 @@ def get_profile():
 
 
 @auth_bp.route('/logout', methods=['POST'])
-@require_auth
+@require_auth(remote=True)
 def logout():
     """Fazer logout do usuário invalidando o token no Supabase."""
     try:
         supabase = get_supabase_client()
         # A biblioteca do Supabase cuida da invalidação da sessão
         supabase.auth.sign_out()
+        # Remove o token do cache local para que ele não seja mais aceito por este processo
+        invalidate_token(get_current_token())
         
         return jsonify({'message': 'Logout realizado com sucesso'}), 200
     except Exception as e:
-        print(f"ERRO AO FAZER LOGOUT: {e}")
+        logger.exception('Erro ao fazer logout: %s', e)
         return jsonify({'error': str(e)}), 400
     
 @auth_bp.route('/preferences', methods=['PUT'])
-@require_auth
+@require_auth(remote=True)
 def update_preferences():
     """Atualiza as preferências de estudo do usuário."""
     data = request.get_json()
@@ -1,15 +1,19 @@
 """
 Rotas para gerenciamento de decks de estudo
 """
+import logging
 from flask import Blueprint, request, jsonify
 from src.config.database import get_supabase_client
 from src.utils.auth import require_auth, get_current_user
+from src.utils.conditional import conditional_get, invalidates
 import uuid
 
 decks_bp = Blueprint('decks', __name__)
+logger = logging.getLogger(__name__)
 
 @decks_bp.route('/', methods=['GET'])
 @require_auth
+@conditional_get(['study_decks', 'deck_summaries'])
 def get_decks():
     """Listar decks do usuário"""
     try:
@@ -34,6 +38,7 @@ def get_decks():
 
 @decks_bp.route('/', methods=['POST'])
 @require_auth
+@invalidates('study_decks', 'deck_summaries')
 def create_deck():
     """Criar novo deck"""
     try:
@@ -126,6 +131,7 @@ def get_deck(deck_id):
 
 @decks_bp.route('/<deck_id>', methods=['PUT'])
 @require_auth
+@invalidates('study_decks', 'deck_summaries')
 def update_deck(deck_id):
     """Atualizar deck"""
     try:
@@ -173,6 +179,7 @@ def update_deck(deck_id):
 
 @decks_bp.route('/<deck_id>', methods=['DELETE'])
 @require_auth
+@invalidates('study_decks', 'deck_summaries')
 def delete_deck(deck_id):
     """Deletar deck (soft delete) e suas associações."""
     try:
@@ -194,15 +201,16 @@ def delete_deck(deck_id):
             'deleted_at': now
         }).eq('id', deck_id).eq('user_id', current_user['id']).execute()
 
-        print(f"Soft deleted deck {deck_id} for user {current_user['id']}")
+        logger.info('Deck %s removido (soft delete) pelo usuário %s', deck_id, current_user['id'])
         return jsonify({'message': 'Deck movido para a lixeira com sucesso'}), 200
 
     except Exception as e:
-        print(f"ERRO AO DELETAR DECK: {e}")
+        logger.exception('Erro ao deletar deck: %s', e)
         return jsonify({'error': f'Erro interno: {str(e)}'}), 500
 
 @decks_bp.route('/<deck_id>/summaries', methods=['POST'])
 @require_auth
+@invalidates('study_decks', 'deck_summaries')
 def add_summary_to_deck(deck_id):
     """Adicionar resumo ao deck"""
     try:
@@ -263,6 +271,7 @@ def add_summary_to_deck(deck_id):
 
 @decks_bp.route('/<deck_id>/summaries/<summary_id>', methods=['DELETE'])
 @require_auth
+@invalidates('study_decks', 'deck_summaries')
 def remove_summary_from_deck(deck_id, summary_id):
     """Remover resumo do deck"""
     try:
@@ -285,6 +294,7 @@ def remove_summary_from_deck(deck_id, summary_id):
 
 @decks_bp.route('/<deck_id>/reorder', methods=['PUT'])
 @require_auth
+@invalidates('study_decks', 'deck_summaries')
 def reorder_deck_summaries(deck_id):
     """Reordenar resumos no deck"""
     try:
@@ -1,23 +1,90 @@
 # src/routes/exercises.py
 
-from flask import Blueprint, request, jsonify
+import logging
+from flask import Blueprint, request, jsonify, current_app
 from src.config.database import get_supabase_client
 from src.config.gpt_service import get_gpt_service
 from src.utils.auth import require_auth, get_current_user
+from src.utils.conditional import invalidate_validators, invalidates
+from src.utils.due_queue import resets_due_queue
 from src.utils.exercise_parser import parse_single_gpt_exercise, parse_multiple_gpt_exercises
+from src.utils.exercise_chunker import reformat_exercises_in_chunks
+from src.utils.jobs import get_job_queue
 
 import uuid
 import json
 
 exercises_bp = Blueprint('exercises', __name__)
+logger = logging.getLogger(__name__)
+
+def reformat_parse_and_save(gpt_service, supabase, user_id, raw_text, subject_id, summary_id, job=None):
+    """
+    Envia o texto bruto para a IA, faz o parsing dos exercícios e os salva no banco.
+
+    Usada tanto pela rota síncrona quanto pela tarefa em segundo plano; quando
+    `job` é informado, o progresso de cada etapa é reportado nele.
+
+    Raises:
+        ValueError: se a IA não conseguir formatar nenhum exercício.
+    """
+    if job:
+        job.report(0.05, stage='reformatting')
+
+    # Textos grandes são divididos em blocos de questões reformatados em paralelo;
+    # cada bloco que falhar é repetido individualmente
+    parsed_exercises, failed_chunks = reformat_exercises_in_chunks(
+        gpt_service,
+        raw_text,
+        max_chars=current_app.config.get('EXERCISE_CHUNK_CHARS', 12000),
+        max_concurrency=current_app.config.get('EXERCISE_CHUNK_CONCURRENCY', 4),
+        max_retries=current_app.config.get('EXERCISE_CHUNK_RETRIES', 2),
+        job=job
+    )
+
+    if not parsed_exercises:
+        raise ValueError('A IA não conseguiu formatar nenhum exercício a partir do texto fornecido.')
+
+    if job:
+        job.report(0.85, stage='saving', partial_result={'parsed_exercises': parsed_exercises})
+
+    exercises_to_insert = [
+        {
+            'id': str(uuid.uuid4()),
+            'user_id': user_id,
+            'subject_id': subject_id,
+            'summary_id': summary_id,
+            'statement': exercise['statement'],
+            'options': exercise['options'],
+            'answer': exercise['answer'],
+            'original_text': raw_text,
+        }
+        for exercise in parsed_exercises
+    ]
+    
+    response = supabase.table('exercises').insert(exercises_to_insert).execute()
+    # Na tarefa em segundo plano não há rota com @invalidates; roda no contexto da aplicação do job
+    invalidate_validators(user_id, ['exercises'])
+    if not response.data:
+        raise Exception("Falha ao salvar os exercícios. Verifique as permissões (RLS).")
+
+    return {
+        'message': f'{len(response.data)} exercícios criados com sucesso', 
+        'exercises': response.data,
+        'failed_chunks': failed_chunks
+    }
+
 
 # ROTA (para reformatar múltiplos exercícios) - CORRIGIDA
 @exercises_bp.route('/reformat-and-save', methods=['POST'])
 @require_auth
+@invalidates('exercises')
 def reformat_and_save_exercises():
     """
     Recebe um texto bruto com MÚLTIPLOS exercícios, envia para a IA para formatação,
     faz o parsing da resposta e salva os exercícios no banco de dados.
+
+    Com `"async": true` no corpo, a tarefa é enfileirada e a rota responde 202
+    com o `job_id` para consulta em `/jobs/<job_id>`.
     """
     data = request.get_json()
     raw_text = data.get('text')
@@ -31,63 +98,46 @@ def reformat_and_save_exercises():
     supabase = get_supabase_client()
     current_user = get_current_user()
 
-    try:
-        raw_gpt_response = gpt_service.reformat_exercises_from_text(raw_text)
-
-
-                # ====================================================================
-        # ===            O LOG DE DIAGNÓSTICO ESTÁ AQUI                  ===
-        # ====================================================================
-        # Loga a resposta bruta da IA ANTES de qualquer tentativa de parsing.
-        # Isso é essencial para depurar problemas de formatação da IA.
-        print("\n--- [ROTA-LOG 1] RESPOSTA BRUTA DA IA (PARA REFORMATAR) ---")
-        print(raw_gpt_response)
-        print("----------------------------------------------------------\n")
-        # ====================================================================
-
-        # ====================================================================
-        # ===                      A CORREÇÃO CRÍTICA                    ===
-        # ====================================================================
-        # Usa o novo parser para MÚLTIPLOS exercícios
-        parsed_exercises = parse_multiple_gpt_exercises(raw_gpt_response)
-        # ====================================================================
-
-        if not parsed_exercises:
-            return jsonify({'error': 'A IA não conseguiu formatar nenhum exercício a partir do texto fornecido.'}), 400
-
-        exercises_to_insert = [
-            {
-                'id': str(uuid.uuid4()),
-                'user_id': current_user['id'],
-                'subject_id': subject_id,
-                'summary_id': summary_id,
-                'statement': exercise['statement'],
-                'options': exercise['options'],
-                'answer': exercise['answer'],
-                'original_text': raw_text,
-            }
-            for exercise in parsed_exercises
-        ]
-        
-        response = supabase.table('exercises').insert(exercises_to_insert).execute()
-        if not response.data:
-            raise Exception("Falha ao salvar os exercícios. Verifique as permissões (RLS).")
-
+    if data.get('async'):
+        job_id = get_job_queue().submit(
+            'exercises.reformat_and_save', current_user['id'], reformat_parse_and_save,
+            gpt_service, supabase, current_user['id'], raw_text, subject_id, summary_id
+        )
         return jsonify({
-            'message': f'{len(response.data)} exercícios criados com sucesso', 
-            'exercises': response.data
-        }), 201
+            'message': 'Reformatação de exercícios enfileirada',
+            'job_id': job_id,
+            'status_url': f'/api/exercises/jobs/{job_id}'
+        }), 202
+
+    try:
+        result = reformat_parse_and_save(gpt_service, supabase, current_user['id'], raw_text, subject_id, summary_id)
+        return jsonify(result), 201
 
     except ValueError as ve:
-        return jsonify({'error': f'Erro de parsing: {str(ve)}'}), 400
+        return jsonify({'error': str(ve)}), 400
     except Exception as e:
-        print(f"ERRO EM /reformat-and-save: {e}")
+        logger.exception('Erro em /reformat-and-save: %s', e)
         return jsonify({'error': f'Erro interno do servidor: {str(e)}'}), 500
 
 
+@exercises_bp.route('/jobs/<job_id>', methods=['GET'])
+@require_auth
+def get_exercise_job(job_id):
+    """Consulta o status, o progresso e o resultado (parcial ou final) de uma tarefa."""
+    current_user = get_current_user()
+    job = get_job_queue().get(job_id)
+
+    if not job or job.get('user_id') != current_user['id']:
+        return jsonify({'error': 'Tarefa não encontrada'}), 404
+
+    return jsonify({'job': job}), 200
+
+
 
 @exercises_bp.route('/<exercise_id>/create-flashcard', methods=['POST'])
 @require_auth
+@invalidates('flashcards')
+@resets_due_queue
 def create_flashcard_from_exercise(exercise_id):
     """
     Cria um flashcard diretamente a partir de um exercício existente e o liga a ele.
@@ -132,11 +182,12 @@ def create_flashcard_from_exercise(exercise_id):
         return jsonify({'message': 'Flashcard criado e vinculado com sucesso', 'flashcard': fc_response.data[0]}), 201
 
     except Exception as e:
-        print(f"ERRO EM /<id>/create-flashcard: {e}")
+        logger.exception('Erro em /<id>/create-flashcard: %s', e)
         return jsonify({'error': f'Erro interno do servidor: {str(e)}'}), 500
 
 @exercises_bp.route('/<exercise_id>/append-to-summary', methods=['POST'])
 @require_auth
+@invalidates('summaries')
 def append_knowledge_to_summary(exercise_id):
     """
     Usa a IA para integrar o conhecimento de um exercício ao seu resumo pai.
@@ -174,7 +225,7 @@ def append_knowledge_to_summary(exercise_id):
         return jsonify({'message': 'Conhecimento integrado ao resumo com sucesso!', 'summary': update_response.data[0]}), 200
 
     except Exception as e:
-        print(f"ERRO EM /<id>/append-to-summary: {e}")
+        logger.exception('Erro em /<id>/append-to-summary: %s', e)
         return jsonify({'error': f'Erro interno do servidor: {str(e)}'}), 500
     
 @exercises_bp.route('/suggested-daily', methods=['GET'])
@@ -198,7 +249,7 @@ def get_suggested_exercises():
 
         return jsonify({'exercises': response.data}), 200
     except Exception as e:
-        print(f"ERRO AO BUSCAR EXERCÍCIOS SUGERIDOS: {e}")
+        logger.exception('Erro ao buscar exercícios sugeridos: %s', e)
         return jsonify({'error': f'Erro interno: {str(e)}'}), 500
 
 # ====================================================================
@@ -238,6 +289,6 @@ def get_exercises():
         return jsonify({'exercises': exercises}), 200
 
     except Exception as e:
-        print(f"ERRO EM GET /exercises: {str(e)}")
+        logger.exception('Erro em GET /exercises: %s', e)
         return jsonify({'error': f'Erro interno do servidor: {str(e)}'}), 500
 # ====================================================================
\ No newline at end of file
@@ -1,62 +1,107 @@
-from flask import Blueprint, request, jsonify
+import logging
+
+from flask import Blueprint, request, jsonify, current_app
 from datetime import datetime, timezone
 from src.config.database import get_supabase_client
 from src.utils.auth import require_auth, get_current_user
-import traceback
+from src.utils.conditional import invalidates
+from src.utils.due_queue import apply_review_rows
+from src.utils.log import preview
+from src.utils.review_batch import batch_results, fetch_sessions, parse_grade_items, run_srs_updates, write_sessions
+from src.utils.srs_engine import calculate_srs_update
+from src.utils.review_queries import fetch_pending, parse_pending_args, pending_due_total
 import json 
 
 flashcard_reviews_bp = Blueprint('flashcard_reviews', __name__)
+logger = logging.getLogger(__name__)
+
+PENDING_FULL_SELECT = '''
+    *,
+    flashcards (
+        *,
+        flashcard_decks (name)
+    )
+'''
+PENDING_COMPACT_SELECT = (
+    'id, flashcard_id, next_review, '
+    'flashcards (question, deck_id, flashcard_decks (name, subject_id, subjects (name, color)))'
+)
+
+
+def _compact_pending_review(row):
+    flashcard = row.get('flashcards') or {}
+    deck = flashcard.get('flashcard_decks') or {}
+    subject = deck.get('subjects') or {}
+    return {
+        'id': row['id'],
+        'flashcard_id': row['flashcard_id'],
+        'title': flashcard.get('question'),
+        'deck_id': flashcard.get('deck_id'),
+        'deck_name': deck.get('name'),
+        'subject_id': deck.get('subject_id'),
+        'subject_name': subject.get('name'),
+        'subject_color': subject.get('color'),
+        'next_review': row['next_review'],
+    }
+
 
 @flashcard_reviews_bp.route('/pending', methods=['GET'])
 @require_auth
 def get_pending_flashcard_reviews():
-    """Obter flashcards pendentes de revisão."""
+    """
+    Obter flashcards pendentes de revisão.
+
+    Query params opcionais: `view=compact` (pergunta como título, sem resposta)
+    e `limit` / `cursor` (paginação ordenada por `next_review`).
+    """
     try:
         current_user = get_current_user()
         supabase = get_supabase_client()
 
-        response = (
+        try:
+            view, cursor, limit = parse_pending_args(request.args)
+        except ValueError as ve:
+            return jsonify({'error': str(ve)}), 400
+
+        due_total = pending_due_total(supabase, current_user['id'], 'flashcard')
+        columns = PENDING_COMPACT_SELECT if view == 'compact' else PENDING_FULL_SELECT
+        query = (
             supabase.table('flashcard_review_sessions')
-            .select('''
-                *,
-                flashcards (
-                    *,
-                    flashcard_decks (name)
-                )
-            ''')
+            .select(columns, count='exact' if limit and due_total is None else None)
             .eq('user_id', current_user['id'])
             .eq('is_completed', False)
             .lte('next_review', 'now()')
             .is_('flashcards.deleted_at', None)
-            .order('next_review', desc=False)
-            .execute()
         )
+        pending_reviews, total_pending, next_cursor, has_more = fetch_pending(query, cursor, limit, due_total)
 
-        pending_reviews = response.data if response.data else []
+        if view == 'compact':
+            pending_reviews = [_compact_pending_review(row) for row in pending_reviews]
 
-        return jsonify({
+        result = {
             'pending_reviews': pending_reviews,
-            'total_pending': len(pending_reviews)
-        }), 200
+            'total_pending': total_pending
+        }
+        if limit:
+            result.update({'next_cursor': next_cursor, 'has_more': has_more})
+        return jsonify(result), 200
 
     except Exception as e:
-        print(f"ERRO EM /flashcard-reviews/pending: {str(e)}")
+        logger.exception('Erro em /flashcard-reviews/pending: %s', e)
         return jsonify({'error': f'Erro interno: {str(e)}'}), 500
 
 
 @flashcard_reviews_bp.route('/complete', methods=['POST'])
 @require_auth
+@invalidates('flashcard_review_sessions')
 def complete_flashcard_review():
     """Marcar revisão de flashcard como completa e calcular próxima (com acoplamento ao resumo pai)."""
-    
-    print("\n--- 🏁 [DEBUG] Rota /api/flashcard-reviews/complete ACIONADA ---")
-    
     try:
         current_user = get_current_user()
         supabase = get_supabase_client()
         data = request.get_json()
 
-        print(f"📌 [DEBUG] Payload recebido do App: {data}")
+        logger.debug('/complete: payload %s', preview(data))
 
         flashcard_id = data.get('flashcard_id')
         difficulty_rating = data.get('difficulty_rating')
@@ -65,7 +110,6 @@ def complete_flashcard_review():
             return jsonify({'error': 'flashcard_id e difficulty_rating são obrigatórios'}), 400
 
         # --- Etapa 1: Obter a sessão de revisão do flashcard ---
-        print(f"🔍 [DEBUG] 1. Buscando sessão de revisão para o flashcard_id: {flashcard_id}")
         review_response = (
             supabase.table('flashcard_review_sessions')
             .select('*')
@@ -76,26 +120,19 @@ def complete_flashcard_review():
         )
 
         if not review_response.data:
-            print(f"❌ [DEBUG] ERRO: Sessão de revisão do flashcard não encontrada.")
             return jsonify({'error': 'Sessão de revisão do flashcard não encontrada'}), 404
         
         current_review = review_response.data[0]
-        print(f"✅ [DEBUG] 1. Sessão de revisão encontrada.")
 
         # --- Etapa 2: Descobrir o resumo pai ---
-        print(f"🔍 [DEBUG] 2. Buscando resumo pai para o flashcard.")
         summary_id = None
         fc_resp = ( supabase.table('flashcards').select('summary_id').eq('id', flashcard_id).single().execute() )
         if fc_resp.data and fc_resp.data.get('summary_id'):
             summary_id = fc_resp.data.get('summary_id')
-            print(f"✅ [DEBUG] 2. Resumo pai encontrado. summary_id: {summary_id}")
-        else:
-            print("⚠️ [DEBUG] 2. Flashcard não está associado a um resumo pai.")
 
         # --- Etapa 3: Buscar a nota da revisão mais recente do resumo ---
         summary_grade = None
         if summary_id:
-            print(f"🔍 [DEBUG] 3. Buscando nota da última revisão do resumo.")
             rs_resp = (
                 supabase.table('review_sessions')
                 .select('difficulty_rating, last_reviewed')
@@ -107,40 +144,33 @@ def complete_flashcard_review():
             )
             if rs_resp.data:
                 summary_grade = rs_resp.data[0].get('difficulty_rating')
-                print(f"✅ [DEBUG] 3. Nota do resumo encontrada: {summary_grade}")
-            else:
-                print("⚠️ [DEBUG] 3. Nenhuma revisão encontrada para o resumo pai.")
         
         coupling_data = {"summaryGrade": summary_grade} if summary_grade is not None else None
-        print(f"🔩 [DEBUG] Dados de acoplamento preparados: {coupling_data}")
+        logger.debug('/complete: flashcard %s, resumo pai %s, acoplamento %s', flashcard_id, summary_id, coupling_data)
 
         # ==================== LÓGICA RESTAURADA ====================
         # --- Etapa 4: Chamar a função RPC para calcular a próxima revisão ---
-        print(f"📞 [DEBUG] 4. Chamando RPC 'calculate_srs_update_v2' para o flashcard.")
-        calc_response = supabase.rpc('calculate_srs_update_v2', {
+        srs_data = calculate_srs_update(supabase, {
             'p_item_id': flashcard_id,
             'p_item_type': 'flashcard',
             'p_user_id': current_user['id'],
             'p_grade': difficulty_rating,
             'p_coupling_data': json.dumps(coupling_data) if coupling_data else None
-        }).execute()
+        }, current_review)
 
-        # Adicione um log para ver a resposta da RPC
-        print(f"📦 [DEBUG] Resposta completa da RPC: {calc_response.data}")
+        logger.debug('/complete: resultado do SRS %s', preview(srs_data))
 
-        if not calc_response.data:
-            print(f"❌ [DEBUG] ERRO: RPC não retornou dados.")
+        if not srs_data:
+            logger.warning('Cálculo de SRS sem dados para o flashcard %s', flashcard_id)
             return jsonify({'error': 'Erro ao calcular próxima revisão'}), 500
 
         # ==================== CORREÇÃO APLICADA AQUI ====================
         # A resposta da RPC é um único objeto, não uma lista.
         # Removemos o acesso ao índice [0].
-        next_review_data = calc_response.data
+        next_review_data = srs_data
         # ================================================================
-        print(f"✅ [DEBUG] 4. RPC executada com sucesso. Próxima revisão: {next_review_data}")
 
         # --- Etapa 5: Atualizar a sessão de revisão no banco de dados ---
-        print(f"💾 [DEBUG] 5. Atualizando a sessão de revisão no banco de dados.")
 
         update_data = {
             'last_reviewed': datetime.now(timezone.utc).isoformat(),
@@ -166,11 +196,10 @@ def complete_flashcard_review():
         # ================================================================
 
         if not update_response.data:
-            print(f"❌ [DEBUG] ERRO: Falha ao atualizar a sessão de revisão no banco.")
+            logger.warning('Falha ao atualizar a sessão de revisão %s (possível falha de RLS)', current_review['id'])
             return jsonify({'error': 'Erro ao atualizar revisão do flashcard'}), 400
-        
-        print("✅ [DEBUG] 5. Sessão de revisão atualizada com sucesso.")
-        print("--- ✅ [DEBUG] Rota concluída com sucesso. ---")
+
+        apply_review_rows(current_user['id'], 'flashcard', update_response.data)
 
         return jsonify({
             'message': 'Revisão de flashcard completada com sucesso',
@@ -178,9 +207,96 @@ def complete_flashcard_review():
         }), 200
 
     except Exception as e:
-        print("\n💥💥💥 [DEBUG] UM ERRO CRÍTICO OCORREU! 💥💥💥")
-        print(f"   Tipo do Erro: {type(e)}")
-        print(f"   Mensagem: {e}")
-        traceback.print_exc()
-        print("--------------------------------------------------\n")
-        return jsonify({'error': f'Erro interno: {str(e)}'}), 500
\ No newline at end of file
+        logger.exception('Erro crítico em /flashcard-reviews/complete: %s', e)
+        return jsonify({'error': f'Erro interno: {str(e)}'}), 500
+
+
+@flashcard_reviews_bp.route('/complete-batch', methods=['POST'])
+@require_auth
+@invalidates('flashcard_review_sessions')
+def complete_flashcard_review_batch():
+    """
+    Versão em lote de /complete.
+
+    Corpo: lista de {flashcard_id, difficulty_rating}. Sessões, resumos pais e
+    as notas das revisões desses resumos são lidos com três consultas `in_()`;
+    a RPC de SRS roda em paralelo e as atualizações são gravadas com upserts em
+    bloco. `results` traz um resultado por item, na ordem recebida.
+    """
+    try:
+        current_user = get_current_user()
+        user_id = current_user['id']
+        supabase = get_supabase_client()
+
+        try:
+            entries = parse_grade_items(request.get_json(silent=True), 'flashcard_id')
+        except ValueError as ve:
+            return jsonify({'error': str(ve)}), 400
+
+        valid = [entry for entry in entries if entry['error'] is None]
+        flashcard_ids = [entry['item_id'] for entry in valid]
+        sessions = fetch_sessions(supabase, 'flashcard_review_sessions', user_id, 'flashcard_id', flashcard_ids)
+
+        # Resumo pai de cada flashcard e a nota da revisão mais recente de cada resumo
+        parents = {}
+        if flashcard_ids:
+            fc_rows = supabase.table('flashcards').select('id, summary_id').in_('id', flashcard_ids).execute().data or []
+            parents = {row['id']: row.get('summary_id') for row in fc_rows if row.get('summary_id')}
+        summary_grades = {}
+        if parents:
+            rs_rows = (
+                supabase.table('review_sessions')
+                .select('summary_id, difficulty_rating, last_reviewed')
+                .eq('user_id', user_id)
+                .in_('summary_id', list(set(parents.values())))
+                .order('last_reviewed', desc=True)
+                .execute()
+            ).data or []
+            for row in rs_rows:
+                summary_grades.setdefault(row['summary_id'], row.get('difficulty_rating'))
+
+        for entry in valid:
+            entry['session'] = sessions.get(entry['item_id'])
+            if entry['session'] is None:
+                entry['error'] = 'Sessão de revisão do flashcard não encontrada'
+
+        def build_params(entry):
+            summary_grade = summary_grades.get(parents.get(entry['item_id']))
+            coupling_data = {"summaryGrade": summary_grade} if summary_grade is not None else None
+            return {
+                'p_item_id': entry['item_id'],
+                'p_item_type': 'flashcard',
+                'p_user_id': user_id,
+                'p_grade': entry['grade'],
+                'p_coupling_data': json.dumps(coupling_data) if coupling_data else None
+            }
+
+        run_srs_updates(supabase, entries, build_params, current_app.config.get('REVIEW_BATCH_CONCURRENCY', 8))
+
+        now_iso = datetime.now(timezone.utc).isoformat()
+        for entry in entries:
+            if entry['error'] is None:
+                srs_data, grade = entry['srs'], entry['grade']
+                entry['row'] = {
+                    **entry['session'],
+                    'last_reviewed': now_iso,
+                    'next_review': srs_data['next_review_date'],
+                    'review_count': (entry['session'].get('review_count') or 0) + 1,
+                    'difficulty_rating': grade,
+                    'ease_factor': srs_data['new_ease_factor'],
+                    'interval_days': srs_data['new_interval'],
+                    'last_weight_multiplier': srs_data.get('new_weight_multiplier'),
+                    'is_completed': (6 - grade) >= 4
+                }
+
+        write_sessions(supabase, 'flashcard_review_sessions', entries, current_app.config.get('SYNC_UPSERT_CHUNK_SIZE', 200))
+        apply_review_rows(user_id, 'flashcard', [entry['saved'] for entry in entries if 'saved' in entry])
+
+        return jsonify({
+            'message': 'Lote de revisões de flashcards processado',
+            'results': batch_results(entries, 'flashcard_id')
+        }), 200
+
+    except Exception as e:
+        logger.exception('Erro crítico em /flashcard-reviews/complete-batch: %s', e)
+        return jsonify({'error': f'Erro interno: {str(e)}'}), 500
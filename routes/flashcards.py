@@ -1,13 +1,76 @@
 # Arquivo: src/routes/flashcards.py
 
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from src.config.database import get_supabase_client
 from src.utils.auth import require_auth, get_current_user
+from src.utils.conditional import conditional_get, invalidates
+from src.utils.due_queue import resets_due_queue
+from src.utils.log import preview
 from src.config.gpt_service import get_gpt_service
+from src.utils.markdown_sections import split_markdown_sections
+import hashlib
+import logging
+import re
+import time
+import unicodedata
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone # Importar datetime
 
 flashcards_bp = Blueprint('flashcards', __name__)
+logger = logging.getLogger(__name__)
+
+
+def _question_hash(question):
+    """Hash da pergunta normalizada (sem acentos, pontuação, caixa e espaços extras)."""
+    text = unicodedata.normalize('NFKD', question)
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch)).lower()
+    text = re.sub(r'[^\w\s]', '', text)
+    text = ' '.join(text.split())
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+def generate_sectioned_flashcards(gpt_service, content, no_cache=False, max_workers=4, min_section_chars=400):
+    """
+    Gera flashcards de cada seção do resumo em paralelo e junta os resultados
+    na ordem das seções, descartando perguntas repetidas.
+
+    Returns:
+        Tupla (flashcards, diagnóstico por seção, quantidade de duplicados removidos).
+    """
+    sections = split_markdown_sections(content, min_chars=min_section_chars) or [{'title': '', 'content': content}]
+
+    def generate(section):
+        started = time.perf_counter()
+        try:
+            flashcards = gpt_service.generate_flashcards_from_text(section['content'], no_cache=no_cache)
+            error = None
+        except Exception as e:
+            flashcards, error = [], str(e)
+        return flashcards, error, round((time.perf_counter() - started) * 1000, 1)
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(sections)))) as executor:
+        results = list(executor.map(generate, sections))
+
+    if all(error for _, error, _ in results):
+        raise Exception(results[0][1])
+
+    merged, seen, duplicates = [], set(), 0
+    diagnostics = []
+    for section, (flashcards, error, duration_ms) in zip(sections, results):
+        for flashcard in flashcards:
+            key = _question_hash(flashcard['question'])
+            if key in seen:
+                duplicates += 1
+                continue
+            seen.add(key)
+            merged.append(flashcard)
+        diagnostic = {'title': section['title'], 'chars': len(section['content']), 'flashcards': len(flashcards), 'duration_ms': duration_ms}
+        if error:
+            diagnostic['error'] = error
+        diagnostics.append(diagnostic)
+
+    return merged, diagnostics, duplicates
 
 # --- ROTAS POST ---
 
@@ -17,6 +80,7 @@ def generate_from_summary():
     """Gera flashcards a partir do conteúdo de um resumo existente."""
     data = request.get_json()
     summary_id = data.get('summary_id')
+    no_cache = bool(data.get('no_cache', False))
 
     if not summary_id:
         return jsonify({'error': 'summary_id é obrigatório'}), 400
@@ -33,11 +97,23 @@ def generate_from_summary():
     summary_content = summary_response.data['content']
 
     try:
-        # Chama o serviço do GPT para gerar os flashcards
+        # Cada seção do resumo é enviada ao GPT em paralelo
         gpt_service = get_gpt_service()
-        generated_flashcards = gpt_service.generate_flashcards_from_text(summary_content)
-        
-        return jsonify({'generated_flashcards': generated_flashcards}), 200
+        started = time.perf_counter()
+        generated_flashcards, sections, duplicates_removed = generate_sectioned_flashcards(
+            gpt_service,
+            summary_content,
+            no_cache=no_cache,
+            max_workers=current_app.config.get('FLASHCARD_SECTION_CONCURRENCY', 4),
+            min_section_chars=current_app.config.get('FLASHCARD_SECTION_MIN_CHARS', 400)
+        )
+
+        return jsonify({
+            'generated_flashcards': generated_flashcards,
+            'sections': sections,
+            'duplicates_removed': duplicates_removed,
+            'total_duration_ms': round((time.perf_counter() - started) * 1000, 1)
+        }), 200
 
     except Exception as e:
         return jsonify({'error': f'Erro ao gerar flashcards: {str(e)}'}), 500
@@ -52,6 +128,7 @@ def generate_from_summary():
 
 @flashcards_bp.route('/decks', methods=['GET'])
 @require_auth
+@conditional_get(['flashcard_decks', 'flashcards'])
 def get_flashcard_decks():
     """Listar todos os decks de flashcards do usuário com contagem de flashcards."""
     try:
@@ -92,6 +169,7 @@ def get_flashcard_deck_details(deck_id):
 
 @flashcards_bp.route('/decks/<deck_id>', methods=['PUT'])
 @require_auth
+@invalidates('flashcard_decks', 'flashcards')
 def update_flashcard_deck(deck_id):
     """Atualizar o nome ou descrição de um deck de flashcards."""
     data = request.get_json()
@@ -120,6 +198,8 @@ def update_flashcard_deck(deck_id):
 
 @flashcards_bp.route('/decks/<deck_id>', methods=['DELETE'])
 @require_auth
+@invalidates('flashcard_decks', 'flashcards')
+@resets_due_queue
 def delete_flashcard_deck(deck_id):
     """Realiza o soft delete de um deck e de todos os flashcards contidos nele."""
     try:
@@ -145,6 +225,8 @@ def delete_flashcard_deck(deck_id):
 
 @flashcards_bp.route('/batch-create', methods=['POST'])
 @require_auth
+@invalidates('flashcard_decks', 'flashcards')
+@resets_due_queue
 def batch_create_flashcards():
     """Cria múltiplos flashcards e o deck correspondente, se necessário."""
     data = request.get_json()
@@ -152,9 +234,8 @@ def batch_create_flashcards():
     subject_id = data.get('subject_id')
     summary_id = data.get('summary_id')
 
-    print("--- INICIANDO /batch-create ---")
-    print(f"Subject ID recebido: {subject_id}")
-    print(f"Total de flashcards recebidos: {len(flashcards_to_create) if flashcards_to_create else 0}")
+    logger.debug('/batch-create: subject_id=%s, flashcards recebidos=%d',
+                 subject_id, len(flashcards_to_create) if flashcards_to_create else 0)
 
     if not all([flashcards_to_create, subject_id]):
         return jsonify({'error': 'Dados incompletos'}), 400
@@ -166,27 +247,20 @@ def batch_create_flashcards():
     current_user = get_current_user()
     
     try:
-        # LOG 1: Verificando a resposta da busca pela matéria
-        print("--- LOG 1: Buscando matéria ---")
         subject_response = supabase.table('subjects').select('name').eq('id', subject_id).eq('user_id', current_user['id']).maybe_single().execute()
-        print(f"Subject Response: {subject_response}")
+        logger.debug('Matéria: %s', preview(subject_response))
         
         if not subject_response or not subject_response.data:
             return jsonify({'error': 'Matéria de destino não encontrada (ou falha na busca).'}), 404
         
         subject_name = subject_response.data['name']
-        print(f"--- LOG 1.1: Nome da matéria encontrado: {subject_name} ---")
 
-        # LOG 2: Verificando a resposta da busca pelo deck de flashcards
-        print("\n--- LOG 2: Buscando deck de flashcards existente ---")
         deck_response = supabase.table('flashcard_decks').select('id').eq('subject_id', subject_id).eq('user_id', current_user['id']).maybe_single().execute()
-        print(f"Deck Response: {deck_response}")
+        logger.debug('Deck existente: %s', preview(deck_response))
         
         if deck_response and deck_response.data:
             deck_id = deck_response.data['id']
-            print(f"--- LOG 2.1: Deck existente encontrado. ID: {deck_id} ---")
         else:
-            print("\n--- LOG 3: Deck não encontrado, criando um novo ---")
             new_deck_data = {
                 'id': str(uuid.uuid4()),
                 'user_id': current_user['id'],
@@ -194,14 +268,13 @@ def batch_create_flashcards():
                 'name': subject_name
             }
             insert_response = supabase.table('flashcard_decks').upsert(new_deck_data).execute()
-            print(f"Insert Deck Response: {insert_response}")
+            logger.debug('Deck criado: %s', preview(insert_response))
 
             if not insert_response or not insert_response.data:
                 # Este é o local mais provável do erro se a política RLS estiver incorreta
                 raise Exception("Falha ao criar o deck de flashcards. A resposta do upsert não retornou dados.")
 
             deck_id = insert_response.data[0]['id']
-            print(f"--- LOG 3.1: Novo deck criado. ID: {deck_id} ---")
 
         flashcards_data = [
             {
@@ -214,21 +287,16 @@ def batch_create_flashcards():
             } for fc in flashcards_to_create
         ]
         
-        # LOG 4: Verificando a resposta da inserção dos flashcards
-        print("\n--- LOG 4: Inserindo flashcards em lote ---")
         insert_flashcards_response = supabase.table('flashcards').upsert(flashcards_data).execute()
-        print(f"Insert Flashcards Response: {insert_flashcards_response}")
+        logger.debug('Flashcards gravados: %s', preview(insert_flashcards_response))
         
         # Verificação de segurança final
         if not insert_flashcards_response or not insert_flashcards_response.data:
              raise Exception("A operação de salvar os flashcards não retornou dados. Verifique as permissões (RLS) da tabela 'flashcards'.")
 
-        print("--- FINALIZADO COM SUCESSO ---")
+        logger.info('/batch-create: %d flashcards gravados no deck %s', len(flashcards_data), deck_id)
         return jsonify({'message': f'{len(flashcards_data)} flashcards foram enviados para salvamento.'}), 201
 
     except Exception as e:
-        print(f"!!! ERRO INESPERADO EM /batch-create: {str(e)}")
-        # Imprime o traceback completo no console do Flask para depuração detalhada
-        import traceback
-        traceback.print_exc()
+        logger.exception('Erro inesperado em /batch-create: %s', e)
         return jsonify({'error': f'Erro ao salvar flashcards: {str(e)}'}), 500
\ No newline at end of file
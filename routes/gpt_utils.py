@@ -3,6 +3,9 @@
 from flask import Blueprint, request, jsonify
 from src.utils.auth import require_auth
 from src.config.gpt_service import get_gpt_service
+from src.config.llm_clients import get_llm_client_registry
+from src.utils.llm_cache import get_llm_cache
+from src.utils.sse import sse_response, wants_event_stream
 
 gpt_utils_bp = Blueprint('gpt_utils', __name__)
 
@@ -16,15 +19,38 @@ def summarize_text_from_input():
     # ==================== ADICIONE ESTA LINHA ====================
     prompt_style = data.get('prompt_style', 'default')
     # ===============================================================
+    no_cache = bool(data.get('no_cache', False))
 
     if not text_content:
         return jsonify({'error': 'O campo "text" é obrigatório'}), 400
 
     try:
         gpt_service = get_gpt_service()
+        if wants_event_stream(data):
+            return sse_response(gpt_service.summarize_text_stream(text_content, prompt_style=prompt_style, no_cache=no_cache))
         # ==================== MODIFIQUE ESTA LINHA ====================
-        generated_summary = gpt_service.summarize_text(text_content, prompt_style=prompt_style)
+        generated_summary = gpt_service.summarize_text(text_content, prompt_style=prompt_style, no_cache=no_cache)
         # ================================================================
         return jsonify({'summary_content': generated_summary}), 200
     except Exception as e:
-        return jsonify({'error': f'Erro ao gerar resumo: {str(e)}'}), 500
\ No newline at end of file
+        return jsonify({'error': f'Erro ao gerar resumo: {str(e)}'}), 500
+
+
+@gpt_utils_bp.route('/pool-stats', methods=['GET'])
+@require_auth
+def get_pool_stats():
+    """Estatísticas do pool de conexões dos clientes de IA (para dimensionamento)."""
+    registry = get_llm_client_registry()
+    if registry is None:
+        return jsonify({'limits': None, 'clients': []}), 200
+    return jsonify(registry.stats()), 200
+
+
+@gpt_utils_bp.route('/cache-stats', methods=['GET'])
+@require_auth
+def get_cache_stats():
+    """Métricas de acerto/erro do cache de gerações de IA."""
+    cache = get_llm_cache()
+    if cache is None:
+        return jsonify({'enabled': False}), 200
+    return jsonify({'enabled': True, **cache.stats()}), 200
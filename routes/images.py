@@ -1,4 +1,5 @@
 # src/routes/images.py
+import logging
 from flask import Blueprint, request, jsonify
 from src.utils.auth import require_auth, get_current_user
 from src.config.database import get_supabase_client
@@ -7,6 +8,7 @@ from PIL import Image  # <-- Garanta que esta linha importe 'Image' com 'I' mai
 import io
 
 images_bp = Blueprint('images', __name__)
+logger = logging.getLogger(__name__)
 
 # Função auxiliar para redimensionar e converter a imagem
 def create_image_variant(image_bytes, max_size):
@@ -70,10 +72,7 @@ def upload_image():
         return jsonify({'message': 'Upload de todas as variantes concluído com sucesso'}), 200
 
     except Exception as e:
-        print(f"--- ERRO DETALHADO NO UPLOAD (FLASK -> SUPABASE) ---")
-        print(f"Erro: {e}")
-        print(f"Tipo do Erro: {type(e)}")
-        print(f"----------------------------------------------------")
+        logger.exception('Erro no upload de imagem para o Supabase (%s): %s', type(e).__name__, e)
         return jsonify({'error': f'Erro interno ao fazer upload: {str(e)}'}), 500
 
 
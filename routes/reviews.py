@@ -2,72 +2,114 @@
 Rotas para sistema de revisão espaçada
 """
 
-import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
 
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from src.config.database import get_supabase_client
 from src.utils.auth import require_auth, get_current_user
-from datetime import datetime, timedelta
+from src.utils.conditional import invalidates
+from src.utils.due_queue import apply_review_rows, get_due_index
+from src.utils.review_batch import batch_results, fetch_sessions, parse_grade_items, run_srs_updates, write_sessions
+from src.utils.session_scheduler import fetch_candidates, get_session_priority, select_top_k, subject_subtree_ids
+from src.utils.srs_engine import calculate_srs_update
+from src.utils.review_queries import fetch_pending, parse_pending_args, pending_due_total
+from datetime import date, datetime, timedelta
 
 reviews_bp = Blueprint('reviews', __name__)
+logger = logging.getLogger(__name__)
+
+# Linhas de `last_reviewed` lidas por consulta no cálculo do streak
+REVIEW_STREAK_PAGE_SIZE = 1000
+
+PENDING_FULL_SELECT = '''
+    *,
+    summaries (
+        *,
+        subjects (*, deleted_at) # Adicionado deleted_at para sujeitos também, se necessário
+    )
+'''
+PENDING_COMPACT_SELECT = 'id, summary_id, next_review, summaries (title, subject_id, subjects (name, color))'
+
+# Colunas das sessões escolhidas em /session/start
+SESSION_FULL_SELECT = '''
+    *,
+    summaries(id, title, content, subject_id, difficulty_level),
+    summaries.subjects(name, color)
+'''
+
+
+def _compact_pending_review(row):
+    summary = row.get('summaries') or {}
+    subject = summary.get('subjects') or {}
+    return {
+        'id': row['id'],
+        'summary_id': row['summary_id'],
+        'title': summary.get('title'),
+        'subject_id': summary.get('subject_id'),
+        'subject_name': subject.get('name'),
+        'subject_color': subject.get('color'),
+        'next_review': row['next_review'],
+    }
+
 
 @reviews_bp.route('/pending', methods=['GET'])
 @require_auth
 def get_pending_reviews():
-    """Obter resumos pendentes de revisão com dados aninhados."""
+    """
+    Obter resumos pendentes de revisão com dados aninhados.
+
+    Query params opcionais: `view=compact` (sem o conteúdo dos resumos),
+    `limit` e `cursor` (paginação ordenada por `next_review`).
+    """
     try:
         current_user = get_current_user()
         supabase = get_supabase_client()
+
+        try:
+            view, cursor, limit = parse_pending_args(request.args)
+        except ValueError as ve:
+            return jsonify({'error': str(ve)}), 400
         
         # Query para buscar sessões de revisão que:
         # 1. Pertencem ao usuário atual ('user_id')
         # 2. NÃO estão marcadas como completas ('is_completed', False)
         # 3. A data da próxima revisão já passou ou é agora ('next_review', lte('now()'))
         # 4. <<< ADICIONADA: O resumo associado NÃO ESTÁ soft-deletado (summaries.deleted_at IS NULL) >>>
-        
-        response = (
+        due_total = pending_due_total(supabase, current_user['id'], 'summary')
+        columns = PENDING_COMPACT_SELECT if view == 'compact' else PENDING_FULL_SELECT
+        query = (
             supabase.table('review_sessions')
-            .select('''
-                *,
-                summaries (
-                    *,
-                    subjects (*, deleted_at) # Adicionado deleted_at para sujeitos também, se necessário
-                )
-            ''')
+            .select(columns, count='exact' if limit and due_total is None else None)
             .eq('user_id', current_user['id'])
             .eq('is_completed', False)
             .lte('next_review', 'now()')
             .is_('summaries.deleted_at', None) # <<< FILTRO CHAVE ADICIONADO AQUI >>>
-            .order('next_review', desc=False)
-            .execute()
         )
-        
-        pending_reviews = response.data if response.data else []
-
-        # --- BLOCO DE DEPURAÇÃO (MUITO IMPORTANTE) ---
-        # Verifique o terminal do Flask após acessar a tela de revisão.
-        # Ele mostrará exatamente o que está sendo enviado para o app.
-        print("\n--- JSON SENDO ENVIADO PARA O FRONTEND (/reviews/pending) ---")
-        print(f"Total de revisões pendentes encontradas: {len(pending_reviews)}")
-        # Use 'default=str' para lidar com objetos de data e hora que não são serializáveis por padrão
-        print(json.dumps(pending_reviews, indent=2, default=str))
-        print("----------------------------------------------------------\n")
-        # --- FIM DO BLOCO ---
-        
-        return jsonify({
+        pending_reviews, total_pending, next_cursor, has_more = fetch_pending(query, cursor, limit, due_total)
+
+        if view == 'compact':
+            pending_reviews = [_compact_pending_review(row) for row in pending_reviews]
+
+        result = {
             'pending_reviews': pending_reviews,
-            'total_pending': len(pending_reviews)
-        }), 200
+            'total_pending': total_pending
+        }
+        if limit:
+            result.update({'next_cursor': next_cursor, 'has_more': has_more})
+        return jsonify(result), 200
         
     except Exception as e:
-        # Adiciona um print para ver o erro no terminal do Flask
-        print(f"ERRO EM /reviews/pending: {str(e)}")
+        logger.exception('Erro em /reviews/pending: %s', e)
         return jsonify({'error': f'Erro interno: {str(e)}'}), 500
 
 @reviews_bp.route('/session/start', methods=['POST'])
 @require_auth
 def start_review_session():
-    """Iniciar sessão de revisão"""
+    """
+    Iniciar sessão de revisão com os `limit` resumos vencidos de maior
+    prioridade (ver `utils/session_scheduler.py`).
+    """
     try:
         current_user = get_current_user()
         data = request.get_json()
@@ -77,21 +119,33 @@ def start_review_session():
         
         supabase = get_supabase_client()
         
-        # Construir query para resumos pendentes
-        query = supabase.table('review_sessions').select('''
-            *,
-            summaries(id, title, content, subject_id, difficulty_level),
-            summaries.subjects(name, color)
-        ''').eq('user_id', current_user['id']).lte('next_review', 'now()').eq('is_completed', False)
-        
-        if subject_id:
-            # Filtrar por matéria através da tabela summaries
-            query = query.eq('summaries.subject_id', subject_id)
-        
-        response = query.order('next_review').limit(limit).execute()
-        
-        session_reviews = response.data if response.data else []
-        
+        due_index = get_due_index()
+        if due_index is not None and not subject_id \
+                and due_index.due_count(supabase, current_user['id'], ('summary',)) == 0:
+            session_reviews, truncated = [], False
+        else:
+            # Matéria escolhida vale com todas as submatérias, salvo include_descendants=false
+            subject_ids = None
+            if subject_id:
+                subject_ids = subject_subtree_ids(supabase, subject_id) \
+                    if data.get('include_descendants', True) else [subject_id]
+
+            # Candidatos vencidos (projeção compacta) -> os `limit` de maior prioridade
+            candidates, truncated = fetch_candidates(
+                supabase, current_user['id'], subject_ids,
+                max_candidates=current_app.config.get('SESSION_MAX_CANDIDATES', 2000),
+                budget_seconds=current_app.config.get('SESSION_CANDIDATE_BUDGET_MS', 800) / 1000
+            )
+            chosen_ids = [row['id'] for row in select_top_k(candidates, int(limit), get_session_priority())]
+
+            # Só as sessões escolhidas são buscadas com todas as colunas
+            rows = []
+            if chosen_ids:
+                rows = supabase.table('review_sessions').select(SESSION_FULL_SELECT) \
+                    .in_('id', chosen_ids).execute().data or []
+            position = {session_id: index for index, session_id in enumerate(chosen_ids)}
+            session_reviews = sorted(rows, key=lambda row: position.get(row['id'], len(position)))
+
         if not session_reviews:
             return jsonify({
                 'message': 'Nenhuma revisão pendente encontrada',
@@ -106,7 +160,8 @@ def start_review_session():
             'message': 'Sessão de revisão iniciada',
             'session_reviews': session_reviews,
             'session_id': session_id,
-            'total_reviews': len(session_reviews)
+            'total_reviews': len(session_reviews),
+            'candidates_truncated': truncated
         }), 200
         
     except Exception as e:
@@ -114,6 +169,7 @@ def start_review_session():
 
 @reviews_bp.route('/complete', methods=['POST'])
 @require_auth
+@invalidates('review_sessions')
 def complete_review():
     """Marca uma revisão de resumo como completa e atualiza a próxima data."""
     try:
@@ -130,7 +186,7 @@ def complete_review():
         user_id = current_user['id']
 
         # Etapa 1: Obter a sessão de revisão ATUAL para este resumo
-        session_response = supabase.table('review_sessions').select('id, review_count').eq('user_id', user_id).eq('summary_id', summary_id).limit(1).execute()
+        session_response = supabase.table('review_sessions').select('id, review_count, ease_factor, interval_days').eq('user_id', user_id).eq('summary_id', summary_id).limit(1).execute()
 
         if not session_response.data:
             return jsonify({"error": "Sessão de revisão não encontrada para este resumo"}), 404
@@ -152,20 +208,19 @@ def complete_review():
             'incorrect_count': 1  # Exemplo
         }
 
-        calc_response = supabase.rpc('calculate_srs_update_v2', {
+        # RPC `calculate_srs_update_v2` (gravada em SRS_RECORD_PATH, se configurado)
+        srs_data = calculate_srs_update(supabase, {
             'p_item_id': summary_id,
             'p_item_type': 'summary',
             'p_user_id': user_id,
             'p_grade': difficulty_rating,
             'p_coupling_data': coupling_data, # Já é um dict/json
             'p_exercise_data': exercise_results # Novo payload
-        }).execute()
+        }, current_session)
         
-        if not calc_response.data:
+        if not srs_data:
             return jsonify({"error": "Falha ao calcular a atualização do SRS"}), 500
 
-        srs_data = calc_response.data
-
         update_data = {
             'last_reviewed': datetime.now().isoformat(),
             'next_review': srs_data['next_review_date'],
@@ -181,6 +236,8 @@ def complete_review():
 
         if not update_response.data:
             return jsonify({"error": "Falha ao atualizar a sessão de revisão"}), 400
+
+        apply_review_rows(user_id, 'summary', update_response.data)
         
         return jsonify({
             "message": "Revisão completada com sucesso",
@@ -188,9 +245,7 @@ def complete_review():
         }), 200
 
     except Exception as e:
-        print(f"ERRO CRÍTICO em /reviews/complete: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception('Erro crítico em /reviews/complete: %s', e)
         return jsonify({"error": str(e)}), 500
     
 
@@ -198,8 +253,80 @@ def complete_review():
 
 
 
+@reviews_bp.route('/complete-batch', methods=['POST'])
+@require_auth
+@invalidates('review_sessions')
+def complete_review_batch():
+    """
+    Versão em lote de /complete.
+
+    Corpo: lista de {summary_id, difficulty_rating, session_card_grades?}.
+    As sessões são lidas com uma consulta `in_()`, a RPC de SRS roda em paralelo
+    e as atualizações são gravadas com upserts em bloco. `results` traz um
+    resultado por item, na ordem recebida.
+    """
+    try:
+        current_user = get_current_user()
+        user_id = current_user['id']
+        supabase = get_supabase_client()
+
+        try:
+            entries = parse_grade_items(request.get_json(silent=True), 'summary_id')
+        except ValueError as ve:
+            return jsonify({'error': str(ve)}), 400
+
+        valid = [entry for entry in entries if entry['error'] is None]
+        sessions = fetch_sessions(supabase, 'review_sessions', user_id, 'summary_id', [entry['item_id'] for entry in valid])
+        for entry in valid:
+            entry['session'] = sessions.get(entry['item_id'])
+            if entry['session'] is None:
+                entry['error'] = 'Sessão de revisão não encontrada para este resumo'
+
+        def build_params(entry):
+            return {
+                'p_item_id': entry['item_id'],
+                'p_item_type': 'summary',
+                'p_user_id': user_id,
+                'p_grade': entry['grade'],
+                'p_coupling_data': entry['item'].get('session_card_grades'),
+                # Mesmo valor fixo enviado por /complete
+                'p_exercise_data': {'correct_count': 5, 'incorrect_count': 1}
+            }
+
+        run_srs_updates(supabase, entries, build_params, current_app.config.get('REVIEW_BATCH_CONCURRENCY', 8))
+
+        now_iso = datetime.now().isoformat()
+        for entry in entries:
+            if entry['error'] is None:
+                srs_data, grade = entry['srs'], entry['grade']
+                entry['row'] = {
+                    **entry['session'],
+                    'last_reviewed': now_iso,
+                    'next_review': srs_data['next_review_date'],
+                    'review_count': (entry['session'].get('review_count') or 0) + 1,
+                    'difficulty_rating': grade,
+                    'ease_factor': srs_data['new_ease_factor'],
+                    'interval_days': srs_data['new_interval'],
+                    'last_weight_multiplier': srs_data.get('new_weight_multiplier'),
+                    'is_completed': (6 - grade) >= 4
+                }
+
+        write_sessions(supabase, 'review_sessions', entries, current_app.config.get('SYNC_UPSERT_CHUNK_SIZE', 200))
+        apply_review_rows(user_id, 'summary', [entry['saved'] for entry in entries if 'saved' in entry])
+
+        return jsonify({
+            'message': 'Lote de revisões processado',
+            'results': batch_results(entries, 'summary_id')
+        }), 200
+
+    except Exception as e:
+        logger.exception('Erro crítico em /reviews/complete-batch: %s', e)
+        return jsonify({'error': f'Erro interno: {str(e)}'}), 500
+
+
 @reviews_bp.route('/frequency', methods=['PUT'])
 @require_auth
+@invalidates('review_sessions')
 def update_review_frequency():
     """Atualizar frequência de revisão"""
     try:
@@ -233,6 +360,35 @@ def update_review_frequency():
     except Exception as e:
         return jsonify({'error': f'Erro interno: {str(e)}'}), 500
 
+def _review_streak(supabase, user_id, today):
+    """
+    Dias consecutivos com revisão, terminando hoje.
+
+    Lê `last_reviewed` em ordem decrescente e para na primeira lacuna, então
+    normalmente basta uma consulta; outra página só é buscada se a anterior
+    inteira ainda fizer parte da sequência.
+    """
+    streak = 0
+    expected = today
+    tomorrow = (today + timedelta(days=1)).isoformat()
+    offset = 0
+    while True:
+        rows = supabase.table('review_sessions').select('last_reviewed') \
+            .eq('user_id', user_id).lt('last_reviewed', tomorrow) \
+            .order('last_reviewed', desc=True) \
+            .range(offset, offset + REVIEW_STREAK_PAGE_SIZE - 1).execute().data or []
+        for row in rows:
+            day = date.fromisoformat(row['last_reviewed'][:10])
+            if day == expected:
+                streak += 1
+                expected -= timedelta(days=1)
+            elif day < expected:
+                return streak
+        if len(rows) < REVIEW_STREAK_PAGE_SIZE:
+            return streak
+        offset += REVIEW_STREAK_PAGE_SIZE
+
+
 @reviews_bp.route('/stats', methods=['GET'])
 @require_auth
 def get_review_stats():
@@ -240,40 +396,37 @@ def get_review_stats():
     try:
         current_user = get_current_user()
         supabase = get_supabase_client()
-        
-        # Estatísticas gerais de revisão
-        stats_query = supabase.table('review_sessions').select('*').eq('user_id', current_user['id'])
-        
-        all_reviews = stats_query.execute().data or []
-        
-        # Calcular estatísticas
-        total_reviews = len(all_reviews)
-        completed_reviews = len([r for r in all_reviews if r['is_completed']])
-        pending_reviews = len([r for r in all_reviews if not r['is_completed'] and r['next_review'] <= datetime.now().isoformat()])
-        
-        # Revisões por dificuldade
-        difficulty_stats = {}
+        user_id = current_user['id']
+        now = datetime.now().isoformat()
+
+        # Contagens agregadas (sem trazer as linhas), executadas em paralelo
+        count_filters = {
+            'total': lambda q: q,
+            'completed': lambda q: q.eq('is_completed', True),
+            'pending': lambda q: q.eq('is_completed', False).lte('next_review', now),
+        }
         for i in range(1, 6):
-            difficulty_stats[f'difficulty_{i}'] = len([r for r in all_reviews if r['difficulty_rating'] == i])
-        
-        # Streak de revisões (dias consecutivos)
-        today = datetime.now().date()
-        streak_days = 0
-        check_date = today
-        
-        while True:
-            day_reviews = supabase.table('review_sessions').select('id').eq('user_id', current_user['id']).gte('last_reviewed', check_date.isoformat()).lt('last_reviewed', (check_date + timedelta(days=1)).isoformat()).execute()
-            
-            if day_reviews.data:
-                streak_days += 1
-                check_date -= timedelta(days=1)
-            else:
-                break
-        
+            count_filters[f'difficulty_{i}'] = lambda q, i=i: q.eq('difficulty_rating', i)
+
+        def count(apply_filter):
+            query = supabase.table('review_sessions').select('id', count='exact', head=True).eq('user_id', user_id)
+            return apply_filter(query).execute().count or 0
+
+        max_workers = max(1, current_app.config.get('REVIEW_STATS_CONCURRENCY', 4))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            # Streak de revisões (dias consecutivos)
+            streak_future = executor.submit(_review_streak, supabase, user_id, datetime.now().date())
+            counts = dict(zip(count_filters, executor.map(count, count_filters.values())))
+            streak_days = streak_future.result()
+
+        total_reviews = counts['total']
+        completed_reviews = counts['completed']
+        difficulty_stats = {f'difficulty_{i}': counts[f'difficulty_{i}'] for i in range(1, 6)}
+
         return jsonify({
             'total_reviews': total_reviews,
             'completed_reviews': completed_reviews,
-            'pending_reviews': pending_reviews,
+            'pending_reviews': counts['pending'],
             'completion_rate': (completed_reviews / total_reviews * 100) if total_reviews > 0 else 0,
             'difficulty_stats': difficulty_stats,
             'streak_days': streak_days
@@ -284,6 +437,7 @@ def get_review_stats():
 
 @reviews_bp.route('/reset/<summary_id>', methods=['POST'])
 @require_auth
+@invalidates('review_sessions')
 def reset_review_progress(summary_id):
     """Resetar progresso de revisão de um resumo"""
     try:
@@ -302,6 +456,7 @@ def reset_review_progress(summary_id):
         }
         
         response = supabase.table('review_sessions').update(reset_data).eq('user_id', current_user['id']).eq('summary_id', summary_id).execute()
+        apply_review_rows(current_user['id'], 'summary', response.data)
         
         if response.data:
             return jsonify({'message': 'Progresso de revisão resetado'}), 200
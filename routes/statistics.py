@@ -1,12 +1,16 @@
 """
 Rotas para estatísticas de estudo
 """
+import logging
 from flask import Blueprint, request, jsonify
 from src.config.database import get_supabase_client
 from src.utils.auth import require_auth, get_current_user
+from src.utils.conditional import invalidates
+from src.utils.due_queue import get_due_index
 from datetime import datetime, timedelta
 
 statistics_bp = Blueprint('statistics', __name__)
+logger = logging.getLogger(__name__)
 
 @statistics_bp.route('/overview', methods=['GET'])
 @require_auth
@@ -45,9 +49,13 @@ def get_overview_stats():
             'total_study_time_ms': 0
         }
         
-        pending_reviews = supabase.table('review_sessions').select('id', count='exact').eq('user_id', current_user['id']).lte('next_review', 'now()').eq('is_completed', False).execute()
-        
-        pending_count = pending_reviews.count if pending_reviews.count else 0
+        due_index = get_due_index()
+        if due_index is not None:
+            pending_count = due_index.due_count(supabase, current_user['id'], ('summary',))
+        else:
+            pending_reviews = supabase.table('review_sessions').select('id', count='exact').eq('user_id', current_user['id']).lte('next_review', 'now()').eq('is_completed', False).execute()
+
+            pending_count = pending_reviews.count if pending_reviews.count else 0
         
         return jsonify({
             'period_stats': {
@@ -340,6 +348,7 @@ def get_goals_progress():
 
 @statistics_bp.route('/log-session', methods=['POST'])
 @require_auth
+@invalidates('study_statistics')
 def log_study_session():
     """Registra o tempo de uma sessão de estudo."""
     try:
@@ -361,7 +370,7 @@ def log_study_session():
         return jsonify({'message': 'Sessão de estudo registrada com sucesso'}), 200
 
     except Exception as e:
-        print(f"ERRO AO REGISTRAR SESSÃO DE ESTUDO: {e}")
+        logger.exception('Erro ao registrar sessão de estudo: %s', e)
         return jsonify({'error': f'Erro interno: {str(e)}'}), 500
     
 
@@ -383,7 +392,7 @@ def get_subject_performance_ranking():
             return jsonify({'ranking': []}), 200
             
     except Exception as e:
-        print(f"ERRO AO OBTER RANKING DE MATÉRIAS: {e}")
+        logger.exception('Erro ao obter ranking de matérias: %s', e)
         return jsonify({'error': f'Erro interno: {str(e)}'}), 500
 
 
@@ -405,5 +414,5 @@ def get_hourly_activity():
             return jsonify({'hourly_activity': []}), 200
 
     except Exception as e:
-        print(f"ERRO AO OBTER ATIVIDADE POR HORA: {e}")
+        logger.exception('Erro ao obter atividade por hora: %s', e)
         return jsonify({'error': f'Erro interno: {str(e)}'}), 500
\ No newline at end of file
@@ -0,0 +1,173 @@
+"""
+Fila de estudo unificada: revisões de resumos e de flashcards em uma só lista
+"""
+import heapq
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
+
+from flask import Blueprint, request, jsonify, current_app
+from src.config.database import get_supabase_client
+from src.utils.auth import require_auth, get_current_user
+from src.utils.review_queries import pending_due_total
+
+study_queue_bp = Blueprint('study_queue', __name__)
+
+# Projeções compactas; `!inner` faz os filtros nas tabelas relacionadas
+# (deleted_at, subject_id) restringirem as sessões, e não só o embed
+SUMMARY_QUEUE_SELECT = (
+    'id, summary_id, next_review, '
+    'summaries!inner (title, subject_id, incidence_weight, subjects (name, color, incidence_weight))'
+)
+FLASHCARD_QUEUE_SELECT = (
+    'id, flashcard_id, next_review, '
+    'flashcards!inner (question, deck_id, '
+    'flashcard_decks!inner (name, subject_id, subjects (name, color, incidence_weight)))'
+)
+
+
+def _weight(*values):
+    """Primeiro incidence_weight preenchido (1.0 se nenhum)."""
+    for value in values:
+        if value is not None:
+            try:
+                return float(value)
+            except (TypeError, ValueError):
+                continue
+    return 1.0
+
+
+def _summary_item(row):
+    summary = row.get('summaries') or {}
+    subject = summary.get('subjects') or {}
+    return {
+        'kind': 'summary',
+        'id': row['id'],
+        'summary_id': row['summary_id'],
+        'title': summary.get('title'),
+        'subject_id': summary.get('subject_id'),
+        'subject_name': subject.get('name'),
+        'subject_color': subject.get('color'),
+        'incidence_weight': _weight(summary.get('incidence_weight'), subject.get('incidence_weight')),
+        'next_review': row['next_review'],
+    }
+
+
+def _flashcard_item(row):
+    flashcard = row.get('flashcards') or {}
+    deck = flashcard.get('flashcard_decks') or {}
+    subject = deck.get('subjects') or {}
+    return {
+        'kind': 'flashcard',
+        'id': row['id'],
+        'flashcard_id': row['flashcard_id'],
+        'title': flashcard.get('question'),
+        'deck_id': flashcard.get('deck_id'),
+        'deck_name': deck.get('name'),
+        'subject_id': deck.get('subject_id'),
+        'subject_name': subject.get('name'),
+        'subject_color': subject.get('color'),
+        'incidence_weight': _weight(subject.get('incidence_weight')),
+        'next_review': row['next_review'],
+    }
+
+
+def _queue_order(item):
+    # Dia de vencimento primeiro; no mesmo dia, o maior peso de incidência
+    return (str(item['next_review'])[:10], -item['incidence_weight'], str(item['next_review']), item['id'])
+
+
+def _fetch_summaries(supabase, user_id, subject_ids, limit):
+    query = (
+        supabase.table('review_sessions')
+        .select(SUMMARY_QUEUE_SELECT)
+        .eq('user_id', user_id)
+        .eq('is_completed', False)
+        .lte('next_review', 'now()')
+        .is_('summaries.deleted_at', None)
+    )
+    if subject_ids:
+        query = query.in_('summaries.subject_id', subject_ids)
+    rows = query.order('next_review').limit(limit).execute().data or []
+    return [_summary_item(row) for row in rows]
+
+
+def _fetch_flashcards(supabase, user_id, subject_ids, limit):
+    query = (
+        supabase.table('flashcard_review_sessions')
+        .select(FLASHCARD_QUEUE_SELECT)
+        .eq('user_id', user_id)
+        .eq('is_completed', False)
+        .lte('next_review', 'now()')
+        .is_('flashcards.deleted_at', None)
+    )
+    if subject_ids:
+        query = query.in_('flashcards.flashcard_decks.subject_id', subject_ids)
+    rows = query.order('next_review').limit(limit).execute().data or []
+    return [_flashcard_item(row) for row in rows]
+
+
+QUEUE_FETCHERS = {
+    'summary': _fetch_summaries,
+    'flashcard': _fetch_flashcards,
+}
+
+
+@study_queue_bp.route('', methods=['GET'])
+@require_auth
+def get_study_queue():
+    """
+    Revisões vencidas de resumos e de flashcards em uma única lista compacta.
+
+    As duas consultas rodam em paralelo, cada uma com os `limit` itens mais
+    antigos do seu tipo, e as listas são intercaladas pelo dia de vencimento
+    e, dentro do mesmo dia, pelo `incidence_weight` (maior primeiro).
+
+    Query string:
+        limit: tamanho da fila (padrão STUDY_QUEUE_DEFAULT_LIMIT, máximo STUDY_QUEUE_MAX_LIMIT).
+        subject_id: filtra por matéria; pode ser repetido.
+        kind: 'summary' ou 'flashcard' para só um dos tipos.
+    """
+    try:
+        current_user = get_current_user()
+        supabase = get_supabase_client()
+
+        max_limit = current_app.config.get('STUDY_QUEUE_MAX_LIMIT', 500)
+        try:
+            limit = int(request.args.get('limit', current_app.config.get('STUDY_QUEUE_DEFAULT_LIMIT', 50)))
+        except ValueError:
+            return jsonify({'error': 'limit deve ser um número inteiro'}), 400
+        limit = max(1, min(limit, max_limit))
+
+        kinds = request.args.getlist('kind') or list(QUEUE_FETCHERS)
+        invalid = [kind for kind in kinds if kind not in QUEUE_FETCHERS]
+        if invalid:
+            return jsonify({'error': f'kind deve ser um de: {", ".join(QUEUE_FETCHERS)}'}), 400
+
+        subject_ids = [
+            subject_id for value in request.args.getlist('subject_id')
+            for subject_id in value.split(',') if subject_id
+        ]
+
+        if not subject_ids:
+            # Sem filtro, o índice em memória já diz quais tipos não têm nada vencido
+            kinds = [kind for kind in kinds if pending_due_total(supabase, current_user['id'], kind) != 0]
+
+        queues = {}
+        if kinds:
+            with ThreadPoolExecutor(max_workers=len(kinds)) as executor:
+                futures = {
+                    kind: executor.submit(QUEUE_FETCHERS[kind], supabase, current_user['id'], subject_ids, limit)
+                    for kind in kinds
+                }
+                queues = {kind: future.result() for kind, future in futures.items()}
+
+        items = heapq.nsmallest(limit, chain.from_iterable(queues.values()), key=_queue_order)
+
+        return jsonify({
+            'items': items,
+            'counts': {kind: sum(1 for item in items if item['kind'] == kind) for kind in QUEUE_FETCHERS},
+            'limit': limit,
+        }), 200
+
+    except Exception as e:
+        return jsonify({'error': f'Erro interno: {str(e)}'}), 500
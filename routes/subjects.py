@@ -1,16 +1,20 @@
 """
 Rotas para gerenciamento de matérias
 """
+import logging
 from flask import Blueprint, request, jsonify
 from src.config.database import get_supabase_client
 from src.utils.auth import require_auth, get_current_user
+from src.utils.conditional import conditional_get, invalidates
 import uuid
 import json
 
 subjects_bp = Blueprint('subjects', __name__)
+logger = logging.getLogger(__name__)
 
 @subjects_bp.route('', methods=['GET'])
 @require_auth
+@conditional_get(['subjects'])
 def get_subjects():
     """Listar matérias do usuário"""
     try:
@@ -36,6 +40,7 @@ def get_subjects():
 
 @subjects_bp.route('', methods=['POST'])
 @require_auth
+@invalidates('subjects')
 def create_subject():
     """Criar nova matéria"""
     try:
@@ -82,8 +87,7 @@ def create_subject():
         }), 201
             
     except Exception as e:
-        # Adiciona um log mais detalhado no console do backend
-        print(f"ERRO CRÍTICO EM create_subject: {str(e)}")
+        logger.exception('Erro crítico em create_subject: %s', e)
         return jsonify({'error': f'Erro interno do servidor: {str(e)}'}), 500
 
 @subjects_bp.route('/<subject_id>', methods=['GET'])
@@ -125,6 +129,7 @@ def get_subject(subject_id):
 
 @subjects_bp.route('/<subject_id>', methods=['PUT'])
 @require_auth
+@invalidates('subjects')
 def update_subject(subject_id):
     """Atualizar matéria"""
     try:
@@ -177,6 +182,7 @@ def update_subject(subject_id):
 
 @subjects_bp.route('/<subject_id>', methods=['DELETE'])
 @require_auth
+@invalidates('subjects', 'summaries')
 def delete_subject(subject_id):
     """Deletar matéria e todos os seus descendentes (soft delete) usando RPC."""
     try:
@@ -198,7 +204,7 @@ def delete_subject(subject_id):
         return jsonify({'message': 'Matéria e seus conteúdos foram movidos para a lixeira.'}), 200
         
     except Exception as e:
-        print(f"ERRO AO DELETAR MATÉRIA: {e}")
+        logger.exception('Erro ao deletar matéria: %s', e)
         return jsonify({'error': f'Erro interno: {str(e)}'}), 500
 
 
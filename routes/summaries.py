@@ -3,15 +3,20 @@
 """
 Rotas para gerenciamento de resumos
 """
+import logging
 from flask import Blueprint, request, jsonify
 from src.config.database import get_supabase_client
 from src.config.perplexity import get_perplexity_client
 from src.utils.auth import require_auth, get_current_user
+from src.utils.conditional import conditional_get, invalidates
+from src.utils.due_queue import resets_due_queue
+from src.utils.sse import sse_response, wants_event_stream
 import uuid
 import json
 from datetime import datetime, timedelta # <-- CORREÇÃO: Import adicionado
 
 summaries_bp = Blueprint('summaries', __name__)
+logger = logging.getLogger(__name__)
 
 @summaries_bp.route('', methods=['GET'])
 @require_auth
@@ -88,7 +93,7 @@ def get_summaries():
         }), 200
         
     except Exception as e:
-        print(f"ERRO EM get_summaries: {str(e)}") # Adiciona um log mais claro
+        logger.exception('Erro em get_summaries: %s', e)
         return jsonify({'error': f'Erro interno do servidor: {str(e)}'}), 500
     
 @summaries_bp.route('/generate', methods=['POST'])
@@ -106,10 +111,16 @@ def generate_summary():
         # <-- ADICIONE ESTA LINHA -->
         # Pega o estilo do prompt da requisição, ou usa 'default' se não for enviado.
         prompt_style = data.get('prompt_style', 'default')
+        no_cache = bool(data.get('no_cache', False))
         
         perplexity = get_perplexity_client()
+
+        # Modo streaming: envia os tokens via SSE e os metadados no evento final 'done'
+        if wants_event_stream(data):
+            return sse_response(perplexity.generate_summary_stream(query, model, prompt_style=prompt_style, no_cache=no_cache))
+
         # <-- MODIFIQUE ESTA LINHA para passar o novo parâmetro -->
-        result = perplexity.generate_summary(query, model, prompt_style=prompt_style)
+        result = perplexity.generate_summary(query, model, prompt_style=prompt_style, no_cache=no_cache)
         
         if not result['success']:
             return jsonify({'error': f'Erro ao gerar resumo: {result.get("error", "Erro desconhecido")}'}), 500
@@ -140,6 +151,8 @@ def generate_summary():
 
 @summaries_bp.route('', methods=['POST'])
 @require_auth
+@invalidates('summaries', 'review_sessions')
+@resets_due_queue
 def create_summary():
     """Criar novo resumo (agora aceita um ID opcional do cliente)"""
     try:
@@ -213,17 +226,16 @@ def create_summary():
                 'summary': summary
             }), 201
         else:
-            # Adicione um print para ver a resposta de erro do Supabase
-            print(f"ERRO AO CRIAR RESUMO (SUPABASE): {response.error}")
+            logger.error('Erro do Supabase ao criar resumo: %s', response.error)
             return jsonify({'error': 'Erro ao criar resumo'}), 400
             
     except Exception as e:
-        # Adicione um print para ver o erro detalhado no console do Flask
-        print(f"ERRO INTERNO AO CRIAR RESUMO: {e}")
+        logger.exception('Erro interno ao criar resumo: %s', e)
         return jsonify({'error': f'Erro interno: {str(e)}'}), 500
 
 @summaries_bp.route('/<summary_id>', methods=['GET'])
 @require_auth
+@conditional_get(['summaries', 'subjects', 'review_sessions'])
 def get_summary(summary_id):
     """Obter resumo específico"""
     try:
@@ -249,6 +261,7 @@ def get_summary(summary_id):
 
 @summaries_bp.route('/<summary_id>', methods=['PUT'])
 @require_auth
+@invalidates('summaries')
 def update_summary(summary_id):
     """Atualizar resumo"""
     try:
@@ -289,6 +302,8 @@ def update_summary(summary_id):
 
 @summaries_bp.route('/<summary_id>', methods=['DELETE'])
 @require_auth
+@invalidates('summaries', 'review_sessions')
+@resets_due_queue
 def delete_summary(summary_id):
     """Deletar resumo"""
     try:
@@ -352,6 +367,7 @@ def process_image():
 
 @summaries_bp.route('/<summary_id>/log-free-rev', methods=['POST'])
 @require_auth
+@invalidates('summaries')
 def log_free_review(summary_id):
     """Incrementa o contador de revisões livres para um resumo."""
     try:
@@ -1,99 +1,164 @@
 """
 Rotas para sincronização de dados offline-first.
 """
-import re
+import hashlib
 import json
-from flask import Blueprint, request, jsonify, Response
+import logging
+from flask import Blueprint, request, jsonify, Response, current_app, stream_with_context
 
 from src.config.database import get_supabase_client
 from src.utils.auth import require_auth, get_current_user
+from src.utils.due_queue import apply_review_rows, get_due_index
+from src.utils.conditional import conditional_get, invalidate_validators
+from src.utils.payload_transcoder import transcode_payload
+from src.utils.idempotency import BATCH_IN_PROGRESS, BATCH_MISMATCH, BATCH_REPLAY, get_sync_idempotency_store
+from src.utils.pagination import apply_keyset, decode_cursor, page_result, parse_fields
+from src.utils.compression import available_encodings, compress_response, decompress_request, get_compression_stats
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone # <-- Certifique-se de que timezone está importado
 from datetime import date, datetime
 
 
 
 sync_bp = Blueprint('sync', __name__)
+logger = logging.getLogger(__name__)
 
-def camel_to_snake(name):
-    s1 = re.sub('(.)([A-Z][a-z]+)', r'\1_\2', name)
-    return re.sub('([a-z0-9])([A-Z])', r'\1_\2', s1).lower()
 
-# --- INÍCIO DA NOVA LÓGICA DE CONVERSÃO CORRIGIDA ---
-def convert_value(value):
-    """Tenta converter um valor de timestamp em milissegundos para string ISO 8601."""
-    # Verifica se o valor é um inteiro ou float e se parece um timestamp em ms (maior que o ano 2001)
-    if isinstance(value, (int, float)) and value > 1000000000000:
-        try:
-            # Converte de milissegundos para segundos, cria o objeto datetime com fuso horário UTC
-            # e formata para a string ISO 8601 que o Supabase/PostgreSQL entende.
-            return datetime.fromtimestamp(value / 1000, tz=timezone.utc).isoformat()
-        except (ValueError, TypeError):
-            # Se a conversão falhar por qualquer motivo, retorna o valor original sem quebrar.
-            return value
-    return value
-
-def convert_payload(data):
+SYNC_DELTA_MAX_LIMIT = 1000
+
+# Tabelas "pai" são gravadas antes das que as referenciam, já que o lote é
+# reagrupado por tabela e deixa de seguir a ordem original das mudanças.
+SYNC_TABLE_ORDER = [
+    'subjects', 'summaries', 'study_decks', 'deck_summaries',
+    'flashcard_decks', 'flashcards', 'exercises',
+]
+
+
+# Tabelas cujas linhas alimentam o índice de vencimentos (utils/due_queue.py)
+SYNC_DUE_QUEUE_KINDS = {
+    'review_sessions': 'summary',
+    'flashcard_review_sessions': 'flashcard',
+}
+
+
+def _row_identity(payload):
+    """Chave de conflito da linha: o `id` ou, em tabelas de junção, o conjunto de colunas *_id."""
+    if payload.get('id') is not None:
+        return payload['id']
+    return tuple(sorted((k, str(v)) for k, v in payload.items() if k.endswith('_id')))
+
+
+def _chunk_entries(entries, chunk_size):
     """
-    Converte recursivamente as chaves do payload para snake_case e os
-    valores de timestamp em milissegundos para strings ISO 8601.
+    Divide as linhas de um grupo em blocos de até `chunk_size`. Uma linha repetida
+    no mesmo bloco abre um novo bloco, pois o Postgres não atualiza a mesma linha
+    duas vezes em um único upsert; assim a mudança mais recente continua vencendo.
     """
-    if isinstance(data, dict):
-        new_dict = {}
-        for k, v in data.items():
-            new_key = camel_to_snake(k)
-            # A conversão de valor é aplicada dentro da chamada recursiva
-            new_value = convert_payload(v)
-            new_dict[new_key] = new_value
-        return new_dict
-    if isinstance(data, list):
-        return [convert_payload(i) for i in data]
-    
-    # Aplica a conversão de valor para itens que não são dicionários ou listas
-    return convert_value(data)
-# --- FIM DA NOVA LÓGICA DE CONVERSÃO CORRIGIDA ---
-
+    chunk, seen = [], set()
+    for entry in entries:
+        identity = _row_identity(entry['payload'])
+        if len(chunk) >= chunk_size or identity in seen:
+            yield chunk
+            chunk, seen = [], set()
+        chunk.append(entry)
+        seen.add(identity)
+    if chunk:
+        yield chunk
+
+
+def _upsert_single(supabase, table_name, entry):
+    """Grava uma única linha (usado como fallback quando o bloco inteiro falha)."""
+    try:
+        response = supabase.table(table_name).upsert(entry['payload']).execute()
+        if hasattr(response, 'error') and response.error is not None:
+            logger.warning('Erro do Supabase no upsert em %s: %s', table_name, response.error.message)
+            return {'row_id': entry['row_id'], 'status': 'failed', 'error': response.error.message}
+        if not getattr(response, 'data', None):
+            logger.warning('Upsert em %s sem retorno de dados (possível falha de RLS)', table_name)
+            return {'row_id': entry['row_id'], 'status': 'failed', 'error': 'Falha ao gravar, verifique as permissões (RLS).'}
+        return {'row_id': entry['row_id'], 'status': 'success'}
+    except Exception as e:
+        logger.warning('Falha no upsert em %s: %s', table_name, e)
+        return {'row_id': entry['row_id'], 'status': 'failed', 'error': str(e)}
 
-sync_bp = Blueprint('sync', __name__)
 
-def camel_to_snake(name):
-    s1 = re.sub('(.)([A-Z][a-z]+)', r'\1_\2', name)
-    return re.sub('([a-z0-9])([A-Z])', r'\1_\2', s1).lower()
+def _upsert_chunk(supabase, table_name, chunk):
+    """
+    Envia um bloco de linhas em um único upsert e devolve {índice da mudança: resultado}.
+    Se o bloco falhar, cada linha é repetida individualmente para isolar as que têm erro.
+    """
+    try:
+        response = supabase.table(table_name).upsert([entry['payload'] for entry in chunk]).execute()
+        error = response.error.message if getattr(response, 'error', None) is not None else None
+    except Exception as e:
+        error = str(e)
+
+    if error is not None:
+        logger.warning('Falha no bloco de %d linhas em %s (%s); repetindo linha a linha', len(chunk), table_name, error)
+        return {entry['index']: _upsert_single(supabase, table_name, entry) for entry in chunk}
+
+    returned = response.data or []
+    returned_ids = {row.get('id') for row in returned if isinstance(row, dict)}
+    outcome = {}
+    for entry in chunk:
+        row_key = entry['payload'].get('id')
+        # Sem `id` (tabelas de junção) só dá para conferir pela quantidade de linhas retornadas
+        written = row_key in returned_ids if row_key is not None else len(returned) >= len(chunk)
+        if written:
+            outcome[entry['index']] = {'row_id': entry['row_id'], 'status': 'success'}
+        else:
+            outcome[entry['index']] = {
+                'row_id': entry['row_id'],
+                'status': 'failed',
+                'error': 'Falha ao gravar, verifique as permissões (RLS).'
+            }
+    return outcome
 
-# --- INÍCIO DA NOVA LÓGICA DE CONVERSÃO CORRIGIDA ---
-def convert_value(value):
-    """Tenta converter um valor de timestamp em milissegundos para string ISO 8601."""
-    if isinstance(value, (int, float)) and value > 1000000000000:
-        try:
-            return datetime.fromtimestamp(value / 1000, tz=timezone.utc).isoformat()
-        except (ValueError, TypeError):
-            return value
-    return value
 
-def convert_payload(data):
+def _apply_study_statistics(supabase, user_id, stats_date, entries):
     """
-    Converte recursivamente as chaves do payload para snake_case e os
-    valores de timestamp em milissegundos para strings ISO 8601.
+    Soma os incrementos de `study_statistics` de um mesmo dia e os aplica com uma
+    única chamada a `update_study_statistics`. O resultado (sucesso ou falha) é
+    replicado para cada mudança original.
     """
-    if isinstance(data, dict):
-        new_dict = {}
-        for k, v in data.items():
-            new_key = camel_to_snake(k)
-            new_value = convert_payload(v)
-            new_dict[new_key] = new_value
-        return new_dict
-    if isinstance(data, list):
-        return [convert_payload(i) for i in data]
-    
-    return convert_value(data)
-# --- FIM DA NOVA LÓGICA DE CONVERSÃO CORRIGIDA ---
+    rpc_params = {
+        'user_uuid': user_id,
+        'summaries_created_count': sum(entry['payload'].get('summaries_created', 0) or 0 for entry in entries),
+        'summaries_reviewed_count': sum(entry['payload'].get('summaries_reviewed', 0) or 0 for entry in entries),
+        'total_study_time_ms_add': sum(entry['payload'].get('total_study_time_ms', 0) or 0 for entry in entries),
+    }
+    logger.debug('RPC update_study_statistics: dia=%s, mudanças agregadas=%d', stats_date, len(entries))
+    try:
+        response = supabase.rpc('update_study_statistics', rpc_params).execute()
+        error = response.error.message if getattr(response, 'error', None) is not None else None
+    except Exception as e:
+        error = str(e)
+
+    if error is not None:
+        logger.warning('Erro do Supabase na RPC update_study_statistics: %s', error)
+        return {entry['index']: {'row_id': entry['row_id'], 'status': 'failed', 'error': error} for entry in entries}
+    return {entry['index']: {'row_id': entry['row_id'], 'status': 'success'} for entry in entries}
 
 
 @sync_bp.route('/batch', methods=['POST'])
 @require_auth
+@decompress_request
+@compress_response
 def sync_batch_changes():
     """
     Processa um lote de mudanças vindas do cliente (offline-first).
+
+    As mudanças são agrupadas por tabela e operação (e pelo conjunto de colunas,
+    já que o upsert em lote exige linhas homogêneas) e cada grupo é enviado em
+    upserts de até SYNC_UPSERT_CHUNK_SIZE linhas. Os incrementos de
+    `study_statistics` são somados por dia e aplicados com uma RPC por dia.
+    `results` mantém a ordem e o `row_id` de cada mudança recebida.
+
+    Reenvios: mudanças com `change_id` já aplicado (antes ou no próprio lote) são
+    respondidas do registro de idempotência sem tocar no Supabase, e um lote
+    repetido com o mesmo header `Idempotency-Key` recebe a resposta original.
     """
+    idempotency_key = None
     try:
         changes = request.get_json()
         if not isinstance(changes, list):
@@ -101,26 +166,72 @@ def sync_batch_changes():
 
         supabase = get_supabase_client()
         current_user = get_current_user()
-        results = []
-
-        print(f"\n--- [SYNC] Iniciando /batch para o usuário: {current_user['id']} ---")
-        print(f"--- [SYNC] Recebidas {len(changes)} alterações.")
-
-        for change in changes:
+        idempotency_store = get_sync_idempotency_store()
+
+        idempotency_key = request.headers.get('Idempotency-Key')
+        if idempotency_key:
+            fingerprint = hashlib.sha256(request.get_data()).hexdigest()
+            state, cached_body = idempotency_store.begin_batch(current_user['id'], idempotency_key, fingerprint)
+            if state == BATCH_REPLAY:
+                logger.info('Lote repetido (Idempotency-Key=%s); devolvendo a resposta original', idempotency_key)
+                response = jsonify(cached_body)
+                response.headers['Idempotent-Replayed'] = 'true'
+                return response, 200
+            if state == BATCH_IN_PROGRESS:
+                idempotency_key = None
+                return jsonify({'error': 'Um lote com esta Idempotency-Key ainda está sendo processado'}), 409
+            if state == BATCH_MISMATCH:
+                idempotency_key = None
+                return jsonify({'error': 'Idempotency-Key já usada com um lote diferente'}), 422
+
+        chunk_size = max(1, current_app.config.get('SYNC_UPSERT_CHUNK_SIZE', 200))
+        results = [None] * len(changes)
+        groups = {}
+        # Grupo aberto por (tabela, operação, colunas) e grupo da última mudança de cada linha
+        open_groups = {}
+        row_groups = {}
+        stats_groups = {}
+        # Primeira posição de cada change_id no lote; repetições usam o resultado dela
+        first_by_change_id = {}
+        duplicates = []
+        now_iso = datetime.now(timezone.utc).isoformat()
+
+        logger.debug('Iniciando /batch para o usuário %s com %d alterações', current_user['id'], len(changes))
+
+        for index, change in enumerate(changes):
             table_name = change.get('table')
             operation = change.get('op')
             payload_from_client = change.get('payload')
 
+            change_id = change.get('change_id')
+            if change_id:
+                applied = idempotency_store.get_change(current_user['id'], change_id)
+                if applied is not None:
+                    results[index] = {**applied, 'row_id': change.get('row_id'), 'replayed': True}
+                    continue
+                if change_id in first_by_change_id:
+                    duplicates.append((index, first_by_change_id[change_id]))
+                    continue
+                first_by_change_id[change_id] = index
+
             if not all([table_name, operation, payload_from_client]):
-                results.append({
+                results[index] = {
                     'row_id': change.get('row_id'),
                     'status': 'failed',
                     'error': 'Dados incompletos'
-                })
+                }
+                continue
+
+            if operation != 'upsert':
+                results[index] = {
+                    'row_id': change.get('row_id'),
+                    'status': 'skipped',
+                    'error': f'Operação "{operation}" não suportada'
+                }
                 continue
 
             try:
-                converted_payload = convert_payload(payload_from_client)
+                converted_payload = transcode_payload(table_name, payload_from_client)
                 
                 # --- INÍCIO DA CORREÇÃO ---
                 # Adiciona o user_id apenas se a tabela não for uma tabela de junção
@@ -130,131 +241,320 @@ def sync_batch_changes():
                 # --- FIM DA CORREÇÃO ---
 
                 if table_name not in ['study_logs', 'study_statistics']:
-                    converted_payload['updated_at'] = datetime.now(timezone.utc).isoformat()
-
-                print(f"--- [SYNC] Processando: op={operation}, table={table_name}")
-                print(f"--- [SYNC] PAYLOAD FINAL PARA SUPABASE: {converted_payload}")
-
-                if operation == 'upsert':
-                    if table_name == 'study_statistics':
-                        rpc_params = {
-                            'user_uuid': current_user['id'],
-                            'summaries_created_count': converted_payload.get('summaries_created', 0),
-                            'summaries_reviewed_count': converted_payload.get('summaries_reviewed', 0),
-                            'total_study_time_ms_add': converted_payload.get('total_study_time_ms', 0),
-                        }
-                        response = supabase.rpc('update_study_statistics', rpc_params).execute()
-
-                        if hasattr(response, 'error') and response.error is not None:
-                            print(f"--- [SYNC] !!! ERRO SUPABASE (RPC): {response.error.message}")
-                            results.append({
-                                'row_id': change.get('row_id'),
-                                'status': 'failed',
-                                'error': response.error.message
-                            })
-                        else:
-                            print(f"--- [SYNC] SUCESSO (RPC).")
-                            results.append({'row_id': change.get('row_id'), 'status': 'success'})
-
-                    else:
-                        response = supabase.table(table_name).upsert(converted_payload).execute()
-
-                        if hasattr(response, 'error') and response.error is not None:
-                            print(f"--- [SYNC] !!! ERRO SUPABASE: {response.error.message}")
-                            results.append({
-                                'row_id': change.get('row_id'),
-                                'status': 'failed',
-                                'error': response.error.message
-                            })
-                        elif not getattr(response, 'data', None):
-                            print(f"--- [SYNC] !!! AVISO: Operação sem retorno de dados. Possível falha de RLS.")
-                            results.append({
-                                'row_id': change.get('row_id'),
-                                'status': 'failed',
-                                'error': 'Falha ao gravar, verifique as permissões (RLS).'
-                            })
-                        else:
-                            print(f"--- [SYNC] SUCESSO. Resposta: {response.data}")
-                            results.append({'row_id': change.get('row_id'), 'status': 'success'})
-
-                else:
-                    results.append({
+                    converted_payload['updated_at'] = now_iso
+
+                if table_name == 'study_statistics':
+                    # Agregado por dia e enviado em uma única RPC depois do laço
+                    stats_date = str(converted_payload.get('date') or '')[:10] or None
+                    stats_groups.setdefault((current_user['id'], stats_date), []).append({
+                        'index': index,
                         'row_id': change.get('row_id'),
-                        'status': 'skipped',
-                        'error': f'Operação "{operation}" não suportada'
+                        'payload': converted_payload
                     })
+                    continue
+
+                # Uma linha já presente em um grupo criado depois do grupo aberto
+                # para estas colunas abre um novo grupo: os grupos de uma tabela são
+                # gravados na ordem de criação e a última mudança continua vencendo
+                columns_key = (table_name, operation, frozenset(converted_payload))
+                row_key = (table_name, _row_identity(converted_payload))
+                group_key = open_groups.get(columns_key)
+                if group_key is None or group_key[-1] < row_groups.get(row_key, -1):
+                    group_key = columns_key + (len(groups),)
+                    open_groups[columns_key] = group_key
+                row_groups[row_key] = group_key[-1]
+                groups.setdefault(group_key, []).append({
+                    'index': index,
+                    'row_id': change.get('row_id'),
+                    'payload': converted_payload
+                })
 
             except Exception as e:
-                print(f"--- [SYNC] !!! EXCEÇÃO PYTHON: {e}")
-                results.append({
+                logger.warning('Falha ao preparar a mudança %d (%s): %s', index, table_name, e)
+                results[index] = {
                     'row_id': change.get('row_id'),
                     'status': 'failed',
                     'error': str(e)
-                })
-
-        print("--- [SYNC] Fim do processamento /batch ---\n")
-        return jsonify({'message': 'Lote processado', 'results': results}), 200
+                }
+
+        for (user_id, stats_date), entries in stats_groups.items():
+            for index, result in _apply_study_statistics(supabase, user_id, stats_date, entries).items():
+                results[index] = result
+
+        def table_rank(group_key):
+            table_name = group_key[0]
+            return SYNC_TABLE_ORDER.index(table_name) if table_name in SYNC_TABLE_ORDER else len(SYNC_TABLE_ORDER)
+
+        # `sorted` é estável: tabelas fora de SYNC_TABLE_ORDER seguem a ordem de chegada
+        for group_key in sorted(groups, key=table_rank):
+            table_name = group_key[0]
+            entries = groups[group_key]
+            logger.debug('Upsert em lote: table=%s, linhas=%d', table_name, len(entries))
+            for chunk in _chunk_entries(entries, chunk_size):
+                for index, result in _upsert_chunk(supabase, table_name, chunk).items():
+                    results[index] = result
+            if table_name in SYNC_DUE_QUEUE_KINDS:
+                # Sessões de revisão sincronizadas atualizam o índice de vencimentos
+                apply_review_rows(current_user['id'], SYNC_DUE_QUEUE_KINDS[table_name], [
+                    entry['payload'] for entry in entries if results[entry['index']]['status'] == 'success'
+                ])
+
+        for index, first_index in duplicates:
+            results[index] = {**results[first_index], 'row_id': changes[index].get('row_id'), 'replayed': True}
+
+        # Os ETags das tabelas alteradas deixam de valer
+        touched_tables = {change.get('table') for change in changes if change.get('table')}
+        invalidate_validators(current_user['id'], touched_tables)
+        if touched_tables & {'summaries', 'flashcards'}:
+            # Resumos e flashcards novos ganham sessões de revisão no banco
+            due_index = get_due_index()
+            if due_index is not None:
+                due_index.invalidate(current_user['id'])
+
+        # Só mudanças com resultado definitivo são registradas; falhas podem ser reenviadas
+        for change, result in zip(changes, results):
+            change_id = change.get('change_id')
+            if change_id and result['status'] in ('success', 'skipped') and not result.get('replayed'):
+                idempotency_store.record_change(current_user['id'], change_id, result)
+
+        body = {'message': 'Lote processado', 'results': results}
+        if idempotency_key:
+            idempotency_store.finish_batch(current_user['id'], idempotency_key, fingerprint, body)
+
+        logger.info('/batch processado: %d alterações', len(changes))
+        return jsonify(body), 200
 
     except Exception as e:
-        print(f"ERRO CRÍTICO NO /api/sync/batch: {e}")
+        logger.exception('Erro crítico no /api/sync/batch: %s', e)
+        if idempotency_key:
+            get_sync_idempotency_store().abort_batch(get_current_user()['id'], idempotency_key)
         return jsonify({'error': f'Erro interno do servidor: {e}'}), 500
 
-# O endpoint /delta permanece o mesmo
+# Tabelas que o cliente pode baixar pelo /delta
+SYNC_DELTA_TABLES = [
+    'subjects', 'summaries', 'review_sessions', 'study_decks', 
+    'deck_summaries', 'study_statistics', 'flashcard_decks', 'flashcards', 'flashcard_review_sessions', 'exercises', 'exercise_sessions'
+]
+
+
+def _fetch_delta_page(supabase, user_id, table_name, since=None, cursor=None, limit=100, offset=None, fields=None):
+    """
+    Busca uma página de linhas alteradas de `table_name`, ordenadas por (updated_at, id).
+
+    Com `offset` usa a paginação antiga por posição; caso contrário usa o cursor.
+    Em ambos os casos devolve (itens, next_cursor, has_more).
+
+    Raises:
+        ValueError: cursor ou lista de campos inválidos.
+    """
+    columns = parse_fields(fields, required=('id', 'updated_at'))
+    select = ', '.join(columns) if columns else '*'
+
+    if table_name == 'deck_summaries':
+        # A query para tabelas de junção precisa de um join para filtrar pelo user_id
+        query = supabase.table(table_name).select(f'{select}, study_decks!inner(user_id)') \
+            .eq('study_decks.user_id', user_id)
+    else:
+        query = supabase.table(table_name).select(select).eq('user_id', user_id)
+
+    if since:
+        query = query.gte('updated_at', since)
+
+    # Uma linha a mais indica se existe próxima página
+    if offset is not None:
+        query = apply_keyset(query, None).range(offset, offset + limit)
+    else:
+        query = apply_keyset(query, cursor).limit(limit + 1)
+
+    response = query.execute()
+    return page_result(response.data or [], limit)
+
+
+def _ndjson_delta_response(supabase, user_id, table_name, since, cursor, fields, server_now):
+    """
+    Transmite todas as linhas alteradas como NDJSON, buscando-as internamente em
+    páginas de SYNC_NDJSON_PAGE_SIZE; a memória usada não depende do tamanho da
+    tabela. A última linha é o trailer com `server_timestamp`, `next_cursor` e
+    `count` (ou `error`, se a transmissão falhar no meio).
+    """
+    page_size = current_app.config.get('SYNC_NDJSON_PAGE_SIZE', 500)
+
+    def generate():
+        next_cursor, count = cursor, 0
+        trailer = {'trailer': True, 'server_timestamp': server_now}
+        try:
+            while True:
+                items, page_cursor, has_more = _fetch_delta_page(
+                    supabase, user_id, table_name,
+                    since=since, cursor=next_cursor, limit=page_size, fields=fields
+                )
+                for item in items:
+                    yield _sync_json(item) + '\n'
+                count += len(items)
+                next_cursor = page_cursor or next_cursor
+                if not has_more:
+                    break
+        except Exception as e:
+            logger.exception('Erro no stream NDJSON /api/sync/delta/%s: %s', table_name, e)
+            trailer['error'] = str(e)
+        trailer.update({'next_cursor': next_cursor, 'count': count})
+        yield _sync_json(trailer) + '\n'
+
+    response = Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+
 @sync_bp.route('/delta/<string:table_name>', methods=['GET'])
 @require_auth
+@conditional_get(lambda table_name: [table_name] if table_name in SYNC_DELTA_TABLES else [])
+@compress_response
 def sync_delta_changes(table_name):
+    """
+    Retorna as linhas de `table_name` alteradas desde `since`.
+
+    Paginação por cursor: envie o `next_cursor` da resposta anterior em `cursor`.
+    Clientes antigos podem continuar usando `offset`. `fields=a,b` restringe as
+    colunas retornadas (ex.: omitir `summaries.content`).
+
+    Com `format=ndjson` a tabela inteira é transmitida, uma linha JSON por registro.
+    """
     try:
         since_timestamp = request.args.get('since')
-        # --- INÍCIO DA MODIFICAÇÃO 1 ---
-        # Obter parâmetros de paginação da requisição, com valores padrão
-        limit = int(request.args.get('limit', 100)) # Padrão de 100 por página
-        offset = int(request.args.get('offset', 0))
-        # --- FIM DA MODIFICAÇÃO 1 ---
+        limit = max(1, min(int(request.args.get('limit', 100)), SYNC_DELTA_MAX_LIMIT)) # Padrão de 100 por página
+        offset = request.args.get('offset')
+        cursor = request.args.get('cursor')
         
         current_user = get_current_user()
         supabase = get_supabase_client()
 
-        allowed_tables = [
-            'subjects', 'summaries', 'review_sessions', 'study_decks', 
-            'deck_summaries', 'study_statistics', 'flashcard_decks', 'flashcards', 'flashcard_review_sessions', 'exercises', 'exercise_sessions'
-        ]
-        
-        if table_name not in allowed_tables:
+        if table_name not in SYNC_DELTA_TABLES:
             return jsonify({'error': f'Tabela "{table_name}" não permitida'}), 400
-        
-        if table_name == 'deck_summaries':
-            # A query para tabelas de junção precisa de um join para filtrar pelo user_id
-            query = supabase.table(table_name).select('*, study_decks!inner(user_id)') \
-                .eq('study_decks.user_id', current_user['id'])
-        else:
-            query = supabase.table(table_name).select('*').eq('user_id', current_user['id'])
-        
-        if since_timestamp:
-            query = query.gte('updated_at', since_timestamp)
-
-        # --- INÍCIO DA MODIFICAÇÃO 2 ---
-        # Aplicar paginação à consulta do Supabase
-        query = query.range(offset, offset + limit - 1)
-        # --- FIM DA MODIFICAÇÃO 2 ---
 
-        response = query.execute()
-        items = response.data if response.data else []
-        
+        # Capturado antes da consulta: o que for alterado durante ela entra no próximo `since`
         server_now = datetime.now(timezone.utc).isoformat()
+
+        if request.args.get('format') == 'ndjson':
+            try:
+                parse_fields(request.args.get('fields'))
+                if cursor:
+                    decode_cursor(cursor)
+            except ValueError as ve:
+                return jsonify({'error': str(ve)}), 400
+            return _ndjson_delta_response(
+                supabase, current_user['id'], table_name, since_timestamp, cursor,
+                request.args.get('fields'), server_now
+            )
+
+        try:
+            items, next_cursor, has_more = _fetch_delta_page(
+                supabase, current_user['id'], table_name,
+                since=since_timestamp,
+                cursor=cursor,
+                limit=limit,
+                offset=int(offset) if offset is not None and not cursor else None,
+                fields=request.args.get('fields')
+            )
+        except ValueError as ve:
+            return jsonify({'error': str(ve)}), 400
+
         payload = {
             'items': items,
-            'server_timestamp': server_now
+            'server_timestamp': server_now,
+            'next_cursor': next_cursor,
+            'has_more': has_more
         }
-        json_response = json.dumps(payload, default=json_converter)
-        return Response(json_response, mimetype='application/json')
+        return _sync_json_response(payload)
 
     except Exception as e:
-        print(f"ERRO CRÍTICO NO /api/sync/delta/{table_name}: {e}")
+        logger.exception('Erro crítico no /api/sync/delta/%s: %s', table_name, e)
         return jsonify({'error': f'Erro interno do servidor: {e}'}), 500
 
     
 
 
+def _parse_delta_spec(spec):
+    """
+    Normaliza o valor de uma tabela no corpo do POST /delta: um dicionário com
+    `cursor`/`since`/`fields`/`limit` ou uma string (cursor opaco ou timestamp `since`).
+    """
+    if isinstance(spec, dict):
+        return spec
+    if isinstance(spec, str) and spec:
+        try:
+            decode_cursor(spec)
+            return {'cursor': spec}
+        except ValueError:
+            return {'since': spec}
+    return {}
+
+
+@sync_bp.route('/delta', methods=['POST'])
+@require_auth
+@decompress_request
+@compress_response
+def sync_delta_multi():
+    """
+    Baixa as alterações de várias tabelas em uma única requisição.
+
+    Corpo: {"tables": {"summaries": {"cursor": "..."}, "subjects": "2024-01-01T00:00:00Z"}, "limit": 100}
+    As consultas rodam em paralelo e todas compartilham o mesmo `server_timestamp`.
+    """
+    try:
+        data = request.get_json() or {}
+        tables = data.get('tables')
+        if not isinstance(tables, dict) or not tables:
+            return jsonify({'error': 'O campo "tables" deve ser um objeto com ao menos uma tabela'}), 400
+
+        invalid = [table_name for table_name in tables if table_name not in SYNC_DELTA_TABLES]
+        if invalid:
+            return jsonify({'error': f'Tabelas não permitidas: {", ".join(invalid)}'}), 400
+
+        current_user = get_current_user()
+        supabase = get_supabase_client()
+        default_limit = data.get('limit', 100)
+
+        # Um único timestamp, capturado antes de todas as consultas, vale para todas as tabelas
+        server_now = datetime.now(timezone.utc).isoformat()
+
+        def fetch(table_name):
+            spec = _parse_delta_spec(tables[table_name])
+            try:
+                limit = max(1, min(int(spec.get('limit', default_limit)), SYNC_DELTA_MAX_LIMIT))
+                items, next_cursor, has_more = _fetch_delta_page(
+                    supabase, current_user['id'], table_name,
+                    since=spec.get('since'),
+                    cursor=spec.get('cursor'),
+                    limit=limit,
+                    fields=spec.get('fields')
+                )
+                return {'items': items, 'next_cursor': next_cursor, 'has_more': has_more}
+            except Exception as e:
+                logger.exception('Erro no /api/sync/delta (tabela %s): %s', table_name, e)
+                return {'error': str(e)}
+
+        max_workers = max(1, min(current_app.config.get('SYNC_DELTA_CONCURRENCY', 4), len(tables)))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = dict(zip(tables, executor.map(fetch, tables)))
+
+        payload = {
+            'tables': results,
+            'server_timestamp': server_now
+        }
+        return _sync_json_response(payload)
+
+    except Exception as e:
+        logger.exception('Erro crítico no /api/sync/delta: %s', e)
+        return jsonify({'error': f'Erro interno do servidor: {e}'}), 500
+
+
+@sync_bp.route('/compression-stats', methods=['GET'])
+@require_auth
+def get_compression_metrics():
+    """Taxa de compressão e tempo de CPU por rota e algoritmo, para calibrar os níveis."""
+    return jsonify({'compression': get_compression_stats().stats(), 'available_encodings': available_encodings()}), 200
+
+
 # Crie esta função auxiliar para lidar com a conversão
 # Você pode colocá-la logo abaixo das importações
 def json_converter(o):
@@ -263,4 +563,25 @@ def json_converter(o):
     # Adicione outras conversões aqui se necessário (ex: para UUID)
     # if isinstance(o, uuid.UUID):
     #     return str(o)
-    raise TypeError(f"Object of type {o.__class__.__name__} is not JSON serializable")
\ No newline at end of file
+    raise TypeError(f"Object of type {o.__class__.__name__} is not JSON serializable")
+
+
+def _sync_json(value) -> str:
+    """
+    Serializa uma resposta de sincronização.
+
+    Por padrão o texto é o mesmo de `json.dumps(value, default=json_converter)`
+    (separadores com espaço e não-ASCII escapado), byte a byte. Com
+    SYNC_JSON_COMPACT=1 usa o provedor JSON da aplicação com separadores
+    compactos (orjson quando disponível; com JSON_ENSURE_ASCII=0 os acentos
+    vão em UTF-8). Os dois formatos são JSON equivalentes, mas o texto muda.
+    """
+    if current_app.config.get('SYNC_JSON_COMPACT', False):
+        return current_app.json.dumps(value, default=json_converter, separators=(',', ':'))
+    return json.dumps(value, default=json_converter)
+
+
+def _sync_json_response(payload) -> Response:
+    if current_app.config.get('SYNC_JSON_COMPACT', False):
+        return Response(_sync_json(payload), mimetype=current_app.json.mimetype)
+    return Response(_sync_json(payload), mimetype='application/json')
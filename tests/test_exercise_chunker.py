@@ -0,0 +1,45 @@
+# src/tests/test_exercise_chunker.py
+
+import os
+import sys
+
+# Mesmo ajuste de caminho do main.py, para importar o pacote `src`
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.utils.exercise_chunker import build_chunks, extract_answer_key  # noqa: E402
+
+
+def test_gabarito_no_inicio_com_itens_numerados_mantem_as_questoes():
+    text = (
+        "Gabarito: 1a 2b\n"
+        "1. A paciente chega ao PS.\n"
+        "2. E o outro caso?\n"
+    )
+    body, answers = extract_answer_key(text)
+    assert body == "1. A paciente chega ao PS.\n2. E o outro caso?\n"
+    assert answers == {1: 'a', 2: 'b'}
+
+
+def test_gabarito_termina_na_proxima_questao():
+    text = "Questão 1\nEnunciado\nGABARITO\n1 - A\n\n2 - C\nQuestão 2\nOutro enunciado\n"
+    body, answers = extract_answer_key(text)
+    assert body == "Questão 1\nEnunciado\nQuestão 2\nOutro enunciado\n"
+    assert answers == {1: 'a', 2: 'c'}
+
+
+def test_enunciado_nao_vira_resposta():
+    text = "1. Primeiro caso\n2. E o outro caso?\n"
+    assert extract_answer_key(text) == (text, {})
+
+
+def test_so_gabarito_devolve_o_texto_inteiro():
+    text = "Gabarito: 1a 2b 3c\n"
+    assert extract_answer_key(text) == (text, {})
+
+
+def test_blocos_levam_as_questoes_e_as_respostas():
+    text = "Gabarito: 1a 2b\n1. A paciente chega ao PS.\n2. E o outro caso?\n"
+    chunks = build_chunks(text, max_chars=30)
+    assert len(chunks) == 2
+    assert 'A paciente' in chunks[0] and '1a' in chunks[0]
+    assert 'outro caso' in chunks[1] and '2b' in chunks[1]
@@ -1,9 +1,26 @@
 # Caminho: src/utils/auth.py
 
+import hashlib
+import logging
+import time
 from functools import wraps
-from flask import request, jsonify
+from flask import request, jsonify, current_app
 from src.config.database import get_supabase_client
 
+logger = logging.getLogger(__name__)
+
+try:
+    import jwt
+except ImportError:  # PyJWT ausente: apenas a validação remota fica disponível
+    jwt = None
+
+# Algoritmos assimétricos aceitos para tokens validados pelo JWKS
+JWKS_ALGORITHMS = ('RS256', 'ES256')
+
+# Clientes JWKS reaproveitados entre requisições (as chaves ficam em cache no próprio cliente)
+_jwks_clients = {}
+
+
 def get_user_from_token(token: str):
     """
     Extrai informações do usuário do token JWT do Supabase
@@ -11,7 +28,7 @@ def get_user_from_token(token: str):
     try:
         supabase = get_supabase_client()
         response = supabase.auth.get_user(token)
-        
+
         if response.user:
             return {
                 'id': str(response.user.id),
@@ -19,40 +36,177 @@ def get_user_from_token(token: str):
                 'user_metadata': response.user.user_metadata
             }
         return None
-        
+
     except Exception as e:
-        print(f"Erro ao validar token: {e}")
+        logger.warning('Erro ao validar token: %s', e)
         return None
 
-def require_auth(f):
+
+def _get_jwks_client(url: str):
+    client = _jwks_clients.get(url)
+    if client is None:
+        client = jwt.PyJWKClient(url, cache_keys=True)
+        _jwks_clients[url] = client
+    return client
+
+
+def _get_jwks_url():
+    url = current_app.config.get('SUPABASE_JWKS_URL')
+    if url:
+        return url
+    supabase_url = current_app.config.get('SUPABASE_URL')
+    if supabase_url:
+        return f"{supabase_url.rstrip('/')}/auth/v1/.well-known/jwks.json"
+    return None
+
+
+def decode_token_locally(token: str):
     """
-    Decorator para rotas que requerem autenticação
+    Valida o JWT localmente (assinatura, `exp` e `aud`) sem chamar o Supabase.
+
+    Usa `SUPABASE_JWT_SECRET` para tokens HS256 e o JWKS do projeto para
+    tokens RS256/ES256. O `alg` do cabeçalho precisa bater com o da chave.
+
+    Returns:
+        Tupla (usuário, exp) se o token for válido, ou (None, None) se for inválido.
+
+    Raises:
+        LookupError: se não houver chave disponível para validar localmente.
     """
-    @wraps(f)
-    def decorated_function(*args, **kwargs):
-        auth_header = request.headers.get('Authorization')
-        
-        if not auth_header:
-            return jsonify({'error': 'Token de autorização necessário'}), 401
-        
+    if jwt is None:
+        raise LookupError("PyJWT não está instalado")
+
+    try:
+        header = jwt.get_unverified_header(token)
+    except jwt.PyJWTError:
+        return None, None
+
+    algorithm = header.get('alg')
+    audience = current_app.config.get('SUPABASE_JWT_AUDIENCE', 'authenticated')
+
+    if algorithm == 'HS256':
+        key = current_app.config.get('SUPABASE_JWT_SECRET')
+        if not key:
+            raise LookupError("SUPABASE_JWT_SECRET não configurado")
+    elif algorithm in JWKS_ALGORITHMS:
+        jwks_url = _get_jwks_url()
+        if not jwks_url:
+            raise LookupError("JWKS do Supabase não configurado")
         try:
-            token = auth_header.split(' ')[1]
-        except IndexError:
-            return jsonify({'error': 'Formato de token inválido'}), 401
-        
-        user = get_user_from_token(token)
-        
-        if not user:
-            return jsonify({'error': 'Token inválido ou expirado'}), 401
-        
-        request.current_user = user
-        
-        return f(*args, **kwargs)
-    
-    return decorated_function
+            signing_key = _get_jwks_client(jwks_url).get_signing_key_from_jwt(token)
+        except jwt.PyJWKClientError as e:
+            raise LookupError(f"Chave de assinatura indisponível: {e}")
+        except jwt.PyJWTError:
+            return None, None
+        # O algoritmo vem da chave; um `alg` diferente no cabeçalho é recusado
+        if getattr(signing_key, 'algorithm_name', None) != algorithm:
+            return None, None
+        key = signing_key.key
+    else:
+        return None, None
+
+    try:
+        claims = jwt.decode(
+            token,
+            key,
+            algorithms=[algorithm],
+            audience=audience,
+            options={'require': ['exp', 'sub']}
+        )
+    except (jwt.PyJWTError, TypeError, ValueError):
+        return None, None
+
+    user = {
+        'id': str(claims['sub']),
+        'email': claims.get('email'),
+        'user_metadata': claims.get('user_metadata', {})
+    }
+    return user, claims['exp']
+
+
+def _token_cache_key(token: str) -> str:
+    return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+
+def authenticate_token(token: str, remote: bool = False):
+    """
+    Resolve o usuário de um token usando o cache e a validação local.
+
+    Com `remote=True` (ou `AUTH_VERIFY_MODE=remote`) o token é sempre validado
+    no Supabase, o que detecta sessões revogadas antes do `exp`.
+    """
+    if remote or current_app.config.get('AUTH_VERIFY_MODE', 'local') == 'remote':
+        return get_user_from_token(token)
+
+    cache = current_app.config.get('AUTH_TOKEN_CACHE')
+    cache_key = _token_cache_key(token)
+    if cache is not None:
+        user = cache.get(cache_key)
+        if user is not None:
+            return user
+
+    try:
+        user, expires_at = decode_token_locally(token)
+    except LookupError as e:
+        logger.warning('Validação local indisponível, usando o Supabase: %s', e)
+        return get_user_from_token(token)
+
+    if user and cache is not None:
+        cache.set(cache_key, user, ttl=min(cache.ttl, expires_at - time.time()))
+    return user
+
+
+def invalidate_token(token: str):
+    """Remove um token do cache de usuários (ex.: após o logout)."""
+    cache = current_app.config.get('AUTH_TOKEN_CACHE')
+    if cache is not None:
+        cache.pop(_token_cache_key(token))
+
+
+def require_auth(f=None, *, remote: bool = False):
+    """
+    Decorator para rotas que requerem autenticação
+
+    Pode ser usado como `@require_auth` ou `@require_auth(remote=True)` para
+    rotas sensíveis a revogação de sessão.
+    """
+    def decorator(view):
+        @wraps(view)
+        def decorated_function(*args, **kwargs):
+            auth_header = request.headers.get('Authorization')
+
+            if not auth_header:
+                return jsonify({'error': 'Token de autorização necessário'}), 401
+
+            try:
+                token = auth_header.split(' ')[1]
+            except IndexError:
+                return jsonify({'error': 'Formato de token inválido'}), 401
+
+            user = authenticate_token(token, remote=remote)
+
+            if not user:
+                return jsonify({'error': 'Token inválido ou expirado'}), 401
+
+            request.current_user = user
+            request.current_token = token
+
+            return view(*args, **kwargs)
+
+        return decorated_function
+
+    if f is not None:
+        return decorator(f)
+    return decorator
 
 def get_current_user():
     """
     Obtém o usuário atual da requisição
     """
-    return getattr(request, 'current_user', None)
\ No newline at end of file
+    return getattr(request, 'current_user', None)
+
+def get_current_token():
+    """
+    Obtém o token JWT da requisição atual
+    """
+    return getattr(request, 'current_token', None)
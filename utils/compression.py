@@ -0,0 +1,271 @@
+# src/utils/compression.py
+
+"""
+Compressão dos corpos de requisição e resposta das rotas de sincronização.
+
+- `decompress_request`: aceita corpos com `Content-Encoding: gzip` ou `zstd`.
+- `compress_response`: comprime respostas JSON/NDJSON acima de um tamanho mínimo
+  com o melhor algoritmo aceito pelo cliente (zstd, br ou gzip).
+
+zstd e brotli são opcionais: sem os pacotes `zstandard` e `brotli` instalados,
+apenas gzip é usado.
+"""
+import gzip
+import io
+import threading
+import time
+import zlib
+from functools import wraps
+from typing import Dict, Optional
+
+from flask import current_app, jsonify, make_response, request
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - dependência opcional
+    zstandard = None
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - dependência opcional
+    brotli = None
+
+DEFAULT_LEVELS = {'gzip': 6, 'br': 4, 'zstd': 3}
+COMPRESSIBLE_MIMETYPES = ('application/json', 'application/x-ndjson')
+
+
+def available_encodings():
+    """Algoritmos disponíveis, em ordem de preferência."""
+    encodings = []
+    if zstandard is not None:
+        encodings.append('zstd')
+    if brotli is not None:
+        encodings.append('br')
+    encodings.append('gzip')
+    return encodings
+
+
+def _compress(encoding: str, data: bytes, level: int) -> bytes:
+    if encoding == 'zstd':
+        return zstandard.ZstdCompressor(level=level).compress(data)
+    if encoding == 'br':
+        return brotli.compress(data, quality=level)
+    return gzip.compress(data, compresslevel=level)
+
+
+class _StreamEncoder:
+    """Compressor incremental com a mesma interface para os três algoritmos."""
+
+    def __init__(self, encoding: str, level: int):
+        if encoding == 'zstd':
+            self._obj = zstandard.ZstdCompressor(level=level).compressobj()
+            self._compress, self._finish = self._obj.compress, self._obj.flush
+        elif encoding == 'br':
+            self._obj = brotli.Compressor(quality=level)
+            self._compress, self._finish = self._obj.process, self._obj.finish
+        else:
+            self._obj = zlib.compressobj(level, zlib.DEFLATED, 31)
+            self._compress, self._finish = self._obj.compress, self._obj.flush
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compress(data)
+
+    def finish(self) -> bytes:
+        return self._finish()
+
+
+def _decompress(encoding: str, data: bytes, max_size: int) -> bytes:
+    if encoding == 'gzip':
+        decompressor = zlib.decompressobj(31)
+        result = decompressor.decompress(data, max_size + 1)
+    elif encoding == 'zstd':
+        if zstandard is None:
+            raise LookupError('zstd não suportado neste servidor')
+        # Lê no máximo max_size + 1 bytes: uma "bomba" zstd não é expandida inteira
+        reader = zstandard.ZstdDecompressor().stream_reader(io.BytesIO(data))
+        parts, remaining = [], max_size + 1
+        while remaining > 0:
+            part = reader.read(remaining)
+            if not part:
+                break
+            parts.append(part)
+            remaining -= len(part)
+        result = b''.join(parts)
+    else:
+        raise LookupError(f'Content-Encoding "{encoding}" não suportado')
+    if len(result) > max_size:
+        raise OverflowError('Corpo descomprimido excede o limite permitido')
+    return result
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """Escolhe o algoritmo pelo header Accept-Encoding (respeitando q=0)."""
+    accepted = {}
+    for part in accept_encoding.split(','):
+        pieces = part.strip().split(';')
+        name = pieces[0].strip().lower()
+        if not name:
+            continue
+        quality = 1.0
+        for param in pieces[1:]:
+            key, _, value = param.strip().partition('=')
+            if key == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[name] = quality
+
+    candidates = [
+        encoding for encoding in available_encodings()
+        if accepted.get(encoding, accepted.get('*', 0.0)) > 0
+    ]
+    if not candidates:
+        return None
+    # Maior q vence; em caso de empate vale a ordem de preferência do servidor
+    return max(candidates, key=lambda encoding: (accepted.get(encoding, accepted.get('*', 0.0)), -candidates.index(encoding)))
+
+
+class CompressionStats:
+    """Métricas por rota e algoritmo: bytes antes/depois e tempo de CPU gasto."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, float]] = {}
+
+    def record(self, endpoint: str, direction: str, encoding: str, raw_bytes: int, encoded_bytes: int, cpu_seconds: float):
+        key = f'{endpoint}:{direction}:{encoding}'
+        with self._lock:
+            entry = self._stats.setdefault(key, {'count': 0, 'raw_bytes': 0, 'encoded_bytes': 0, 'cpu_ms': 0.0})
+            entry['count'] += 1
+            entry['raw_bytes'] += raw_bytes
+            entry['encoded_bytes'] += encoded_bytes
+            entry['cpu_ms'] += cpu_seconds * 1000
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            snapshot = {key: dict(entry) for key, entry in self._stats.items()}
+        for entry in snapshot.values():
+            entry['ratio'] = round(entry['raw_bytes'] / entry['encoded_bytes'], 3) if entry['encoded_bytes'] else 0.0
+            entry['cpu_ms'] = round(entry['cpu_ms'], 3)
+            entry['avg_cpu_ms'] = round(entry['cpu_ms'] / entry['count'], 3) if entry['count'] else 0.0
+        return snapshot
+
+
+def get_compression_stats() -> CompressionStats:
+    """
+    Obtém as métricas de compressão da configuração da aplicação Flask
+    """
+    return current_app.config['COMPRESSION_STATS']
+
+
+def decompress_request(f):
+    """
+    Descomprime o corpo da requisição conforme o `Content-Encoding` antes da rota
+    rodar; `request.get_json()` passa a ler o corpo já descomprimido.
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        encoding = request.headers.get('Content-Encoding', '').strip().lower()
+        if encoding and encoding != 'identity':
+            raw = request.get_data()
+            max_size = current_app.config.get('REQUEST_MAX_DECOMPRESSED_BYTES', 50 * 1024 * 1024)
+            started = time.thread_time()
+            try:
+                body = _decompress(encoding, raw, max_size)
+            except LookupError as e:
+                return jsonify({'error': str(e)}), 415
+            except OverflowError as e:
+                return jsonify({'error': str(e)}), 413
+            except Exception as e:
+                return jsonify({'error': f'Corpo comprimido inválido: {e}'}), 400
+            get_compression_stats().record(
+                request.endpoint, 'request', encoding, len(body), len(raw), time.thread_time() - started
+            )
+            # O Werkzeug lê o JSON a partir do corpo em cache
+            request._cached_data = body
+            request._cached_json = (Ellipsis, Ellipsis)
+        return f(*args, **kwargs)
+    return decorated_function
+
+
+def compress_response(f=None, *, levels: Optional[Dict[str, int]] = None, min_size: Optional[int] = None):
+    """
+    Comprime respostas JSON/NDJSON com o algoritmo negociado pelo Accept-Encoding.
+
+    Args:
+        levels: níveis por algoritmo para esta rota (ex.: {'gzip': 9}); o restante
+            vem de COMPRESSION_LEVELS.
+        min_size: tamanho mínimo em bytes (padrão COMPRESSION_MIN_SIZE). Respostas
+            transmitidas em streaming são sempre comprimidas.
+    """
+    def decorator(func):
+        @wraps(func)
+        def decorated_function(*args, **kwargs):
+            response = make_response(func(*args, **kwargs))
+            if not current_app.config.get('COMPRESSION_ENABLED', True):
+                return response
+            if (
+                response.status_code < 200 or response.status_code in (204, 304)
+                or 'Content-Encoding' in response.headers
+                or response.mimetype not in COMPRESSIBLE_MIMETYPES
+            ):
+                return response
+
+            response.vary.add('Accept-Encoding')
+            encoding = negotiate_encoding(request.headers.get('Accept-Encoding', ''))
+            if encoding is None:
+                return response
+
+            route_levels = dict(DEFAULT_LEVELS)
+            route_levels.update(current_app.config.get('COMPRESSION_LEVELS') or {})
+            route_levels.update(levels or {})
+            level = route_levels[encoding]
+            stats = get_compression_stats()
+            endpoint = request.endpoint
+
+            if response.is_streamed:
+                response.response = _compress_stream(response.response, encoding, level, stats, endpoint)
+                response.headers['Content-Encoding'] = encoding
+                response.headers.pop('Content-Length', None)
+                return response
+
+            data = response.get_data()
+            threshold = current_app.config.get('COMPRESSION_MIN_SIZE', 1024) if min_size is None else min_size
+            if len(data) < threshold:
+                return response
+
+            started = time.thread_time()
+            encoded = _compress(encoding, data, level)
+            stats.record(endpoint, 'response', encoding, len(data), len(encoded), time.thread_time() - started)
+
+            response.set_data(encoded)
+            response.headers['Content-Encoding'] = encoding
+            return response
+        return decorated_function
+
+    if f is not None:
+        return decorator(f)
+    return decorator
+
+
+def _compress_stream(chunks, encoding, level, stats, endpoint):
+    encoder = _StreamEncoder(encoding, level)
+    raw_bytes = encoded_bytes = 0
+    cpu = 0.0
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode('utf-8')
+        raw_bytes += len(chunk)
+        started = time.thread_time()
+        out = encoder.compress(chunk)
+        cpu += time.thread_time() - started
+        if out:
+            encoded_bytes += len(out)
+            yield out
+    started = time.thread_time()
+    out = encoder.finish()
+    cpu += time.thread_time() - started
+    encoded_bytes += len(out)
+    stats.record(endpoint, 'response', encoding, raw_bytes, encoded_bytes, cpu)
+    yield out
@@ -0,0 +1,146 @@
+# src/utils/conditional.py
+
+"""
+GET condicional (ETag / If-None-Match) para rotas de leitura.
+
+O validador de uma rota é derivado de uma consulta barata por tabela: o maior
+`updated_at` e a quantidade de linhas do usuário. Se o cliente enviar o mesmo
+ETag, a rota responde 304 sem consultar os dados nem serializar o payload.
+
+Rotas de escrita marcadas com `@invalidates(...)` descartam o validador em
+cache das tabelas alteradas e avançam a sua "geração", de modo que o ETag muda
+mesmo quando a escrita não altera `updated_at`.
+"""
+import hashlib
+import logging
+import uuid
+from functools import wraps
+from typing import Callable, Iterable, Optional, Tuple, Union
+
+from flask import Response, current_app, make_response, request
+
+from src.utils.ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+
+class ValidatorStore:
+    """High-water marks em cache por (usuário, tabela) e gerações de invalidação."""
+
+    def __init__(self, maxsize: int = 50000, ttl: float = 30.0):
+        self._marks = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._generations = TTLCache(maxsize=maxsize, ttl=7 * 24 * 3600)
+
+    def get_mark(self, user_id: str, table: str):
+        return self._marks.get((user_id, table))
+
+    def set_mark(self, user_id: str, table: str, mark: Tuple) -> None:
+        self._marks.set((user_id, table), mark)
+
+    def generation(self, user_id: str, table: str) -> str:
+        return self._generations.get((user_id, table), '')
+
+    def invalidate(self, user_id: str, tables: Iterable[str]) -> None:
+        for table in tables:
+            self._marks.pop((user_id, table))
+            self._generations.set((user_id, table), uuid.uuid4().hex)
+
+
+def get_validator_store() -> ValidatorStore:
+    """
+    Obtém o armazenamento de validadores da configuração da aplicação Flask
+    """
+    return current_app.config['CONDITIONAL_VALIDATORS']
+
+
+def _high_water_mark(supabase, user_id: str, table: str) -> Tuple:
+    """(maior updated_at, quantidade de linhas) da tabela para o usuário."""
+    if table == 'deck_summaries':
+        # Tabela de junção: o dono vem do deck
+        query = supabase.table(table).select('updated_at, study_decks!inner(user_id)', count='exact') \
+            .eq('study_decks.user_id', user_id)
+    else:
+        query = supabase.table(table).select('updated_at', count='exact').eq('user_id', user_id)
+    response = query.order('updated_at', desc=True, nullsfirst=False).limit(1).execute()
+    latest = response.data[0]['updated_at'] if response.data else None
+    return latest, response.count
+
+
+def compute_etag(user_id: str, tables: Iterable[str]) -> str:
+    """ETag fraco combinando rota, usuário e o validador de cada tabela."""
+    from src.config.database import get_supabase_client
+
+    store = get_validator_store()
+    supabase = get_supabase_client()
+    parts = [request.full_path, user_id]
+    for table in tables:
+        mark = store.get_mark(user_id, table)
+        if mark is None:
+            mark = _high_water_mark(supabase, user_id, table)
+            store.set_mark(user_id, table, mark)
+        parts.append(f'{table}:{mark[0]}:{mark[1]}:{store.generation(user_id, table)}')
+    return hashlib.sha1('|'.join(parts).encode('utf-8')).hexdigest()
+
+
+def conditional_get(tables: Union[Iterable[str], Callable[..., Iterable[str]]]):
+    """
+    Responde 304 quando o If-None-Match do cliente bate com o validador atual.
+
+    Args:
+        tables: tabelas lidas pela rota, ou uma função que as recebe a partir dos
+            argumentos da rota (ex.: `lambda table_name: [table_name]`).
+
+    Deve vir depois de `@require_auth`.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            if not current_app.config.get('CONDITIONAL_GET_ENABLED', True):
+                return f(*args, **kwargs)
+
+            from src.utils.auth import get_current_user
+            user_id = get_current_user()['id']
+            table_names = list(tables(**kwargs) if callable(tables) else tables)
+
+            try:
+                etag: Optional[str] = compute_etag(user_id, table_names)
+            except Exception as e:
+                # Sem validador a rota funciona normalmente, só não responde 304
+                logger.warning('Falha ao calcular o ETag de %s: %s', request.path, e)
+                etag = None
+
+            if etag and request.if_none_match.contains_weak(etag):
+                response = Response(status=304)
+                response.set_etag(etag, weak=True)
+                response.headers['Cache-Control'] = 'private, no-cache'
+                return response
+
+            response = make_response(f(*args, **kwargs))
+            if etag and response.status_code == 200:
+                response.set_etag(etag, weak=True)
+                response.headers['Cache-Control'] = 'private, no-cache'
+            return response
+        return decorated_function
+    return decorator
+
+
+def invalidate_validators(user_id: str, tables: Iterable[str]) -> None:
+    get_validator_store().invalidate(user_id, tables)
+
+
+def invalidates(*tables: str):
+    """
+    Em rotas de escrita: invalida os validadores das tabelas informadas para o
+    usuário atual. Roda mesmo se a rota falhar, já que parte da escrita pode ter
+    sido gravada.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            try:
+                return f(*args, **kwargs)
+            finally:
+                from src.utils.auth import get_current_user
+                invalidate_validators(get_current_user()['id'], tables)
+        return decorated_function
+    return decorator
@@ -0,0 +1,194 @@
+# src/utils/due_queue.py
+
+"""
+Índice em memória das revisões pendentes de cada usuário.
+
+Para cada usuário é mantido um min-heap de (next_review, id da sessão, tipo),
+com as sessões não concluídas de `review_sessions` ('summary') e
+`flashcard_review_sessions` ('flashcard'). O heap é carregado na primeira
+consulta do usuário e, a partir daí, a quantidade de itens vencidos e os
+primeiros N itens vencidos saem da memória.
+
+As rotas que concluem, resetam ou sincronizam revisões atualizam o heap no
+lugar (`apply_review_rows`); rotas que criam ou apagam sessões indiretamente
+(resumos, flashcards) descartam o índice do usuário (`@resets_due_queue`). O
+índice também expira por TTL (DUE_QUEUE_TTL), o que cobre escritas feitas por
+outros processos.
+"""
+import heapq
+import threading
+from datetime import datetime, timezone
+from functools import wraps
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from flask import current_app
+
+from src.utils.ttl_cache import TTLCache
+
+KIND_TABLES = {
+    'summary': 'review_sessions',
+    'flashcard': 'flashcard_review_sessions',
+}
+DUE_QUEUE_PAGE_SIZE = 1000
+
+
+def parse_timestamp(value) -> Optional[float]:
+    """
+    Converte `next_review` em segundos desde a época. Datas sem fuso são lidas
+    como UTC, do mesmo jeito que o Postgres as grava.
+    """
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+class UserDueQueue:
+    """
+    Min-heap de (vencimento, id da sessão, tipo) de um usuário.
+
+    Atualizações não removem a entrada antiga do heap: `_entries` guarda o
+    vencimento atual de cada sessão e entradas que não batem com ele são
+    ignoradas (e descartadas quando o heap é reconstruído).
+    """
+
+    def __init__(self):
+        self._heap: List[Tuple[float, str, str]] = []
+        self._entries: Dict[Tuple[str, str], float] = {}
+        self._lock = threading.Lock()
+
+    def set(self, kind: str, session_id: str, due_at: Optional[float]) -> None:
+        """Agenda a sessão para `due_at` (None remove a sessão do índice)."""
+        with self._lock:
+            if due_at is None:
+                self._entries.pop((kind, session_id), None)
+            else:
+                self._entries[(kind, session_id)] = due_at
+                heapq.heappush(self._heap, (due_at, session_id, kind))
+            if len(self._heap) > 2 * len(self._entries) + 64:
+                self._heap = [(due_at, sid, k) for (k, sid), due_at in self._entries.items()]
+                heapq.heapify(self._heap)
+
+    def _due_entries(self, now: float, kinds: Iterable[str]) -> List[Tuple[float, str, str]]:
+        # Percorre só o topo do heap: filhos nunca vencem antes do pai
+        heap, entries, kinds = self._heap, self._entries, set(kinds)
+        due, stack = [], [0] if heap else []
+        while stack:
+            index = stack.pop()
+            item = heap[index]
+            if item[0] > now:
+                continue
+            if item[2] in kinds and entries.get((item[2], item[1])) == item[0]:
+                due.append(item)
+            for child in (2 * index + 1, 2 * index + 2):
+                if child < len(heap):
+                    stack.append(child)
+        return due
+
+    def due_count(self, now: float, kinds: Iterable[str]) -> int:
+        with self._lock:
+            return len(self._due_entries(now, kinds))
+
+    def first_due(self, now: float, limit: int, kinds: Iterable[str]) -> List[Tuple[float, str, str]]:
+        """Até `limit` sessões vencidas, da mais antiga para a mais nova."""
+        with self._lock:
+            return heapq.nsmallest(limit, self._due_entries(now, kinds))
+
+
+class DueQueueIndex:
+    """Filas de vencimento por usuário, carregadas sob demanda e com TTL."""
+
+    def __init__(self, max_users: int = 10000, ttl: float = 60.0):
+        self._queues = TTLCache(maxsize=max_users, ttl=ttl)
+
+    def _load(self, supabase, user_id: str) -> UserDueQueue:
+        queue = UserDueQueue()
+        for kind, table in KIND_TABLES.items():
+            offset = 0
+            while True:
+                rows = supabase.table(table).select('id, next_review') \
+                    .eq('user_id', user_id).eq('is_completed', False) \
+                    .order('id').range(offset, offset + DUE_QUEUE_PAGE_SIZE - 1).execute().data or []
+                for row in rows:
+                    queue.set(kind, row['id'], parse_timestamp(row.get('next_review')))
+                if len(rows) < DUE_QUEUE_PAGE_SIZE:
+                    break
+                offset += DUE_QUEUE_PAGE_SIZE
+        return queue
+
+    def get_queue(self, supabase, user_id: str) -> UserDueQueue:
+        queue = self._queues.get(user_id)
+        if queue is None:
+            queue = self._load(supabase, user_id)
+            self._queues.set(user_id, queue)
+        return queue
+
+    def due_count(self, supabase, user_id: str, kinds: Iterable[str] = tuple(KIND_TABLES)) -> int:
+        now = datetime.now(timezone.utc).timestamp()
+        return self.get_queue(supabase, user_id).due_count(now, kinds)
+
+    def first_due(self, supabase, user_id: str, limit: int, kinds: Iterable[str] = tuple(KIND_TABLES)):
+        now = datetime.now(timezone.utc).timestamp()
+        return self.get_queue(supabase, user_id).first_due(now, limit, kinds)
+
+    def apply_rows(self, user_id: str, kind: str, rows: Iterable[dict]) -> None:
+        """
+        Atualiza o índice (se já carregado) com linhas gravadas de sessões. Linhas
+        sem `next_review` e `is_completed` não dizem se a sessão está pendente;
+        nesse caso o índice do usuário é descartado e recarregado depois.
+        """
+        queue = self._queues.get(user_id)
+        if queue is None:
+            return
+        for row in rows:
+            session_id = row.get('id')
+            if not session_id:
+                continue
+            if row.get('is_completed') or row.get('deleted_at'):
+                queue.set(kind, session_id, None)
+            elif 'next_review' in row and 'is_completed' in row:
+                queue.set(kind, session_id, parse_timestamp(row['next_review']))
+            else:
+                self.invalidate(user_id)
+                return
+
+    def invalidate(self, user_id: str) -> None:
+        self._queues.pop(user_id)
+
+
+def get_due_index() -> Optional[DueQueueIndex]:
+    """
+    Obtém o índice de revisões pendentes da configuração da aplicação Flask
+    (None se DUE_QUEUE_ENABLED estiver desligado)
+    """
+    if not current_app.config.get('DUE_QUEUE_ENABLED', True):
+        return None
+    return current_app.config.get('DUE_QUEUE_INDEX')
+
+
+def apply_review_rows(user_id: str, kind: str, rows: Optional[Iterable[dict]]) -> None:
+    due_index = get_due_index()
+    if due_index is not None and rows:
+        due_index.apply_rows(user_id, kind, rows)
+
+
+def resets_due_queue(f):
+    """
+    Em rotas que criam ou apagam sessões de revisão indiretamente: descarta o
+    índice do usuário atual. Roda mesmo se a rota falhar.
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        try:
+            return f(*args, **kwargs)
+        finally:
+            due_index = get_due_index()
+            if due_index is not None:
+                from src.utils.auth import get_current_user
+                due_index.invalidate(get_current_user()['id'])
+    return decorated_function
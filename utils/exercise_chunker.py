@@ -0,0 +1,192 @@
+# src/utils/exercise_chunker.py
+
+"""
+Divide textos grandes de provas em blocos de questões e os reformata em paralelo.
+
+Cada bloco leva consigo as respostas do gabarito ("4c", "10a") das questões que
+contém, para que a IA consiga associar a alternativa correta sem ver o texto
+inteiro.
+"""
+import logging
+import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Optional, Tuple
+
+from src.utils.exercise_parser import parse_multiple_gpt_exercises
+from src.utils.log import preview
+
+logger = logging.getLogger(__name__)
+
+# "Questão 4", "QUESTÃO 10", "Questao 3"
+_QUESTAO_RE = re.compile(r'(?im)^[ \t]*quest[ãa]o[ \t]*(\d{1,3})\b')
+# Itens numerados no início da linha: "4.", "4)", "4 -"
+_NUMBERED_RE = re.compile(r'(?m)^[ \t]*(\d{1,3})[ \t]*[.)\-–][ \t]+\S')
+# Pares número+letra do gabarito: "4c", "10 - a", "3) B"
+_ANSWER_RE = re.compile(r'\b(\d{1,3})[ \t]*[-–.:)]?[ \t]*([A-Ea-e])\b')
+_GABARITO_RE = re.compile(r'(?im)^.*\bgabarito\b.*$')
+_GABARITO_WORD_RE = re.compile(r'(?i)\bgabarito\b')
+# Texto que pode sobrar em uma linha de gabarito depois de tirar os pares
+_ANSWER_LINE_MAX_LEFTOVER = 3
+
+
+def _answer_pairs(line: str) -> List[Tuple[str, str]]:
+    """
+    Pares número+letra de uma linha composta só por eles (e separadores).
+    Linhas de enunciado como "2. E o outro caso?" retornam lista vazia.
+    """
+    pairs = _ANSWER_RE.findall(line)
+    leftover = _ANSWER_RE.sub('', line).strip(' \t\r\n,;|:')
+    if pairs and len(leftover) <= _ANSWER_LINE_MAX_LEFTOVER:
+        return pairs
+    return []
+
+
+def extract_answer_key(text: str) -> Tuple[str, Dict[int, str]]:
+    """
+    Localiza o bloco de gabarito e o remove do texto.
+
+    Procura primeiro uma linha com a palavra "gabarito"; o bloco vai dela até a
+    primeira linha que não seja só de pares número+letra. Sem ela, usa a última
+    linha com pelo menos três pares. Se sobrar só o gabarito, o texto volta
+    inteiro, sem respostas.
+
+    Returns:
+        Tupla (texto sem o gabarito, {número da questão: letra}).
+    """
+    lines = text.splitlines(keepends=True)
+
+    match = _GABARITO_RE.search(text)
+    if match:
+        first = text.count('\n', 0, match.start())
+        # Na linha do título, só o que vem depois de "gabarito" pode ter respostas
+        title_rest = lines[first][_GABARITO_WORD_RE.search(lines[first]).end():]
+        pairs = list(_answer_pairs(title_rest))
+        last = first
+        for index in range(first + 1, len(lines)):
+            if not lines[index].strip():
+                continue
+            line_pairs = _answer_pairs(lines[index])
+            if not line_pairs:
+                break
+            pairs.extend(line_pairs)
+            last = index
+        body = ''.join(lines[:first] + lines[last + 1:])
+        if pairs and body.strip():
+            return body, {int(num): letter.lower() for num, letter in pairs}
+
+    for index in range(len(lines) - 1, -1, -1):
+        pairs = _answer_pairs(lines[index])
+        if len(pairs) >= 3:
+            body = ''.join(lines[:index] + lines[index + 1:])
+            if body.strip():
+                return body, {int(num): letter.lower() for num, letter in pairs}
+            break
+
+    return text, {}
+
+
+def split_questions(text: str) -> List[Tuple[Optional[int], str]]:
+    """
+    Divide o texto nas fronteiras de questão ("Questão N" ou, na falta delas,
+    itens numerados). O preâmbulo antes da primeira questão fica com ela.
+    """
+    boundaries = list(_QUESTAO_RE.finditer(text)) or list(_NUMBERED_RE.finditer(text))
+    if not boundaries:
+        return [(None, text)]
+
+    questions = []
+    for index, match in enumerate(boundaries):
+        start = 0 if index == 0 else match.start()
+        end = boundaries[index + 1].start() if index + 1 < len(boundaries) else len(text)
+        questions.append((int(match.group(1)), text[start:end]))
+    return questions
+
+
+def build_chunks(text: str, max_chars: int = 12000) -> List[str]:
+    """
+    Agrupa questões consecutivas em blocos de até `max_chars` caracteres e anexa
+    a cada bloco as respostas do gabarito das suas questões.
+    """
+    body, answers = extract_answer_key(text)
+    questions = split_questions(body)
+
+    groups: List[List[Tuple[Optional[int], str]]] = []
+    current: List[Tuple[Optional[int], str]] = []
+    current_size = 0
+    for number, question_text in questions:
+        if current and current_size + len(question_text) > max_chars:
+            groups.append(current)
+            current, current_size = [], 0
+        current.append((number, question_text))
+        current_size += len(question_text)
+    if current:
+        groups.append(current)
+
+    chunks = []
+    for group in groups:
+        chunk_text = ''.join(question_text for _, question_text in group).strip()
+        numbers = [number for number, _ in group if number is not None]
+        chunk_answers = {n: answers[n] for n in numbers if n in answers} or (answers if not numbers else {})
+        if chunk_answers:
+            key_line = ' '.join(f'{n}{letter}' for n, letter in sorted(chunk_answers.items()))
+            chunk_text = f'{chunk_text}\n\nGabarito: {key_line}'
+        chunks.append(chunk_text)
+    return chunks
+
+
+def reformat_exercises_in_chunks(
+    gpt_service,
+    raw_text: str,
+    max_chars: int = 12000,
+    max_concurrency: int = 4,
+    max_retries: int = 2,
+    job=None
+) -> Tuple[List[dict], List[dict]]:
+    """
+    Reformata e faz o parsing de cada bloco em paralelo (no máximo `max_concurrency`
+    chamadas simultâneas), repetindo individualmente os blocos que falharem.
+
+    Returns:
+        Tupla (exercícios na ordem original, blocos que falharam após as tentativas).
+    """
+    chunks = build_chunks(raw_text, max_chars)
+    logger.debug('Texto de %d caracteres dividido em %d bloco(s)', len(raw_text), len(chunks))
+
+    def process(index: int) -> List[dict]:
+        last_error = None
+        for attempt in range(max_retries + 1):
+            try:
+                raw_response = gpt_service.reformat_exercises_from_text(chunks[index])
+                # Resposta bruta da IA antes do parsing, essencial para depurar a formatação
+                logger.debug('Resposta bruta da IA (bloco %d): %s', index, preview(raw_response))
+                parsed = parse_multiple_gpt_exercises(raw_response)
+                if parsed:
+                    return parsed
+                last_error = ValueError('Nenhum exercício reconhecido na resposta da IA')
+            except Exception as e:
+                last_error = e
+            logger.warning('Bloco %d falhou (tentativa %d): %s', index, attempt + 1, last_error)
+        raise last_error
+
+    results: List[Optional[List[dict]]] = [None] * len(chunks)
+    failed_chunks = []
+    done = 0
+    with ThreadPoolExecutor(max_workers=max(1, min(max_concurrency, len(chunks)))) as executor:
+        futures = {executor.submit(process, index): index for index in range(len(chunks))}
+        for future in as_completed(futures):
+            index = futures[future]
+            try:
+                results[index] = future.result()
+            except Exception as e:
+                failed_chunks.append({'chunk': index, 'error': str(e)})
+            done += 1
+            if job:
+                job.report(0.05 + 0.75 * done / len(chunks), stage='reformatting', partial_result={
+                    'chunks_done': done,
+                    'chunks_total': len(chunks),
+                    'parsed_count': sum(len(r) for r in results if r),
+                })
+
+    exercises = [exercise for chunk_result in results if chunk_result for exercise in chunk_result]
+    failed_chunks.sort(key=lambda item: item['chunk'])
+    return exercises, failed_chunks
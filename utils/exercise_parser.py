@@ -1,7 +1,12 @@
 # src/utils/exercise_parser.py
 
-import re
 import json
+import logging
+import re
+
+from src.utils.log import preview
+
+logger = logging.getLogger(__name__)
 
 def parse_single_gpt_exercise(text: str) -> dict:
     """
@@ -59,14 +64,11 @@ def parse_multiple_gpt_exercises(text: str) -> list[dict]:
     """
     Faz o parsing de uma string que contém MÚLTIPLOS exercícios formatados pela IA.
     """
-    print(f"\n--- [PARSER-LOG 1] Iniciando parsing de texto com {len(text)} caracteres ---")
-    
     parsed_exercises = []
     # Divide o texto completo em blocos, onde cada bloco começa com "Questão" ou "---"
     # Isso torna o split mais robusto caso a IA esqueça um dos separadores.
     exercise_blocks = re.split(r'Questão|---', text)
-    
-    print(f"--- [PARSER-LOG 2] Texto dividido em {len(exercise_blocks)} blocos ---")
+    logger.debug('Parsing de %d caracteres em %d blocos', len(text), len(exercise_blocks))
 
     for i, block in enumerate(exercise_blocks):
         if len(block.strip()) < 10: # Ignora blocos vazios ou muito pequenos
@@ -76,11 +78,9 @@ def parse_multiple_gpt_exercises(text: str) -> list[dict]:
             # Não precisa mais adicionar "Questão", pois o parser único já o encontra
             parsed_exercise = parse_single_gpt_exercise(block)
             parsed_exercises.append(parsed_exercise)
-            print(f"--- [PARSER-LOG 3.{i}] Bloco {i} parseado com SUCESSO ---")
         except ValueError as e:
-            print(f"--- [PARSER-LOG 3.{i}] AVISO: Falha ao parsear o bloco {i+1}. Erro: {e} ---")
-            print(f"Bloco problemático: {block[:200]}...")
+            logger.warning('Falha ao parsear o bloco %d: %s. Bloco: %s', i + 1, e, preview(block, 200))
             continue
 
-    print(f"--- [PARSER-LOG 4] Parsing finalizado. Total de exercícios extraídos: {len(parsed_exercises)} ---")
+    logger.debug('Parsing finalizado: %d exercícios extraídos', len(parsed_exercises))
     return parsed_exercises
\ No newline at end of file
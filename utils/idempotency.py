@@ -0,0 +1,192 @@
+# src/utils/idempotency.py
+
+"""
+Registro de mudanças e lotes de sincronização já aplicados.
+
+Quando o cliente reenvia um lote (por exemplo, após um timeout), as mudanças
+com `change_id` já registrado são respondidas daqui, sem tocar no Supabase, e um
+lote com o mesmo header `Idempotency-Key` devolve a resposta já calculada.
+
+Com SYNC_IDEMPOTENCY_BACKEND=memory (padrão) o registro fica em memória
+(limitado em tamanho e com TTL) e vale só para o processo do servidor: com
+vários workers, um reenvio atendido por outro worker é aplicado de novo. Com
+SYNC_IDEMPOTENCY_BACKEND=sqlite o registro fica em um arquivo SQLite
+(SYNC_IDEMPOTENCY_PATH) compartilhado pelos processos da mesma máquina.
+
+Um lote em andamento reserva a sua `Idempotency-Key` só por
+SYNC_IDEMPOTENCY_LEASE segundos; a resposta final fica pelo TTL inteiro. Se o
+worker morrer no meio do lote, a reserva vence e o reenvio é processado.
+"""
+import json
+import sqlite3
+import threading
+import time
+from typing import Any, Optional, Tuple
+
+from src.utils.ttl_cache import TTLCache
+
+BATCH_NEW = 'new'
+BATCH_REPLAY = 'replay'
+BATCH_IN_PROGRESS = 'in_progress'
+BATCH_MISMATCH = 'mismatch'
+
+
+class SyncIdempotencyStore:
+    """Resultados de mudanças (por usuário e `change_id`) e respostas de lotes (por `Idempotency-Key`)."""
+
+    def __init__(self, maxsize: int = 100000, ttl: float = 24 * 3600, lease: float = 60.0):
+        self.lease = lease
+        self._changes = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._batches = TTLCache(maxsize=max(1, maxsize // 10), ttl=ttl)
+        self._lock = threading.Lock()
+
+    def get_change(self, user_id: str, change_id: str) -> Optional[dict]:
+        return self._changes.get((user_id, change_id))
+
+    def record_change(self, user_id: str, change_id: str, result: dict) -> None:
+        self._changes.set((user_id, change_id), dict(result))
+
+    def begin_batch(self, user_id: str, key: str, fingerprint: str) -> Tuple[str, Any]:
+        """
+        Reserva a chave do lote.
+
+        Returns:
+            (BATCH_NEW, None) se o lote deve ser processado;
+            (BATCH_REPLAY, resposta) se já foi processado com o mesmo corpo;
+            (BATCH_IN_PROGRESS, None) se a primeira tentativa ainda está rodando
+            (reservas com mais de `lease` segundos vencem e contam como novas);
+            (BATCH_MISMATCH, None) se a chave já foi usada com outro corpo.
+        """
+        with self._lock:
+            entry = self._batches.get((user_id, key))
+            if entry is None:
+                self._batches.set((user_id, key), {'fingerprint': fingerprint, 'response': None}, ttl=self.lease)
+                return BATCH_NEW, None
+            if entry['fingerprint'] != fingerprint:
+                return BATCH_MISMATCH, None
+            if entry['response'] is None:
+                return BATCH_IN_PROGRESS, None
+            return BATCH_REPLAY, entry['response']
+
+    def finish_batch(self, user_id: str, key: str, fingerprint: str, response: Any) -> None:
+        with self._lock:
+            self._batches.set((user_id, key), {'fingerprint': fingerprint, 'response': response})
+
+    def abort_batch(self, user_id: str, key: str) -> None:
+        """Libera a chave para que o cliente possa tentar de novo após um erro."""
+        with self._lock:
+            self._batches.pop((user_id, key))
+
+
+class SQLiteSyncIdempotencyStore:
+    """
+    Mesma interface de `SyncIdempotencyStore`, em um arquivo SQLite.
+
+    A reserva do lote roda em uma transação `BEGIN IMMEDIATE`, então dois
+    processos não conseguem reservar a mesma `Idempotency-Key`.
+    """
+
+    def __init__(self, path: str, ttl: float = 24 * 3600, lease: float = 60.0):
+        self.ttl = ttl
+        self.lease = lease
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=10)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._db.execute('PRAGMA journal_mode=WAL')
+            self._db.execute('''
+                CREATE TABLE IF NOT EXISTS sync_changes (
+                    user_id TEXT NOT NULL,
+                    change_id TEXT NOT NULL,
+                    result TEXT NOT NULL,
+                    expires_at REAL NOT NULL,
+                    PRIMARY KEY (user_id, change_id)
+                )
+            ''')
+            self._db.execute('''
+                CREATE TABLE IF NOT EXISTS sync_batches (
+                    user_id TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    fingerprint TEXT NOT NULL,
+                    response TEXT,
+                    expires_at REAL NOT NULL,
+                    PRIMARY KEY (user_id, key)
+                )
+            ''')
+
+    def get_change(self, user_id: str, change_id: str) -> Optional[dict]:
+        with self._lock:
+            row = self._db.execute(
+                'SELECT result FROM sync_changes WHERE user_id = ? AND change_id = ? AND expires_at > ?',
+                (user_id, change_id, time.time())
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def record_change(self, user_id: str, change_id: str, result: dict) -> None:
+        now = time.time()
+        with self._lock:
+            self._db.execute('DELETE FROM sync_changes WHERE expires_at <= ?', (now,))
+            self._db.execute(
+                'INSERT OR REPLACE INTO sync_changes (user_id, change_id, result, expires_at) VALUES (?, ?, ?, ?)',
+                (user_id, change_id, json.dumps(result, ensure_ascii=False), now + self.ttl)
+            )
+
+    def begin_batch(self, user_id: str, key: str, fingerprint: str) -> Tuple[str, Any]:
+        """Ver `SyncIdempotencyStore.begin_batch`."""
+        now = time.time()
+        with self._lock:
+            self._db.execute('BEGIN IMMEDIATE')
+            try:
+                self._db.execute('DELETE FROM sync_batches WHERE expires_at <= ?', (now,))
+                row = self._db.execute(
+                    'SELECT fingerprint, response FROM sync_batches WHERE user_id = ? AND key = ?',
+                    (user_id, key)
+                ).fetchone()
+                if row is None:
+                    self._db.execute(
+                        'INSERT INTO sync_batches (user_id, key, fingerprint, expires_at) VALUES (?, ?, ?, ?)',
+                        (user_id, key, fingerprint, now + self.lease)
+                    )
+            finally:
+                self._db.execute('COMMIT')
+        if row is None:
+            return BATCH_NEW, None
+        if row[0] != fingerprint:
+            return BATCH_MISMATCH, None
+        if row[1] is None:
+            return BATCH_IN_PROGRESS, None
+        return BATCH_REPLAY, json.loads(row[1])
+
+    def finish_batch(self, user_id: str, key: str, fingerprint: str, response: Any) -> None:
+        with self._lock:
+            self._db.execute(
+                'INSERT OR REPLACE INTO sync_batches (user_id, key, fingerprint, response, expires_at) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (user_id, key, fingerprint, json.dumps(response, ensure_ascii=False), time.time() + self.ttl)
+            )
+
+    def abort_batch(self, user_id: str, key: str) -> None:
+        """Libera a chave para que o cliente possa tentar de novo após um erro."""
+        with self._lock:
+            self._db.execute('DELETE FROM sync_batches WHERE user_id = ? AND key = ?', (user_id, key))
+
+
+def init_sync_idempotency(app):
+    """Cria o registro com o backend configurado (`SYNC_IDEMPOTENCY_BACKEND`: memory ou sqlite)."""
+    backend = app.config.get('SYNC_IDEMPOTENCY_BACKEND', 'memory')
+    ttl = app.config.get('SYNC_IDEMPOTENCY_TTL', 24 * 3600)
+    lease = app.config.get('SYNC_IDEMPOTENCY_LEASE', 60.0)
+    if backend == 'sqlite':
+        return SQLiteSyncIdempotencyStore(app.config['SYNC_IDEMPOTENCY_PATH'], ttl=ttl, lease=lease)
+    if backend == 'memory':
+        return SyncIdempotencyStore(
+            maxsize=app.config.get('SYNC_IDEMPOTENCY_MAX_ENTRIES', 100000), ttl=ttl, lease=lease
+        )
+    raise ValueError(f"SYNC_IDEMPOTENCY_BACKEND inválido: {backend}")
+
+
+def get_sync_idempotency_store() -> SyncIdempotencyStore:
+    """
+    Obtém o registro de idempotência da configuração da aplicação Flask
+    """
+    from flask import current_app
+    return current_app.config['SYNC_IDEMPOTENCY_STORE']
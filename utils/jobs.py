@@ -0,0 +1,242 @@
+# src/utils/jobs.py
+
+"""
+Fila de tarefas em segundo plano com status consultável.
+
+As tarefas rodam em um pool de threads do próprio processo. O estado de cada
+tarefa (progresso, resultado parcial, resultado final e erro) fica em um
+`JobStore` plugável: em memória ou em SQLite.
+"""
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+JOB_QUEUED = 'queued'
+JOB_RUNNING = 'running'
+JOB_SUCCEEDED = 'succeeded'
+JOB_FAILED = 'failed'
+
+_FINISHED = (JOB_SUCCEEDED, JOB_FAILED)
+
+
+def _now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+class JobStore:
+    """Interface dos armazenamentos de tarefas."""
+
+    def create(self, job: Dict[str, Any]) -> None:
+        raise NotImplementedError
+
+    def update(self, job_id: str, **fields) -> None:
+        raise NotImplementedError
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+
+class InMemoryJobStore(JobStore):
+    """Armazena as tarefas em um dicionário; tarefas finalizadas expiram após `retention` segundos."""
+
+    def __init__(self, retention: float = 24 * 3600):
+        self.retention = retention
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._finished_at: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def create(self, job):
+        with self._lock:
+            self._prune()
+            self._jobs[job['id']] = dict(job)
+
+    def update(self, job_id, **fields):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return
+            job.update(fields)
+            if fields.get('status') in _FINISHED:
+                self._finished_at[job_id] = time.monotonic()
+
+    def get(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def _prune(self):
+        limit = time.monotonic() - self.retention
+        for job_id, finished_at in list(self._finished_at.items()):
+            if finished_at < limit:
+                self._jobs.pop(job_id, None)
+                del self._finished_at[job_id]
+
+
+class SQLiteJobStore(JobStore):
+    """
+    Armazena as tarefas em um arquivo SQLite.
+
+    Como o arquivo é compartilhado, o status pode ser consultado em qualquer
+    processo do servidor, não só naquele que executa a tarefa.
+    """
+
+    _JSON_FIELDS = ('partial_result', 'result')
+
+    def __init__(self, path: str, retention: float = 24 * 3600):
+        self.retention = retention
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock:
+            self._db.execute('PRAGMA journal_mode=WAL')
+            self._db.execute('''
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    user_id TEXT,
+                    kind TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    progress REAL NOT NULL DEFAULT 0,
+                    stage TEXT,
+                    partial_result TEXT,
+                    result TEXT,
+                    error TEXT,
+                    created_at TEXT NOT NULL,
+                    updated_at TEXT NOT NULL,
+                    finished_at REAL
+                )
+            ''')
+            self._db.commit()
+
+    def create(self, job):
+        row = self._encode(job)
+        columns = ', '.join(row)
+        placeholders = ', '.join('?' for _ in row)
+        with self._lock:
+            self._db.execute('DELETE FROM jobs WHERE finished_at IS NOT NULL AND finished_at < ?', (time.time() - self.retention,))
+            self._db.execute(f'INSERT INTO jobs ({columns}) VALUES ({placeholders})', tuple(row.values()))
+            self._db.commit()
+
+    def update(self, job_id, **fields):
+        row = self._encode(fields)
+        if fields.get('status') in _FINISHED:
+            row['finished_at'] = time.time()
+        assignments = ', '.join(f'{column} = ?' for column in row)
+        with self._lock:
+            self._db.execute(f'UPDATE jobs SET {assignments} WHERE id = ?', (*row.values(), job_id))
+            self._db.commit()
+
+    def get(self, job_id):
+        with self._lock:
+            row = self._db.execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job.pop('finished_at', None)
+        for field in self._JSON_FIELDS:
+            if job.get(field) is not None:
+                job[field] = json.loads(job[field])
+        return job
+
+    def _encode(self, fields):
+        row = dict(fields)
+        for field in self._JSON_FIELDS:
+            if row.get(field) is not None:
+                row[field] = json.dumps(row[field], ensure_ascii=False)
+        return row
+
+
+class JobHandle:
+    """Passado para a função da tarefa para que ela reporte o progresso."""
+
+    def __init__(self, store: JobStore, job_id: str):
+        self._store = store
+        self.job_id = job_id
+
+    def report(self, progress: float, stage: Optional[str] = None, partial_result: Any = None):
+        fields = {'progress': round(min(max(progress, 0.0), 1.0), 4), 'updated_at': _now_iso()}
+        if stage is not None:
+            fields['stage'] = stage
+        if partial_result is not None:
+            fields['partial_result'] = partial_result
+        self._store.update(self.job_id, **fields)
+
+
+class JobQueue:
+    """Executa funções em um pool de threads e registra o ciclo de vida no `JobStore`."""
+
+    def __init__(self, store: JobStore, max_workers: int = 2, app=None):
+        self.store = store
+        self.app = app
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='job-worker')
+
+    def submit(self, kind: str, user_id: Optional[str], func: Callable, *args, **kwargs) -> str:
+        """
+        Enfileira `func(*args, job=job_handle, **kwargs)` e retorna o id da tarefa imediatamente.
+        O valor retornado por `func` vira o `result` da tarefa.
+        """
+        job_id = str(uuid.uuid4())
+        now = _now_iso()
+        self.store.create({
+            'id': job_id,
+            'user_id': user_id,
+            'kind': kind,
+            'status': JOB_QUEUED,
+            'progress': 0.0,
+            'stage': None,
+            'partial_result': None,
+            'result': None,
+            'error': None,
+            'created_at': now,
+            'updated_at': now,
+        })
+        self._executor.submit(self._run, job_id, func, args, kwargs)
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return self.store.get(job_id)
+
+    def _run(self, job_id, func, args, kwargs):
+        handle = JobHandle(self.store, job_id)
+        self.store.update(job_id, status=JOB_RUNNING, updated_at=_now_iso())
+        try:
+            if self.app is not None:
+                with self.app.app_context():
+                    result = func(*args, job=handle, **kwargs)
+            else:
+                result = func(*args, job=handle, **kwargs)
+            self.store.update(job_id, status=JOB_SUCCEEDED, progress=1.0, result=result, updated_at=_now_iso())
+        except Exception as e:
+            logger.exception('Erro na tarefa %s: %s', job_id, e)
+            self.store.update(job_id, status=JOB_FAILED, error=str(e), updated_at=_now_iso())
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait)
+
+
+def init_job_queue(app) -> JobQueue:
+    """Cria a fila de tarefas com o backend configurado (`JOB_STORE_BACKEND`: memory ou sqlite)."""
+    backend = app.config.get('JOB_STORE_BACKEND', 'memory')
+    retention = app.config.get('JOB_RETENTION_SECONDS', 24 * 3600)
+    if backend == 'sqlite':
+        store = SQLiteJobStore(app.config['JOB_STORE_PATH'], retention=retention)
+    elif backend == 'memory':
+        store = InMemoryJobStore(retention=retention)
+    else:
+        raise ValueError(f"JOB_STORE_BACKEND inválido: {backend}")
+    return JobQueue(store, max_workers=app.config.get('JOB_WORKERS', 2), app=app)
+
+
+def get_job_queue() -> JobQueue:
+    """
+    Obtém a fila de tarefas da configuração da aplicação Flask
+    """
+    from flask import current_app
+    return current_app.config['JOB_QUEUE']
@@ -0,0 +1,153 @@
+# src/utils/json_provider.py
+
+"""
+Provider JSON do Flask baseado no orjson (quando instalado).
+
+Com `ensure_ascii` ligado (padrão do Flask), a saída é idêntica byte a byte à do
+provider padrão: chaves ordenadas, separadores compactos, datas no formato HTTP
+e UUID como string. O orjson só é usado quando o resultado é ASCII puro; textos
+com acentos são escapados (\\uXXXX) pelo encoder em C do `json` padrão, que é
+mais rápido do que reescrever a saída do orjson em Python. Nesse modo só
+payloads sem acentos (ex.: o delta de `review_sessions`) ficam mais rápidos;
+rotas com texto (`/api/subjects`, `/api/reviews/pending`) custam o mesmo que
+antes.
+
+Com JSON_ENSURE_ASCII desligado, o orjson gera UTF-8 direto para qualquer
+payload e o Content-Type passa a declarar `charset=utf-8`.
+"""
+import dataclasses
+import decimal
+import json
+import uuid
+from datetime import date
+from typing import Any, Dict, Optional
+
+from flask import Response, has_request_context, request
+from flask.json.provider import DefaultJSONProvider
+from werkzeug.http import http_date
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - dependência opcional
+    orjson = None
+
+_COMPACT = (',', ':')
+# Respostas servidas pelo `json` padrão antes de tentar o orjson de novo na rota
+_STDLIB_RETRY_AFTER = 50
+
+
+def _default(o: Any) -> Any:
+    """Mesmas conversões do provider padrão do Flask."""
+    if isinstance(o, date):
+        return http_date(o)
+    if isinstance(o, (decimal.Decimal, uuid.UUID)):
+        return str(o)
+    if dataclasses.is_dataclass(o) and not isinstance(o, type):
+        return dataclasses.asdict(o)
+    if hasattr(o, '__html__'):
+        return str(o.__html__())
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """
+    Serializa com orjson no caminho rápido (saída compacta) e usa o `json`
+    padrão para qualquer outra combinação de opções.
+
+    Diferenças conhecidas em relação ao `json` padrão: floats não finitos
+    (NaN/Infinity) viram `null` em vez de um JSON inválido, e floats em notação
+    científica saem sem zeros/sinal no expoente (1e-5 em vez de 1e-05). Os dois
+    formatos representam o mesmo número para qualquer parser.
+    """
+
+    default = staticmethod(_default)
+
+    def __init__(self, app) -> None:
+        super().__init__(app)
+        self._stdlib_endpoints: Dict[Optional[str], int] = {}
+
+    def _encode(self, obj: Any, default, sort_keys: bool, ensure_ascii: bool) -> Optional[bytes]:
+        """Saída do orjson, ou None quando ela não pode ser usada."""
+        option = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        try:
+            encoded = orjson.dumps(obj, default=default, option=option)
+        except (TypeError, orjson.JSONEncodeError):
+            # Inteiros acima de 64 bits, chaves não-string etc.
+            return None
+        if not ensure_ascii:
+            return encoded
+        if encoded.isascii():
+            # O `json` escapa o DEL mesmo com ensure_ascii
+            return encoded.replace(b'\x7f', b'\\u007f')
+        return None
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        default = kwargs.pop('default', self.default)
+        sort_keys = kwargs.pop('sort_keys', self.sort_keys)
+        ensure_ascii = kwargs.pop('ensure_ascii', self.ensure_ascii)
+        separators = kwargs.pop('separators', None)
+
+        if orjson is not None and not kwargs and separators == _COMPACT:
+            encoded = self._encode(obj, default, sort_keys, ensure_ascii)
+            if encoded is not None:
+                return encoded.decode('utf-8')
+
+        return json.dumps(
+            obj, default=default, sort_keys=sort_keys, ensure_ascii=ensure_ascii,
+            separators=separators, **kwargs
+        )
+
+    def response(self, *args: Any, **kwargs: Any) -> Response:
+        """Igual ao `jsonify` padrão, mas entrega os bytes do orjson sem decodificar."""
+        compact = not ((self.compact is None and self._app.debug) or self.compact is False)
+        if orjson is None or not compact:
+            return super().response(*args, **kwargs)
+
+        obj = self._prepare_response_obj(args, kwargs)
+        # Rotas cuja última resposta tinha acentos vão direto para o `json`
+        # padrão (com ensure_ascii ele é mais rápido); de tempos em tempos a
+        # rota é testada de novo com o orjson.
+        endpoint = request.endpoint if has_request_context() else None
+        skips = self._stdlib_endpoints.get(endpoint, 0)
+        encoded = None
+        if skips:
+            self._stdlib_endpoints[endpoint] = skips - 1
+        else:
+            encoded = self._encode(obj, self.default, self.sort_keys, self.ensure_ascii)
+            if encoded is None and endpoint is not None:
+                self._stdlib_endpoints[endpoint] = _STDLIB_RETRY_AFTER
+
+        if encoded is None:
+            encoded = json.dumps(
+                obj, default=self.default, sort_keys=self.sort_keys,
+                ensure_ascii=self.ensure_ascii, separators=_COMPACT
+            ).encode('utf-8')
+        return self._app.response_class(encoded + b'\n', mimetype=self.mimetype)
+
+    def loads(self, s, **kwargs: Any) -> Any:
+        if orjson is not None and not kwargs:
+            try:
+                return orjson.loads(s)
+            except orjson.JSONDecodeError:
+                # NaN, inteiros gigantes e outros casos que só o `json` aceita
+                pass
+        return json.loads(s, **kwargs)
+
+
+def init_json_provider(app) -> None:
+    """
+    Instala o provider configurado em JSON_PROVIDER ('auto', 'orjson' ou
+    'stdlib') e aplica JSON_ENSURE_ASCII.
+    """
+    choice = app.config.get('JSON_PROVIDER', 'auto')
+    if choice != 'stdlib':
+        if orjson is not None:
+            app.json = OrjsonProvider(app)
+        elif choice == 'orjson':
+            raise RuntimeError("JSON_PROVIDER=orjson, mas o pacote orjson não está instalado")
+
+    if not app.config.get('JSON_ENSURE_ASCII', True):
+        app.json.ensure_ascii = False
+        app.json.mimetype = 'application/json; charset=utf-8'
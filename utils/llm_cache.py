@@ -0,0 +1,231 @@
+# src/utils/llm_cache.py
+
+"""
+Cache endereçado por conteúdo para respostas de IA (GPT e Perplexity).
+
+Duas camadas: uma LRU em memória na frente de um arquivo SQLite local que
+sobrevive a reinícios do processo. Ambas expiram por TTL e descartam as
+entradas menos usadas quando passam do limite de tamanho.
+
+Cada thread usa a sua conexão SQLite (modo WAL), então leituras em disco não
+esperam umas pelas outras; o lock global protege só a LRU em memória e os
+contadores. O tamanho em disco é somado uma vez na abertura e mantido em um
+contador; a limpeza por tamanho só roda quando o contador passa de
+`disk_max_bytes` e recalcula o total (o arquivo pode ser compartilhado com
+outros processos).
+"""
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+
+class LLMCache:
+    """Cache LRU em memória + SQLite em disco para gerações de IA."""
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        ttl: float = 7 * 24 * 3600,
+        memory_max_entries: int = 256,
+        memory_max_bytes: int = 32 * 1024 * 1024,
+        disk_max_bytes: int = 512 * 1024 * 1024
+    ):
+        self.ttl = ttl
+        self.memory_max_entries = memory_max_entries
+        self.memory_max_bytes = memory_max_bytes
+        self.disk_max_bytes = disk_max_bytes
+
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self._metrics = {
+            'memory_hits': 0,
+            'disk_hits': 0,
+            'misses': 0,
+            'bypassed': 0,
+            'sets': 0,
+            'memory_evictions': 0,
+            'disk_evictions': 0,
+        }
+
+        self.path = path
+        self._local = threading.local()
+        # Só uma thread por vez faz a limpeza por tamanho; as demais seguem sem esperar
+        self._evict_lock = threading.Lock()
+        self._disk_bytes = 0
+        if path:
+            db = self._conn()
+            db.execute('''
+                CREATE TABLE IF NOT EXISTS llm_cache (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    expires_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )
+            ''')
+            db.execute('CREATE INDEX IF NOT EXISTS idx_llm_cache_last_access ON llm_cache (last_access)')
+            db.commit()
+            self._disk_bytes = db.execute('SELECT COALESCE(SUM(size), 0) FROM llm_cache').fetchone()[0]
+
+    def _conn(self) -> sqlite3.Connection:
+        """Conexão SQLite da thread atual (aberta na primeira chamada)."""
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=10)
+            db.execute('PRAGMA journal_mode=WAL')
+            db.execute('PRAGMA synchronous=NORMAL')
+            self._local.db = db
+        return db
+
+    @staticmethod
+    def make_key(provider: str, model: str, system_prompt: str, text: str, max_tokens: int) -> str:
+        """Hash de (provider, modelo, prompt de sistema, texto de entrada, limite de tokens)."""
+        raw = json.dumps([provider, model, system_prompt, text, max_tokens], ensure_ascii=False)
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Any:
+        """Retorna o valor em cache ou None."""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                value, size, expires_at = entry
+                if expires_at > now:
+                    self._memory.move_to_end(key)
+                    self._metrics['memory_hits'] += 1
+                    return json.loads(value)
+                self._drop_memory(key)
+
+            if not self.path:
+                self._metrics['misses'] += 1
+                return None
+
+        db = self._conn()
+        row = db.execute('SELECT value, size, expires_at FROM llm_cache WHERE key = ?', (key,)).fetchone()
+        if row is not None:
+            value, size, expires_at = row
+            if expires_at > now:
+                db.execute('UPDATE llm_cache SET last_access = ? WHERE key = ?', (now, key))
+                db.commit()
+                with self._lock:
+                    self._put_memory(key, value, size, expires_at)
+                    self._metrics['disk_hits'] += 1
+                return json.loads(value)
+            cursor = db.execute('DELETE FROM llm_cache WHERE key = ?', (key,))
+            db.commit()
+            if cursor.rowcount > 0:
+                with self._lock:
+                    self._disk_bytes -= size
+
+        with self._lock:
+            self._metrics['misses'] += 1
+        return None
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """Armazena um valor serializável em JSON nas duas camadas."""
+        ttl = self.ttl if ttl is None else ttl
+        now = time.time()
+        expires_at = now + ttl
+        serialized = json.dumps(value, ensure_ascii=False)
+        size = len(serialized.encode('utf-8'))
+
+        with self._lock:
+            self._metrics['sets'] += 1
+            self._put_memory(key, serialized, size, expires_at)
+
+        if not self.path or size > self.disk_max_bytes:
+            return
+        db = self._conn()
+        old = db.execute('SELECT size FROM llm_cache WHERE key = ?', (key,)).fetchone()
+        db.execute(
+            'INSERT OR REPLACE INTO llm_cache (key, value, size, expires_at, last_access) VALUES (?, ?, ?, ?, ?)',
+            (key, serialized, size, expires_at, now)
+        )
+        db.commit()
+        # Gravações concorrentes da mesma chave podem desviar o contador; a limpeza recalcula o total
+        with self._lock:
+            self._disk_bytes += size - (old[0] if old else 0)
+            over_limit = self._disk_bytes > self.disk_max_bytes
+        if over_limit and self._evict_lock.acquire(blocking=False):
+            try:
+                self._evict_disk(db, now)
+            finally:
+                self._evict_lock.release()
+
+    def record_bypass(self) -> None:
+        """Contabiliza uma requisição que pediu `no_cache`."""
+        with self._lock:
+            self._metrics['bypassed'] += 1
+
+    def _put_memory(self, key: str, value: str, size: int, expires_at: float) -> None:
+        if size > self.memory_max_bytes:
+            return
+        self._drop_memory(key)
+        self._memory[key] = (value, size, expires_at)
+        self._memory_bytes += size
+        while len(self._memory) > self.memory_max_entries or self._memory_bytes > self.memory_max_bytes:
+            _, (_, old_size, _) = self._memory.popitem(last=False)
+            self._memory_bytes -= old_size
+            self._metrics['memory_evictions'] += 1
+
+    def _drop_memory(self, key: str) -> None:
+        entry = self._memory.pop(key, None)
+        if entry is not None:
+            self._memory_bytes -= entry[1]
+
+    def _evict_disk(self, db: sqlite3.Connection, now: float) -> None:
+        """Remove expiradas e, se ainda passar do limite, as menos acessadas; ressincroniza o contador."""
+        expired = max(db.execute('DELETE FROM llm_cache WHERE expires_at <= ?', (now,)).rowcount, 0)
+        total = db.execute('SELECT COALESCE(SUM(size), 0) FROM llm_cache').fetchone()[0]
+        to_delete = []
+        if total > self.disk_max_bytes:
+            for key, size in db.execute('SELECT key, size FROM llm_cache ORDER BY last_access'):
+                if total <= self.disk_max_bytes:
+                    break
+                to_delete.append((key,))
+                total -= size
+            db.executemany('DELETE FROM llm_cache WHERE key = ?', to_delete)
+        db.commit()
+        with self._lock:
+            self._disk_bytes = total
+            self._metrics['disk_evictions'] += expired + len(to_delete)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            metrics = dict(self._metrics)
+            metrics['memory_entries'] = len(self._memory)
+            metrics['memory_bytes'] = self._memory_bytes
+            if self.path:
+                metrics['disk_bytes'] = self._disk_bytes
+        if self.path:
+            metrics['disk_entries'] = self._conn().execute('SELECT COUNT(*) FROM llm_cache').fetchone()[0]
+        hits = metrics['memory_hits'] + metrics['disk_hits']
+        lookups = hits + metrics['misses']
+        metrics['hit_rate'] = round(hits / lookups, 4) if lookups else 0.0
+        return metrics
+
+
+def init_llm_cache(app) -> Optional[LLMCache]:
+    """Cria o cache de IA a partir das configurações do app (ou None se desabilitado)."""
+    if not app.config.get('LLM_CACHE_ENABLED', True):
+        return None
+    return LLMCache(
+        path=app.config.get('LLM_CACHE_PATH'),
+        ttl=app.config.get('LLM_CACHE_TTL', 7 * 24 * 3600),
+        memory_max_entries=app.config.get('LLM_CACHE_MEMORY_ENTRIES', 256),
+        memory_max_bytes=app.config.get('LLM_CACHE_MEMORY_MB', 32) * 1024 * 1024,
+        disk_max_bytes=app.config.get('LLM_CACHE_DISK_MB', 512) * 1024 * 1024
+    )
+
+
+def get_llm_cache() -> Optional[LLMCache]:
+    """
+    Obtém o cache de IA da configuração da aplicação Flask
+    """
+    from flask import current_app
+    return current_app.config.get('LLM_CACHE')
@@ -0,0 +1,180 @@
+# src/utils/log.py
+
+"""
+Configuração central de logs.
+
+Cada módulo usa o seu logger (`logger = logging.getLogger(__name__)`, sob
+`src.`). `init_logging` configura esses loggers uma vez:
+
+- nível em LOG_LEVEL (padrão INFO); mensagens de depuração das rotas só são
+  formatadas com LOG_LEVEL=DEBUG;
+- formato em LOG_FORMAT: 'text' (uma linha legível) ou 'json' (um objeto por
+  linha);
+- cada requisição recebe um id (cabeçalho X-Request-ID do cliente ou um novo),
+  que aparece em todas as linhas e volta na resposta;
+- `preview(valor)` adia a serialização de payloads para o momento em que a
+  linha é de fato escrita e corta o texto em LOG_MAX_FIELD_CHARS caracteres;
+- mensagens abaixo de WARNING são amostradas: no máximo LOG_SAMPLE_PER_SECOND
+  linhas por segundo com o mesmo texto-modelo, e a próxima linha escrita
+  informa quantas foram suprimidas. Avisos e erros nunca são descartados.
+"""
+import json
+import logging
+import sys
+import threading
+import time
+import uuid
+from typing import Any, Dict, Optional, Tuple
+
+from flask import g, has_request_context, request
+
+ROOT_LOGGER = 'src'
+REQUEST_ID_HEADER = 'X-Request-ID'
+DEFAULT_MAX_FIELD_CHARS = 500
+TEXT_FORMAT = '%(asctime)s %(levelname)s [%(request_id)s] %(name)s: %(message)s'
+
+# Valor atual de LOG_MAX_FIELD_CHARS (definido em `init_logging`)
+_max_field_chars = DEFAULT_MAX_FIELD_CHARS
+
+
+class LogPreview:
+    """Argumento de log com serialização adiada e texto truncado (ver `preview`)."""
+    __slots__ = ('value', 'limit')
+
+    def __init__(self, value: Any, limit: Optional[int] = None):
+        self.value = value
+        self.limit = limit
+
+    def __str__(self) -> str:
+        value = self.value() if callable(self.value) else self.value
+        if isinstance(value, (dict, list, tuple)):
+            try:
+                value = json.dumps(value, ensure_ascii=False, default=str)
+            except (TypeError, ValueError):
+                value = repr(value)
+        elif not isinstance(value, str):
+            value = str(value)
+        limit = self.limit if self.limit is not None else _max_field_chars
+        if limit and len(value) > limit:
+            return f'{value[:limit]}... (+{len(value) - limit} caracteres)'
+        return value
+
+    __repr__ = __str__
+
+
+def preview(value: Any, limit: Optional[int] = None) -> LogPreview:
+    """
+    Embrulha um payload para o log: `value` pode ser um objeto qualquer ou uma
+    função sem argumentos (ex.: `response.model_dump_json`), chamada só se a
+    linha for escrita. O texto é cortado em `limit` (padrão LOG_MAX_FIELD_CHARS).
+    """
+    return LogPreview(value, limit)
+
+
+def current_request_id() -> str:
+    """Id da requisição atual ('-' fora de uma requisição)."""
+    if has_request_context():
+        return g.get('request_id', '-')
+    return '-'
+
+
+class RequestIdFilter(logging.Filter):
+    """Adiciona `request_id` a cada registro."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = current_request_id()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Limita registros abaixo de WARNING a `per_second` por segundo para cada
+    (logger, texto-modelo). Os descartados são contados e informados na
+    próxima linha escrita com o mesmo modelo.
+    """
+
+    def __init__(self, per_second: int):
+        super().__init__()
+        self.per_second = per_second
+        self._windows: Dict[Tuple[str, str], list] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.per_second <= 0 or record.levelno >= logging.WARNING:
+            return True
+        key = (record.name, str(record.msg))
+        second = int(time.monotonic())
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or window[0] != second:
+                suppressed = window[2] if window else 0
+                window = self._windows[key] = [second, 0, suppressed]
+                if len(self._windows) > 10000:
+                    # Modelos antigos não são mais usados
+                    self._windows = {key: window}
+            if window[1] >= self.per_second:
+                window[2] += 1
+                return False
+            window[1] += 1
+            suppressed, window[2] = window[2], 0
+        if suppressed:
+            record.msg = f'{record.msg} (+{suppressed} linhas semelhantes suprimidas)'
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """Um objeto JSON por linha."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'request_id': getattr(record, 'request_id', '-'),
+            'message': record.getMessage(),
+        }
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+def _assign_request_id():
+    incoming = request.headers.get(REQUEST_ID_HEADER, '')
+    # Ids do cliente são aceitos se forem curtos e imprimíveis
+    if incoming and len(incoming) <= 128 and incoming.isprintable():
+        g.request_id = incoming
+    else:
+        g.request_id = uuid.uuid4().hex[:16]
+
+
+def _echo_request_id(response):
+    request_id = g.get('request_id')
+    if request_id:
+        response.headers[REQUEST_ID_HEADER] = request_id
+    return response
+
+
+def init_logging(app) -> logging.Logger:
+    """
+    Configura os loggers `src.*` com LOG_LEVEL, LOG_FORMAT,
+    LOG_MAX_FIELD_CHARS e LOG_SAMPLE_PER_SECOND e registra o id de requisição.
+    """
+    global _max_field_chars
+    _max_field_chars = app.config.get('LOG_MAX_FIELD_CHARS', DEFAULT_MAX_FIELD_CHARS)
+
+    handler = logging.StreamHandler(sys.stdout)
+    if app.config.get('LOG_FORMAT', 'text') == 'json':
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(logging.Formatter(TEXT_FORMAT))
+    handler.addFilter(RequestIdFilter())
+    handler.addFilter(SamplingFilter(app.config.get('LOG_SAMPLE_PER_SECOND', 20)))
+
+    logger = logging.getLogger(ROOT_LOGGER)
+    logger.setLevel(str(app.config.get('LOG_LEVEL', 'INFO')).upper())
+    logger.handlers = [handler]
+    logger.propagate = False
+
+    app.before_request(_assign_request_id)
+    app.after_request(_echo_request_id)
+    return logger
@@ -0,0 +1,60 @@
+# src/utils/markdown_sections.py
+
+"""
+Divisão de textos em markdown pelas seções de título (#, ##, ...).
+"""
+import re
+from typing import Dict, List
+
+_HEADING_RE = re.compile(r'^[ \t]{0,3}(#{1,6})[ \t]+(.+?)[ \t#]*$')
+_FENCE_RE = re.compile(r'^[ \t]{0,3}(```|~~~)')
+
+
+def split_markdown_sections(content: str, min_chars: int = 0) -> List[Dict[str, str]]:
+    """
+    Divide o markdown em seções, cada uma começando no seu título.
+
+    Títulos dentro de blocos de código são ignorados. Seções com menos de
+    `min_chars` caracteres são juntadas à seção seguinte, para não gerar
+    chamadas de IA com pouquíssimo texto.
+
+    Returns:
+        Lista de {'title': ..., 'content': ...} na ordem do texto. O texto antes
+        do primeiro título vira uma seção com título vazio.
+    """
+    sections: List[Dict[str, str]] = []
+    title, lines = '', []
+    in_fence = False
+
+    for line in content.splitlines(keepends=True):
+        if _FENCE_RE.match(line):
+            in_fence = not in_fence
+        heading = None if in_fence else _HEADING_RE.match(line.rstrip('\r\n'))
+        if heading:
+            if ''.join(lines).strip():
+                sections.append({'title': title, 'content': ''.join(lines).strip()})
+            title, lines = heading.group(2).strip(), []
+        lines.append(line)
+
+    if ''.join(lines).strip():
+        sections.append({'title': title, 'content': ''.join(lines).strip()})
+
+    if min_chars <= 0:
+        return sections
+
+    merged: List[Dict[str, str]] = []
+    pending = None
+    for section in sections:
+        if pending:
+            section = {'title': pending['title'] or section['title'], 'content': f"{pending['content']}\n\n{section['content']}"}
+            pending = None
+        if len(section['content']) < min_chars:
+            pending = section
+        else:
+            merged.append(section)
+    if pending:
+        if merged:
+            merged[-1]['content'] += f"\n\n{pending['content']}"
+        else:
+            merged.append(pending)
+    return merged
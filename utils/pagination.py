@@ -0,0 +1,90 @@
+# src/utils/pagination.py
+
+"""
+Paginação por cursor (keyset) para consultas do Supabase/PostgREST.
+
+O cursor é opaco para o cliente: codifica em base64 os valores de ordenação
+(`updated_at`, `id`) da última linha entregue. Linhas com a coluna de ordenação
+nula vêm por último (ordenadas por `id`); o cursor de uma delas guarda `null`.
+"""
+import base64
+import json
+import re
+from typing import Iterable, List, Optional, Tuple
+
+_IDENTIFIER_RE = re.compile(r'^[a-z_][a-z0-9_]*$')
+
+
+def encode_cursor(sort_value, row_id) -> str:
+    raw = json.dumps([sort_value, row_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    """
+    Raises:
+        ValueError: se o cursor não tiver sido gerado por `encode_cursor`.
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        sort_value, row_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except Exception:
+        raise ValueError('Cursor inválido')
+    return sort_value, row_id
+
+
+def _quote(value) -> str:
+    # Aspas protegem vírgulas, parênteses e ':' dentro do filtro `or` do PostgREST
+    return '"' + str(value).replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+
+def apply_keyset(query, cursor: Optional[str], sort_column: str = 'updated_at', id_column: str = 'id'):
+    """
+    Ordena a consulta por (`sort_column`, `id_column`), com os nulos no fim, e,
+    se houver cursor, filtra as linhas estritamente depois dele.
+    """
+    if cursor:
+        sort_value, row_id = decode_cursor(cursor)
+        if sort_value is None:
+            # Já no trecho de nulos: só falta o restante dele
+            query = query.is_(sort_column, 'null').gt(id_column, row_id)
+        else:
+            query = query.or_(
+                f'{sort_column}.gt.{_quote(sort_value)},'
+                f'and({sort_column}.eq.{_quote(sort_value)},{id_column}.gt.{_quote(row_id)}),'
+                f'{sort_column}.is.null'
+            )
+    return query.order(sort_column, nullsfirst=False).order(id_column)
+
+
+def page_result(rows: List[dict], limit: int, sort_column: str = 'updated_at', id_column: str = 'id'):
+    """
+    Recebe até `limit + 1` linhas e devolve (itens da página, next_cursor, has_more).
+    `next_cursor` aponta para a última linha entregue (ou é None se a página vier vazia).
+    """
+    has_more = len(rows) > limit
+    items = rows[:limit]
+    next_cursor = None
+    if items:
+        last = items[-1]
+        next_cursor = encode_cursor(last.get(sort_column), last.get(id_column))
+    return items, next_cursor, has_more
+
+
+def parse_fields(fields: Optional[str], required: Iterable[str] = ()) -> Optional[List[str]]:
+    """
+    Converte `fields=a,b,c` em lista de colunas, sempre incluindo as `required`.
+
+    Raises:
+        ValueError: se algum nome de coluna for inválido.
+    """
+    if not fields:
+        return None
+    columns = [column.strip() for column in fields.split(',') if column.strip()]
+    for column in columns:
+        if not _IDENTIFIER_RE.match(column):
+            raise ValueError(f'Campo inválido: {column}')
+    for column in required:
+        if column not in columns:
+            columns.append(column)
+    return columns
@@ -0,0 +1,147 @@
+# src/utils/payload_transcoder.py
+
+"""
+Conversão dos payloads de sincronização vindos do cliente (camelCase, datas em
+milissegundos) para o formato das tabelas do Supabase (snake_case, ISO 8601).
+
+Para as tabelas conhecidas, um esquema pré-compilado traduz as chaves com um
+único lookup em dicionário e só converte datas nas colunas de timestamp. Chaves
+desconhecidas (e valores aninhados) continuam passando pela lógica antiga de
+`convert_payload`.
+"""
+import re
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterable
+
+
+def camel_to_snake(name):
+    s1 = re.sub('(.)([A-Z][a-z]+)', r'\1_\2', name)
+    return re.sub('([a-z0-9])([A-Z])', r'\1_\2', s1).lower()
+
+# --- INÍCIO DA NOVA LÓGICA DE CONVERSÃO CORRIGIDA ---
+def convert_value(value):
+    """Tenta converter um valor de timestamp em milissegundos para string ISO 8601."""
+    # Verifica se o valor é um inteiro ou float e se parece um timestamp em ms (maior que o ano 2001)
+    if isinstance(value, (int, float)) and value > 1000000000000:
+        try:
+            # Converte de milissegundos para segundos, cria o objeto datetime com fuso horário UTC
+            # e formata para a string ISO 8601 que o Supabase/PostgreSQL entende.
+            return datetime.fromtimestamp(value / 1000, tz=timezone.utc).isoformat()
+        except (ValueError, TypeError):
+            # Se a conversão falhar por qualquer motivo, retorna o valor original sem quebrar.
+            return value
+    return value
+
+def convert_payload(data):
+    """
+    Converte recursivamente as chaves do payload para snake_case e os
+    valores de timestamp em milissegundos para strings ISO 8601.
+    """
+    if isinstance(data, dict):
+        new_dict = {}
+        for k, v in data.items():
+            new_key = camel_to_snake(k)
+            # A conversão de valor é aplicada dentro da chamada recursiva
+            new_value = convert_payload(v)
+            new_dict[new_key] = new_value
+        return new_dict
+    if isinstance(data, list):
+        return [convert_payload(i) for i in data]
+
+    # Aplica a conversão de valor para itens que não são dicionários ou listas
+    return convert_value(data)
+# --- FIM DA NOVA LÓGICA DE CONVERSÃO CORRIGIDA ---
+
+
+def snake_to_camel(name: str) -> str:
+    head, *rest = name.split('_')
+    return head + ''.join(part.capitalize() for part in rest)
+
+
+# Chaves fora dos esquemas: a tradução por regex é feita uma vez por chave distinta
+_cached_camel_to_snake = lru_cache(maxsize=4096)(camel_to_snake)
+
+
+class TableSchema:
+    """Mapa camelCase→snake_case e colunas de timestamp de uma tabela."""
+
+    __slots__ = ('table', 'key_map', 'timestamp_columns')
+
+    def __init__(self, table: str, columns: Iterable[str], timestamp_columns: Iterable[str]):
+        self.table = table
+        self.timestamp_columns: FrozenSet[str] = frozenset(timestamp_columns)
+        self.key_map: Dict[str, str] = {}
+        for column in set(columns) | self.timestamp_columns:
+            self.key_map[snake_to_camel(column)] = column
+            self.key_map[column] = column
+
+
+_COMMON_COLUMNS = ('id', 'user_id')
+_COMMON_TIMESTAMPS = ('created_at', 'updated_at', 'deleted_at')
+_REVIEW_COLUMNS = (
+    'review_count', 'difficulty_rating', 'ease_factor', 'interval_days',
+    'last_weight_multiplier', 'is_completed',
+)
+_REVIEW_TIMESTAMPS = _COMMON_TIMESTAMPS + ('last_reviewed', 'next_review')
+
+TABLE_SCHEMAS: Dict[str, TableSchema] = {
+    schema.table: schema for schema in (
+        TableSchema('subjects', _COMMON_COLUMNS + (
+            'name', 'description', 'color', 'icon', 'parent_id', 'incidence_weight', 'position',
+        ), _COMMON_TIMESTAMPS),
+        TableSchema('summaries', _COMMON_COLUMNS + (
+            'subject_id', 'title', 'content', 'original_query', 'perplexity_response',
+            'perplexity_citations', 'tags', 'is_favorite', 'image_url', 'extracted_text',
+            'difficulty_level',
+        ), _COMMON_TIMESTAMPS),
+        TableSchema('review_sessions', _COMMON_COLUMNS + ('summary_id',) + _REVIEW_COLUMNS, _REVIEW_TIMESTAMPS),
+        TableSchema('study_decks', _COMMON_COLUMNS + (
+            'name', 'description', 'color', 'is_active', 'deck_settings',
+            'review_frequency_days', 'auto_advance',
+        ), _COMMON_TIMESTAMPS),
+        TableSchema('deck_summaries', ('id', 'deck_id', 'summary_id', 'position'), _COMMON_TIMESTAMPS),
+        TableSchema('study_statistics', _COMMON_COLUMNS + (
+            'summaries_created', 'summaries_reviewed', 'total_study_time_ms', 'subjects_studied',
+        ), ('date', 'created_at', 'updated_at')),
+        TableSchema('flashcard_decks', _COMMON_COLUMNS + ('subject_id', 'name', 'description'), _COMMON_TIMESTAMPS),
+        TableSchema('flashcards', _COMMON_COLUMNS + (
+            'deck_id', 'summary_id', 'exercise_id', 'question', 'answer',
+        ), _COMMON_TIMESTAMPS),
+        TableSchema('flashcard_review_sessions', _COMMON_COLUMNS + ('flashcard_id',) + _REVIEW_COLUMNS, _REVIEW_TIMESTAMPS),
+        TableSchema('exercises', _COMMON_COLUMNS + (
+            'subject_id', 'summary_id', 'statement', 'options', 'answer', 'original_text',
+        ), _COMMON_TIMESTAMPS),
+        TableSchema('exercise_sessions', _COMMON_COLUMNS + (
+            'exercise_id', 'subject_id', 'summary_id', 'selected_option', 'is_correct',
+        ), _COMMON_TIMESTAMPS + ('answered_at',)),
+    )
+}
+
+
+def transcode_payload(table_name: str, payload):
+    """
+    Converte o payload de uma mudança em uma única passada.
+
+    Colunas conhecidas são traduzidas pelo esquema da tabela; somente as de
+    timestamp têm números em milissegundos convertidos para ISO 8601. Chaves
+    desconhecidas, valores aninhados e tabelas sem esquema usam `convert_payload`.
+    """
+    schema = TABLE_SCHEMAS.get(table_name)
+    if schema is None or not isinstance(payload, dict):
+        return convert_payload(payload)
+
+    key_map = schema.key_map
+    timestamp_columns = schema.timestamp_columns
+    converted = {}
+    for key, value in payload.items():
+        column = key_map.get(key)
+        if column is None:
+            converted[_cached_camel_to_snake(key)] = convert_payload(value)
+        elif isinstance(value, (dict, list)):
+            converted[column] = convert_payload(value)
+        elif column in timestamp_columns:
+            converted[column] = convert_value(value)
+        else:
+            converted[column] = value
+    return converted
@@ -0,0 +1,157 @@
+# src/utils/review_batch.py
+
+"""
+Base comum de `/api/reviews/complete-batch` e `/api/flashcard-reviews/complete-batch`.
+
+Um lote de notas é processado em três fases:
+
+1. as sessões (e os dados de acoplamento) de todos os itens são lidas com
+   consultas `in_()`;
+2. a próxima revisão é calculada com a RPC `calculate_srs_update_v2`, uma
+   chamada por item em paralelo (ela não tem versão em lote);
+3. as sessões atualizadas são gravadas com upserts em bloco.
+
+Cada item recebe o seu próprio resultado, na ordem em que foi enviado.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List
+
+from flask import current_app
+
+from src.utils.srs_engine import call_srs_rpc
+
+logger = logging.getLogger(__name__)
+
+REVIEW_BATCH_MAX_ITEMS = 500
+
+
+def parse_grade_items(data, id_field: str) -> List[dict]:
+    """
+    Valida o corpo do lote (lista de {id_field, difficulty_rating, ...}).
+
+    Returns:
+        Uma entrada por item: {'index', 'item_id', 'grade', 'item', 'error'}.
+        Itens inválidos ou repetidos vêm com `error` preenchido.
+
+    Raises:
+        ValueError: se o corpo não for uma lista ou passar do limite de itens.
+    """
+    if not isinstance(data, list):
+        raise ValueError('O corpo da requisição deve ser uma lista')
+    if len(data) > REVIEW_BATCH_MAX_ITEMS:
+        raise ValueError(f'O lote pode ter no máximo {REVIEW_BATCH_MAX_ITEMS} itens')
+
+    entries = []
+    seen = set()
+    for index, item in enumerate(data):
+        entry = {'index': index, 'item_id': None, 'grade': None, 'item': item, 'error': None}
+        entries.append(entry)
+        if not isinstance(item, dict) or not item.get(id_field) or item.get('difficulty_rating') is None:
+            entry['error'] = f'{id_field} e difficulty_rating são obrigatórios'
+            continue
+        entry['item_id'] = item[id_field]
+        try:
+            entry['grade'] = int(item['difficulty_rating'])
+        except (TypeError, ValueError):
+            entry['error'] = 'difficulty_rating deve ser um número inteiro'
+            continue
+        if entry['item_id'] in seen:
+            entry['error'] = 'Item repetido no lote'
+            continue
+        seen.add(entry['item_id'])
+    return entries
+
+
+def fetch_sessions(supabase, table: str, user_id: str, id_column: str, item_ids: Iterable[str]) -> Dict[str, dict]:
+    """Sessões de revisão do usuário indexadas por `id_column`, em uma consulta."""
+    item_ids = list(item_ids)
+    if not item_ids:
+        return {}
+    rows = supabase.table(table).select('*').eq('user_id', user_id).in_(id_column, item_ids).execute().data or []
+    sessions = {}
+    for row in rows:
+        sessions.setdefault(row[id_column], row)
+    return sessions
+
+
+def run_srs_updates(supabase, entries: List[dict], build_params: Callable[[dict], dict], max_workers: int) -> None:
+    """
+    Calcula a próxima revisão de cada entrada válida e guarda o resultado em
+    `entry['srs']` (ou a falha em `entry['error']`).
+
+    `build_params(entry)` monta os parâmetros da RPC `calculate_srs_update_v2`;
+    as chamadas rodam em paralelo.
+    """
+    pending = [entry for entry in entries if entry['error'] is None]
+    if not pending:
+        return
+    params = [build_params(entry) for entry in pending]
+
+    # As threads do pool não têm contexto da aplicação: a configuração é lida aqui
+    record_path = current_app.config.get('SRS_RECORD_PATH')
+
+    def safe_calculate(job):
+        entry, item_params = job
+        try:
+            return call_srs_rpc(supabase, item_params, entry['session'], record_path), None
+        except Exception as e:
+            return None, str(e)
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(pending)))) as executor:
+        for entry, (srs_data, error) in zip(pending, executor.map(safe_calculate, zip(pending, params))):
+            if error is not None:
+                entry['error'] = error
+            elif not srs_data:
+                entry['error'] = 'Falha ao calcular a atualização do SRS'
+            else:
+                entry['srs'] = srs_data
+
+
+def write_sessions(supabase, table: str, entries: List[dict], chunk_size: int) -> None:
+    """
+    Grava `entry['row']` (linha completa da sessão, com as colunas obrigatórias)
+    com upserts de até `chunk_size` linhas. Se um bloco falhar, as linhas são
+    repetidas uma a uma para isolar as que têm erro. A linha gravada fica em
+    `entry['saved']`.
+    """
+    ready = [entry for entry in entries if entry['error'] is None and entry.get('row')]
+    for start in range(0, len(ready), max(1, chunk_size)):
+        chunk = ready[start:start + chunk_size]
+        try:
+            response = supabase.table(table).upsert([entry['row'] for entry in chunk]).execute()
+            saved = {row.get('id'): row for row in response.data or []}
+        except Exception as e:
+            logger.warning('Falha no upsert em bloco de %d sessões em %s (%s); repetindo linha a linha', len(chunk), table, e)
+            saved = {}
+            for entry in chunk:
+                try:
+                    response = supabase.table(table).upsert(entry['row']).execute()
+                    for row in response.data or []:
+                        saved[row.get('id')] = row
+                except Exception as row_error:
+                    entry['error'] = str(row_error)
+
+        for entry in chunk:
+            if entry['error'] is not None:
+                continue
+            row = saved.get(entry['row']['id'])
+            if row is None:
+                entry['error'] = 'Falha ao gravar, verifique as permissões (RLS).'
+            else:
+                entry['saved'] = row
+
+
+def batch_results(entries: List[dict], id_field: str) -> List[dict]:
+    """Resultado por item, na ordem recebida."""
+    results = []
+    for entry in entries:
+        if entry['error'] is None and 'saved' in entry:
+            results.append({id_field: entry['item_id'], 'status': 'success', 'review_session': entry['saved']})
+        else:
+            results.append({
+                id_field: entry['item_id'],
+                'status': 'failed',
+                'error': entry['error'] or 'Item não processado'
+            })
+    return results
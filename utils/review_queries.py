@@ -0,0 +1,88 @@
+# src/utils/review_queries.py
+
+"""
+Parâmetros e paginação das listas de revisões pendentes
+(`/api/reviews/pending` e `/api/flashcard-reviews/pending`).
+
+- `view=compact`: só ids, título, matéria (nome e cor) e `next_review`; o
+  conteúdo completo é buscado depois, item a item.
+- `limit` / `cursor`: paginação por cursor ordenada por (`next_review`, `id`).
+  Sem esses parâmetros a lista vem inteira, como antes.
+
+Com o índice de vencimentos em memória (`utils/due_queue.py`) ligado, o total
+de pendências vem dele e usuários sem nada vencido não geram consulta.
+"""
+from typing import Optional, Tuple
+
+from src.utils.due_queue import get_due_index
+from src.utils.pagination import apply_keyset, decode_cursor, page_result
+
+PENDING_MAX_LIMIT = 500
+PENDING_VIEWS = ('full', 'compact')
+
+
+def parse_pending_args(args) -> Tuple[str, Optional[str], Optional[int]]:
+    """
+    Lê `view`, `cursor` e `limit` da query string.
+
+    Returns:
+        (view, cursor, limit); `limit` é None quando a lista não é paginada.
+
+    Raises:
+        ValueError: parâmetro inválido.
+    """
+    view = args.get('view', 'full')
+    if view not in PENDING_VIEWS:
+        raise ValueError(f'view deve ser um de: {", ".join(PENDING_VIEWS)}')
+
+    cursor = args.get('cursor') or None
+    if cursor:
+        decode_cursor(cursor)
+
+    limit = args.get('limit')
+    if limit is None:
+        # Um cursor sem limit continua paginando com o tamanho máximo
+        return view, cursor, PENDING_MAX_LIMIT if cursor else None
+    try:
+        limit = int(limit)
+    except ValueError:
+        raise ValueError('limit deve ser um número inteiro')
+    return view, cursor, max(1, min(limit, PENDING_MAX_LIMIT))
+
+
+def pending_due_total(supabase, user_id: str, kind: str) -> Optional[int]:
+    """Quantidade de itens vencidos pelo índice em memória (None se desligado)."""
+    due_index = get_due_index()
+    if due_index is None:
+        return None
+    return due_index.due_count(supabase, user_id, (kind,))
+
+
+def fetch_pending(query, cursor: Optional[str], limit: Optional[int], due_total: Optional[int] = None):
+    """
+    Executa a consulta de pendências (já filtrada, sem `order`).
+
+    Args:
+        due_total: total de itens vencidos já conhecido pelo índice em memória.
+            Com 0 a consulta nem é feita; paginado, vira o `total_pending`.
+
+    Returns:
+        (itens, total_pending, next_cursor, has_more). Paginado e sem o índice,
+        `total_pending` conta os itens pendentes a partir do cursor (na primeira
+        página, o total).
+    """
+    if due_total == 0:
+        return [], 0, None, False
+
+    if limit is None:
+        rows = query.order('next_review', desc=False).execute().data or []
+        return rows, len(rows), None, False
+
+    response = apply_keyset(query, cursor, sort_column='next_review').limit(limit + 1).execute()
+    rows = response.data or []
+    items, next_cursor, has_more = page_result(rows, limit, sort_column='next_review')
+    if due_total is not None:
+        total = due_total
+    else:
+        total = response.count if response.count is not None else len(items)
+    return items, total, next_cursor, has_more
@@ -0,0 +1,157 @@
+# src/utils/session_scheduler.py
+
+"""
+Montagem da sessão de revisão de resumos (`/api/reviews/session/start`).
+
+Em vez de pegar os `limit` itens vencidos há mais tempo, os candidatos
+vencidos são lidos uma vez com uma projeção compacta, recebem uma prioridade
+e os `k` melhores são escolhidos com um heap (`heapq.nlargest`, O(n log k)).
+Só as linhas escolhidas são buscadas depois com todas as colunas.
+
+A prioridade padrão multiplica três fatores, cada um elevado a um expoente
+configurável em SESSION_PRIORITY (formato "weight=1,overdue=1,difficulty=0.5"):
+
+- weight: `incidence_weight` do resumo (ou da matéria; 1 se nenhum);
+- overdue: 1 + dias de atraso / intervalo atual (atraso relativo);
+- difficulty: `difficulty_level` do resumo (3 se vazio).
+
+Com todos os expoentes em 0 a ordem volta a ser só por `next_review`.
+
+Em backlogs grandes a leitura dos candidatos para em SESSION_MAX_CANDIDATES
+linhas ou quando o orçamento de SESSION_CANDIDATE_BUDGET_MS acaba; como as
+páginas vêm por `next_review`, ficam de fora os itens vencidos mais recentes.
+"""
+import heapq
+import math
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+
+from flask import current_app
+
+from src.utils.due_queue import parse_timestamp
+
+SESSION_CANDIDATE_SELECT = (
+    'id, summary_id, next_review, interval_days, '
+    'summaries!inner (subject_id, difficulty_level, incidence_weight, subjects (incidence_weight))'
+)
+SESSION_CANDIDATE_PAGE_SIZE = 500
+PRIORITY_FACTORS = ('weight', 'overdue', 'difficulty')
+DEFAULT_PRIORITY_EXPONENTS = {'weight': 1.0, 'overdue': 1.0, 'difficulty': 0.5}
+
+SECONDS_PER_DAY = 24 * 3600
+
+
+def parse_priority_exponents(value: Optional[str]) -> Dict[str, float]:
+    """
+    Lê SESSION_PRIORITY ("weight=1,overdue=1,difficulty=0.5"); fatores
+    omitidos mantêm o expoente padrão.
+
+    Raises:
+        ValueError: fator desconhecido ou expoente inválido.
+    """
+    exponents = dict(DEFAULT_PRIORITY_EXPONENTS)
+    for item in (value or '').split(','):
+        if '=' not in item:
+            continue
+        name, _, exponent = item.partition('=')
+        name = name.strip()
+        if name not in PRIORITY_FACTORS:
+            raise ValueError(f'Fator de prioridade desconhecido: {name}')
+        exponents[name] = float(exponent)
+    return exponents
+
+
+def _positive(value, default: float) -> float:
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return default
+    return value if value > 0 else default
+
+
+def candidate_factors(row: dict, now: float) -> Dict[str, float]:
+    """Fatores de prioridade de uma sessão candidata (linha da projeção compacta)."""
+    summary = row.get('summaries') or {}
+    subject = summary.get('subjects') or {}
+    weight = summary.get('incidence_weight')
+    if weight is None:
+        weight = subject.get('incidence_weight')
+
+    due_at = parse_timestamp(row.get('next_review'))
+    overdue_days = max(0.0, (now - due_at) / SECONDS_PER_DAY) if due_at is not None else 0.0
+    interval = _positive(row.get('interval_days'), 1.0)
+
+    return {
+        'weight': _positive(weight, 1.0),
+        'overdue': 1.0 + overdue_days / interval,
+        'difficulty': _positive(summary.get('difficulty_level'), 3.0),
+    }
+
+
+def make_priority(exponents: Dict[str, float]) -> Callable[[dict, float], float]:
+    """Função de prioridade (maior = estudar antes) a partir dos expoentes."""
+    active = [(name, exponent) for name, exponent in exponents.items() if exponent]
+
+    def priority(row: dict, now: float) -> float:
+        factors = candidate_factors(row, now)
+        # Soma de logaritmos: mesma ordem do produto, sem estourar com expoentes altos
+        return sum(exponent * math.log(factors[name]) for name, exponent in active)
+
+    return priority
+
+
+def get_session_priority() -> Callable[[dict, float], float]:
+    """Prioridade configurada em SESSION_PRIORITY na aplicação Flask."""
+    return make_priority(parse_priority_exponents(current_app.config.get('SESSION_PRIORITY')))
+
+
+def subject_subtree_ids(supabase, subject_id: str) -> List[str]:
+    """A matéria e todas as descendentes (RPC `get_subject_and_descendant_ids`)."""
+    response = supabase.rpc('get_subject_and_descendant_ids', {'start_subject_id': subject_id}).execute()
+    return [item['id'] for item in response.data or []] or [subject_id]
+
+
+def fetch_candidates(supabase, user_id: str, subject_ids: Optional[List[str]] = None,
+                     max_candidates: int = 2000, budget_seconds: float = 0.8) -> Tuple[List[dict], bool]:
+    """
+    Sessões de resumo vencidas do usuário, por `next_review`, em páginas.
+
+    Returns:
+        (candidatos, truncado); truncado indica que o limite de linhas ou o
+        orçamento de tempo acabou antes do fim dos itens vencidos.
+    """
+    deadline = time.monotonic() + budget_seconds
+    candidates: List[dict] = []
+    while len(candidates) < max_candidates:
+        page_size = min(SESSION_CANDIDATE_PAGE_SIZE, max_candidates - len(candidates))
+        query = (
+            supabase.table('review_sessions')
+            .select(SESSION_CANDIDATE_SELECT)
+            .eq('user_id', user_id)
+            .eq('is_completed', False)
+            .lte('next_review', 'now()')
+            .is_('summaries.deleted_at', None)
+        )
+        if subject_ids:
+            query = query.in_('summaries.subject_id', subject_ids)
+        offset = len(candidates)
+        rows = query.order('next_review').order('id') \
+            .range(offset, offset + page_size - 1).execute().data or []
+        candidates.extend(rows)
+        if len(rows) < page_size:
+            return candidates, False
+        if time.monotonic() >= deadline:
+            break
+    return candidates, True
+
+
+def select_top_k(candidates: List[dict], k: int,
+                 priority: Callable[[dict, float], float], now: Optional[float] = None) -> List[dict]:
+    """
+    Os `k` candidatos de maior prioridade, do maior para o menor. Empates
+    mantêm a ordem de entrada (por `next_review`).
+    """
+    if now is None:
+        now = datetime.now(timezone.utc).timestamp()
+    return heapq.nlargest(k, candidates, key=lambda row: priority(row, now))
@@ -0,0 +1,252 @@
+# src/utils/srs_engine.py
+
+"""
+Cálculo de SRS (repetição espaçada): chamada da RPC `calculate_srs_update_v2`
+e uma aproximação local dela.
+
+As rotas usam sempre a RPC (`calculate_srs_update` / `call_srs_rpc`). O SQL da
+RPC não está neste repositório: `schedule` e `schedule_batch` são uma
+reconstrução NÃO verificada (SM-2 com pesos de acoplamento estimados) e não
+são usadas pelas rotas até existirem gravações da RPC que confirmem a
+paridade. A reconstrução supõe:
+
+- a nota do app vai de 1 (fácil) a 5 (difícil) e vira a qualidade `q = 6 - nota`;
+- o fator de facilidade é ajustado por `0.1 - (5 - q) * (0.08 + (5 - q) * 0.02)`,
+  com mínimo de 1.3;
+- o intervalo base é 1 dia para `q < 3` e na primeira revisão, 6 dias na
+  segunda e `intervalo anterior * facilidade` a partir daí;
+- o intervalo base é multiplicado pelo peso de acoplamento: a nota média dos
+  flashcards da sessão (resumos) ou a nota do resumo pai (flashcards), e a taxa
+  de acerto dos exercícios. Os coeficientes abaixo (COUPLING_WEIGHT,
+  EXERCISE_WEIGHT, limites do multiplicador e MAX_INTERVAL_DAYS) são
+  estimativas, não valores lidos da RPC.
+
+Com SRS_RECORD_PATH configurado, cada chamada à RPC é gravada (entradas, estado
+da sessão e saída) em JSONL; `benchmarks/bench_srs_engine.py --parity <arquivo>`
+compara essas gravações com a aproximação local.
+
+`schedule_batch` é a versão vetorizada com NumPy (opcional); sem o pacote, os
+itens são calculados um a um com o mesmo resultado.
+"""
+import json
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Sequence
+
+from flask import current_app
+
+logger = logging.getLogger(__name__)
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - dependência opcional
+    np = None
+
+# Estimativas da reconstrução (não conferidas com o SQL da RPC)
+DEFAULT_EASE = 2.5
+MIN_EASE = 1.3
+MAX_INTERVAL_DAYS = 365
+COUPLING_WEIGHT = 0.1
+EXERCISE_WEIGHT = 0.2
+MIN_WEIGHT_MULTIPLIER = 0.7
+MAX_WEIGHT_MULTIPLIER = 1.3
+
+_record_lock = threading.Lock()
+
+
+def _as_dict(data) -> Optional[dict]:
+    # A rota de flashcards envia o acoplamento já serializado em JSON
+    if isinstance(data, str):
+        try:
+            data = json.loads(data)
+        except ValueError:
+            return None
+    return data if isinstance(data, dict) else None
+
+
+def _mean_grade(values) -> Optional[float]:
+    grades = [float(value) for value in values if isinstance(value, (int, float)) and not isinstance(value, bool)]
+    return sum(grades) / len(grades) if grades else None
+
+
+def coupling_grade(coupling_data) -> Optional[float]:
+    """
+    Nota (1 a 5) que acopla o item aos itens relacionados.
+
+    Aceita `{"summaryGrade": n}` (flashcards), um dicionário de notas por
+    flashcard ou uma lista de notas (`session_card_grades` dos resumos).
+    """
+    if isinstance(coupling_data, list):
+        return _mean_grade(coupling_data)
+    data = _as_dict(coupling_data)
+    if not data:
+        return None
+    if data.get('summaryGrade') is not None:
+        return float(data['summaryGrade'])
+    grades = data.get('grades', data)
+    return _mean_grade(grades.values() if isinstance(grades, dict) else grades)
+
+
+def exercise_ratio(exercise_data) -> Optional[float]:
+    """Taxa de acerto dos exercícios (0 a 1), ou None sem exercícios."""
+    data = _as_dict(exercise_data)
+    if not data:
+        return None
+    correct = data.get('correct_count') or 0
+    incorrect = data.get('incorrect_count') or 0
+    total = correct + incorrect
+    return correct / total if total else None
+
+
+def weight_multiplier(coupling_data, exercise_data) -> float:
+    multiplier = 1.0
+    grade = coupling_grade(coupling_data)
+    if grade is not None:
+        multiplier *= 1 + (3 - grade) * COUPLING_WEIGHT
+    ratio = exercise_ratio(exercise_data)
+    if ratio is not None:
+        multiplier *= 1 + (ratio - 0.5) * EXERCISE_WEIGHT
+    return min(max(multiplier, MIN_WEIGHT_MULTIPLIER), MAX_WEIGHT_MULTIPLIER)
+
+
+def _session_state(session: Optional[dict]):
+    session = session or {}
+    ease = session.get('ease_factor')
+    interval = session.get('interval_days')
+    return (
+        float(ease) if ease is not None else DEFAULT_EASE,
+        int(interval) if interval is not None else 1,
+        int(session.get('review_count') or 0),
+    )
+
+
+def _round_to(value: float, digits: int) -> float:
+    # Mesmo arredondamento do np.round (escala, arredonda para o par, desfaz a escala)
+    scale = 10.0 ** digits
+    return round(value * scale) / scale
+
+
+def _result(ease: float, interval: int, multiplier: float, now: datetime, dates: Dict[int, str]) -> dict:
+    next_review = dates.get(interval)
+    if next_review is None:
+        next_review = dates[interval] = (now + timedelta(days=interval)).isoformat()
+    return {
+        'next_review_date': next_review,
+        'new_ease_factor': ease,
+        'new_interval': interval,
+        'new_weight_multiplier': multiplier,
+    }
+
+
+def schedule(session: Optional[dict], grade: int, coupling_data=None, exercise_data=None,
+             now: Optional[datetime] = None) -> dict:
+    """
+    Calcula a próxima revisão de um item.
+
+    Args:
+        session: linha atual da sessão (`ease_factor`, `interval_days`, `review_count`).
+        grade: nota do app, de 1 (fácil) a 5 (difícil).
+
+    Returns:
+        O mesmo formato da RPC: next_review_date, new_ease_factor, new_interval e
+        new_weight_multiplier.
+    """
+    now = now or datetime.now(timezone.utc)
+    ease, interval, count = _session_state(session)
+    quality = min(max(6 - int(grade), 0), 5)
+    miss = 5 - quality
+
+    new_ease = _round_to(max(MIN_EASE, ease + 0.1 - miss * (0.08 + miss * 0.02)), 2)
+    if quality < 3 or count == 0:
+        base = 1.0
+    elif count == 1:
+        base = 6.0
+    else:
+        base = float(round(interval * new_ease))
+
+    multiplier = _round_to(weight_multiplier(coupling_data, exercise_data), 3)
+    new_interval = int(min(max(round(base * multiplier), 1), MAX_INTERVAL_DAYS))
+    return _result(new_ease, new_interval, multiplier, now, {})
+
+
+def schedule_batch(sessions: Sequence[Optional[dict]], grades: Sequence[int],
+                   coupling_data: Optional[Sequence[Any]] = None, exercise_data: Optional[Sequence[Any]] = None,
+                   now: Optional[datetime] = None) -> List[dict]:
+    """Versão vetorizada de `schedule` (mesmos resultados, item a item)."""
+    now = now or datetime.now(timezone.utc)
+    size = len(grades)
+    coupling_data = coupling_data if coupling_data is not None else [None] * size
+    exercise_data = exercise_data if exercise_data is not None else [None] * size
+    if np is None:
+        return [
+            schedule(session, grade, coupling, exercise, now)
+            for session, grade, coupling, exercise in zip(sessions, grades, coupling_data, exercise_data)
+        ]
+    if not size:
+        return []
+
+    states = [_session_state(session) for session in sessions]
+    ease = np.fromiter((state[0] for state in states), dtype=np.float64, count=size)
+    interval = np.fromiter((state[1] for state in states), dtype=np.float64, count=size)
+    count = np.fromiter((state[2] for state in states), dtype=np.int64, count=size)
+    quality = np.clip(6 - np.asarray(grades, dtype=np.int64), 0, 5)
+    miss = (5 - quality).astype(np.float64)
+    # Só a leitura do acoplamento é feita item a item; a conta é vetorizada
+    coupling = np.array([coupling_grade(value) for value in coupling_data], dtype=np.float64)
+    ratio = np.array([exercise_ratio(value) for value in exercise_data], dtype=np.float64)
+    multiplier = np.where(np.isnan(coupling), 1.0, 1 + (3 - coupling) * COUPLING_WEIGHT) \
+        * np.where(np.isnan(ratio), 1.0, 1 + (ratio - 0.5) * EXERCISE_WEIGHT)
+    multiplier = np.round(np.clip(multiplier, MIN_WEIGHT_MULTIPLIER, MAX_WEIGHT_MULTIPLIER), 3)
+
+    new_ease = np.round(np.maximum(MIN_EASE, ease + 0.1 - miss * (0.08 + miss * 0.02)), 2)
+    base = np.where(
+        (quality < 3) | (count == 0), 1.0,
+        np.where(count == 1, 6.0, np.round(interval * new_ease))
+    )
+    new_interval = np.clip(np.round(base * multiplier), 1, MAX_INTERVAL_DAYS).astype(np.int64)
+
+    dates: Dict[int, str] = {}
+    return [
+        _result(float(e), int(i), float(m), now, dates)
+        for e, i, m in zip(new_ease.tolist(), new_interval.tolist(), multiplier.tolist())
+    ]
+
+
+def _record_rpc_call(path: str, params: dict, session: Optional[dict], result) -> None:
+    ease, interval, count = _session_state(session)
+    record = {
+        'recorded_at': datetime.now(timezone.utc).isoformat(),
+        'params': params,
+        'session': {'ease_factor': ease, 'interval_days': interval, 'review_count': count},
+        'result': result,
+    }
+    line = json.dumps(record, default=str, ensure_ascii=False)
+    with _record_lock:
+        with open(path, 'a', encoding='utf-8') as handle:
+            handle.write(line + '\n')
+
+
+def calculate_srs_update(supabase, params: dict, session: Optional[dict]) -> Optional[dict]:
+    """
+    Próxima revisão de um item pela RPC `calculate_srs_update_v2`.
+
+    Args:
+        params: os parâmetros da RPC.
+        session: linha atual da sessão de revisão do item (usada na gravação).
+    """
+    return call_srs_rpc(supabase, params, session, current_app.config.get('SRS_RECORD_PATH'))
+
+
+def call_srs_rpc(supabase, params: dict, session: Optional[dict], record_path: Optional[str] = None) -> Optional[dict]:
+    """
+    Chama a RPC `calculate_srs_update_v2` (e grava a chamada em `record_path`).
+    Não usa `current_app`: pode rodar em threads sem contexto da aplicação.
+    """
+    result = supabase.rpc('calculate_srs_update_v2', params).execute().data
+    if record_path and result:
+        try:
+            _record_rpc_call(record_path, params, session, result)
+        except OSError as e:
+            logger.warning('Falha ao gravar a chamada da RPC de SRS em %s: %s', record_path, e)
+    return result
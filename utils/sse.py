@@ -0,0 +1,47 @@
+# src/utils/sse.py
+
+"""
+Utilitários para respostas Server-Sent Events (SSE).
+"""
+import json
+from typing import Iterable, Optional
+
+from flask import Response, request, stream_with_context
+
+
+def wants_event_stream(data: Optional[dict] = None) -> bool:
+    """True se o cliente pediu streaming (campo `stream` no corpo ou header Accept)."""
+    if data and data.get('stream'):
+        return True
+    return 'text/event-stream' in request.headers.get('Accept', '')
+
+
+def sse_event(data, event: Optional[str] = None) -> str:
+    """Formata um evento SSE com o payload serializado em JSON."""
+    payload = json.dumps(data, ensure_ascii=False)
+    lines = [f"event: {event}"] if event else []
+    lines.extend(f"data: {line}" for line in payload.splitlines() or [''])
+    return "\n".join(lines) + "\n\n"
+
+
+def sse_response(events: Iterable[dict]) -> Response:
+    """
+    Transmite eventos de geração como SSE.
+
+    Cada item de `events` é um dicionário com a chave `type` ('token', 'done' ou
+    'error'); o restante do dicionário vira o payload do evento.
+    """
+    def generate():
+        try:
+            for item in events:
+                item = dict(item)
+                event_type = item.pop('type', 'message')
+                yield sse_event(item, event=event_type)
+        except Exception as e:
+            yield sse_event({'error': str(e)}, event='error')
+
+    response = Response(stream_with_context(generate()), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    # Desativa o buffering em proxies como o nginx para o primeiro token chegar logo
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response